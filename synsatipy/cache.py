@@ -0,0 +1,573 @@
+#!/usr/bin/env python
+
+"""Content-addressed caches for RTTOV results, satellite geometry and remap weights."""
+
+import os
+import hashlib
+import collections
+
+import numpy as np
+import scipy.sparse
+
+from synsatipy.remap import remap_weights
+from synsatipy.utils.spacetools import lonlat2azizen
+
+
+# profile fields that enter the hash of a chunk
+PROFILE_FIELDS = [
+    "GasUnits",
+    "P",
+    "T",
+    "Q",
+    "CO2",
+    "Angles",
+    "SurfGeom",
+    "SurfType",
+    "Skin",
+    "S2m",
+    "DateTimes",
+    "MmrCldAer",
+    "Gases",
+    "GasId",
+    "IceCloud",
+]
+
+
+def options_as_dict(options):
+    """
+    Collect the scalar settings of a pyrttov options object.
+
+    Parameters
+    ----------
+    options : pyrttov.Options
+        The RTTOV options.
+
+    Returns
+    -------
+    opts : dict
+        Public scalar option values, sorted by name.
+    """
+
+    opts = {}
+    for name in sorted(dir(options)):
+        if name.startswith("_"):
+            continue
+
+        value = getattr(options, name, None)
+
+        if isinstance(value, (bool, int, float, str)):
+            opts[name] = value
+
+    return opts
+
+
+def hash_profiles(profiles, **config):
+    """
+    Calculate a content hash for a set of profiles and the RTTOV configuration.
+
+    Parameters
+    ----------
+    profiles : pyrttov.Profiles
+        The profiles of one chunk.
+
+    **config : dict
+        Additional configuration that influences the result, e.g. the
+        coefficient file, channel list, options, RTTOV version or atlas month.
+
+    Returns
+    -------
+    key : str
+        The hex digest of the hash.
+    """
+
+    h = hashlib.sha256()
+
+    for name in PROFILE_FIELDS:
+        value = getattr(profiles, name, None)
+
+        if value is None:
+            continue
+
+        value = np.ascontiguousarray(value)
+
+        h.update(name.encode())
+        h.update(str(value.dtype).encode())
+        h.update(str(value.shape).encode())
+        h.update(value.tobytes())
+
+    for name in sorted(config):
+        h.update(name.encode())
+        h.update(repr(config[name]).encode())
+
+    return h.hexdigest()
+
+
+class ResultCache(object):
+    """
+    Size-bounded on-disk cache of RTTOV results with LRU eviction.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory where the cached results are stored.
+
+    max_size : int, optional
+        Maximum size of the cache in bytes. Default is 10 GB.
+        Least recently used entries are removed if the size is exceeded.
+
+    Notes
+    -----
+    The cache directory is only scanned on the first write and when the
+    running total of the written sizes exceeds `max_size`.
+    """
+
+    def __init__(self, cache_dir, max_size=10 * 1024**3):
+
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        # running total of the cache size in bytes, None until scanned
+        self.size = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        return
+
+    def filename(self, key):
+        """
+        Get the cache filename for a key.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        Returns
+        -------
+        fname : str
+            The filename of the cache entry.
+        """
+
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def get(self, key):
+        """
+        Get a cached result.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        Returns
+        -------
+        result : numpy.ndarray or None
+            The cached result or None if the key is not in the cache.
+        """
+
+        fname = self.filename(key)
+
+        try:
+            result = np.load(fname)
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+
+        # mark entry as recently used
+        os.utime(fname)
+        self.hits += 1
+
+        return result
+
+    def put(self, key, result):
+        """
+        Store a result in the cache.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        result : numpy.ndarray
+            The result to store.
+
+        Returns
+        -------
+        None
+        """
+
+        fname = self.filename(key)
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+
+        try:
+            replaced_size = os.path.getsize(fname)
+        except OSError:
+            replaced_size = 0
+
+        # write to temporary file first to never leave broken entries
+        tmpname = f"{fname}.{os.getpid()}.tmp"
+        with open(tmpname, "wb") as f:
+            np.save(f, np.asarray(result))
+        os.replace(tmpname, fname)
+
+        if self.size is not None:
+            self.size += os.path.getsize(fname) - replaced_size
+
+        if self.size is None or self.size > self.max_size:
+            self.evict()
+
+        return
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits into `max_size`.
+
+        Returns
+        -------
+        None
+        """
+
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(self.cache_dir):
+            for f in filenames:
+                if not f.endswith(".npy"):
+                    continue
+                st = os.stat(os.path.join(dirpath, f))
+                entries += [(st.st_mtime, st.st_size, os.path.join(dirpath, f))]
+
+        total_size = sum([e[1] for e in entries])
+
+        for mtime, size, fname in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            os.remove(fname)
+            total_size -= size
+
+        self.size = total_size
+
+        return
+
+
+def grid_fingerprint(lon, lat):
+    """
+    Calculate a content hash of a horizontal grid.
+
+    Parameters
+    ----------
+    lon : numpy.ndarray
+        Longitudes of the grid columns.
+
+    lat : numpy.ndarray
+        Latitudes of the grid columns.
+
+    Returns
+    -------
+    key : str
+        The hex digest of the hash.
+    """
+
+    h = hashlib.sha256()
+
+    for name, value in [("lon", lon), ("lat", lat)]:
+        value = np.ascontiguousarray(value, dtype=np.float64)
+
+        h.update(name.encode())
+        h.update(str(value.shape).encode())
+        h.update(value.tobytes())
+
+    return h.hexdigest()
+
+
+class GeometryCache(object):
+    """
+    Cache of satellite azimuth and zenith angles per grid and sub-satellite longitude.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory where the geometry is additionally stored on disk.
+        Default is None (in-memory only).
+
+    max_entries : int, optional
+        Maximum number of grids kept in memory. Default is 8.
+
+    Notes
+    -----
+    The in-memory entries are shared by all instances, so that the
+    geometry of a grid is computed once per session, e.g. for all files
+    of a time series.
+    """
+
+    _memory = collections.OrderedDict()
+
+    def __init__(self, cache_dir=None, max_entries=8):
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        return
+
+    def filename(self, key):
+        """
+        Get the cache filename for a key.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        Returns
+        -------
+        fname : str
+            The filename of the cache entry.
+        """
+
+        return os.path.join(self.cache_dir, f"geometry_{key}.npz")
+
+    def get(self, lon, lat, lon0=0.0):
+        """
+        Get satellite azimuth and zenith angles, computing them only on a cache miss.
+
+        Parameters
+        ----------
+        lon : numpy.ndarray
+            Longitudes of the grid columns.
+
+        lat : numpy.ndarray
+            Latitudes of the grid columns.
+
+        lon0 : float, optional
+            Longitude of the sub-satellite point. Default is 0.0.
+
+        Returns
+        -------
+        azi : numpy.ndarray
+            Satellite azimuth angle, same shape as `lon`.
+
+        zen : numpy.ndarray
+            Satellite zenith angle, same shape as `lon`.
+        """
+
+        lon, lat = np.asarray(lon), np.asarray(lat)
+        key = f"{grid_fingerprint(lon, lat)}_{float(lon0):.4f}"
+
+        memory = self._memory
+
+        # 1. in memory
+        if key in memory:
+            memory.move_to_end(key)
+            self.hits += 1
+            return memory[key]
+
+        # 2. on disk
+        geometry = None
+
+        if self.cache_dir is not None:
+            try:
+                with np.load(self.filename(key)) as f:
+                    geometry = (f["azi"], f["zen"])
+            except (FileNotFoundError, ValueError, OSError, KeyError):
+                geometry = None
+
+        # 3. computed
+        if geometry is None:
+            self.misses += 1
+            geometry = lonlat2azizen(
+                lon.astype(np.float64), lat.astype(np.float64), lon0=lon0
+            )
+
+            if self.cache_dir is not None:
+                self.put(key, geometry)
+        else:
+            self.hits += 1
+
+        memory[key] = geometry
+        while len(memory) > self.max_entries:
+            memory.popitem(last=False)
+
+        return geometry
+
+    def put(self, key, geometry):
+        """
+        Store the geometry of a grid on disk.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        geometry : tuple of numpy.ndarray
+            Satellite azimuth and zenith angles.
+
+        Returns
+        -------
+        None
+        """
+
+        fname = self.filename(key)
+
+        # write to temporary file first to never leave broken entries
+        tmpname = f"{fname}.{os.getpid()}.tmp"
+        with open(tmpname, "wb") as f:
+            np.savez(f, azi=geometry[0], zen=geometry[1])
+        os.replace(tmpname, fname)
+
+        return
+
+
+class RemapCache(object):
+    """
+    Cache of remap weights per model grid, target grid and remap method.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory where the weights are additionally stored on disk.
+        Default is None (in-memory only).
+
+    max_entries : int, optional
+        Maximum number of weight matrices kept in memory. Default is 4.
+
+    Notes
+    -----
+    As for `GeometryCache`, the in-memory entries are shared by all
+    instances, so that the weights are computed once per session.
+    """
+
+    _memory = collections.OrderedDict()
+
+    def __init__(self, cache_dir=None, max_entries=4):
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        return
+
+    def filename(self, key):
+        """
+        Get the cache filename for a key.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        Returns
+        -------
+        fname : str
+            The filename of the cache entry.
+        """
+
+        return os.path.join(self.cache_dir, f"remap_{key}.npz")
+
+    def get(self, src_lon, src_lat, dst_lon, dst_lat, method="nearest"):
+        """
+        Get remap weights, computing them only on a cache miss.
+
+        Parameters
+        ----------
+        src_lon : numpy.ndarray
+            Longitudes of the model grid columns.
+
+        src_lat : numpy.ndarray
+            Latitudes of the model grid columns.
+
+        dst_lon : numpy.ndarray
+            Longitudes of the target pixels.
+
+        dst_lat : numpy.ndarray
+            Latitudes of the target pixels.
+
+        method : str, optional
+            The remap method, see `synsatipy.remap.remap_weights`.
+            Default is "nearest".
+
+        Returns
+        -------
+        weights : scipy.sparse.csr_matrix
+            Matrix of shape (npixels, ncolumns).
+        """
+
+        key = "_".join(
+            [
+                grid_fingerprint(src_lon, src_lat)[:32],
+                grid_fingerprint(dst_lon, dst_lat)[:32],
+                method,
+            ]
+        )
+
+        memory = self._memory
+
+        # 1. in memory
+        if key in memory:
+            memory.move_to_end(key)
+            self.hits += 1
+            return memory[key]
+
+        # 2. on disk
+        weights = None
+
+        if self.cache_dir is not None:
+            try:
+                weights = scipy.sparse.load_npz(self.filename(key)).tocsr()
+            except (FileNotFoundError, ValueError, OSError, KeyError):
+                weights = None
+
+        # 3. computed
+        if weights is None:
+            self.misses += 1
+            weights = remap_weights(src_lon, src_lat, dst_lon, dst_lat, method=method)
+
+            if self.cache_dir is not None:
+                self.put(key, weights)
+        else:
+            self.hits += 1
+
+        memory[key] = weights
+        while len(memory) > self.max_entries:
+            memory.popitem(last=False)
+
+        return weights
+
+    def put(self, key, weights):
+        """
+        Store remap weights on disk.
+
+        Parameters
+        ----------
+        key : str
+            The hash key.
+
+        weights : scipy.sparse.csr_matrix
+            The remap weights.
+
+        Returns
+        -------
+        None
+        """
+
+        fname = self.filename(key)
+
+        # write to temporary file first to never leave broken entries
+        tmpname = f"{fname}.{os.getpid()}.tmp"
+        with open(tmpname, "wb") as f:
+            scipy.sparse.save_npz(f, weights)
+        os.replace(tmpname, fname)
+
+        return
@@ -11,8 +11,14 @@ from synsatipy.starter import pyrttov
 import synsatipy.input_icon as input_icon
 import synsatipy.input_era as input_era
 import synsatipy.input_nextgems as input_nextgems
+import synsatipy.sampling as sampling
+import synsatipy.cache as cache
+import synsatipy.derived as derived
 
-from synsatipy.utils.spacetools import lonlat2azizen
+from synsatipy.utils.spacetools import (
+    points_in_polygon,
+    region_bounding_box,
+)
 
 
 ######################################################################
@@ -55,6 +61,69 @@ def dt2cal(dt):
 ######################################################################
 
 
+def cast_to_float32(dset):
+    """
+    Cast all float64 data variables of a dataset to float32.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The input dataset.
+
+    Returns
+    -------
+    dset : xarray.Dataset
+        The dataset with float32 data variables.
+
+    Notes
+    -----
+    Input fields are kept in single precision until the RTTOV boundary.
+    Conversion to float64 is only done chunk-wise in `DataHandler.data2profile`.
+    """
+
+    for vname in dset.data_vars:
+        if dset[vname].dtype == np.float64:
+            dset[vname] = dset[vname].astype(np.float32)
+
+    return dset
+
+
+######################################################################
+######################################################################
+
+
+def storage_profile_dimensions(dset, reference_variable="t", vertical_dimension="lev"):
+    """
+    Get the profile dimensions in the order they are stored in the input.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The input dataset.
+
+    reference_variable : str, optional
+        Variable whose dimension order is used. Default is "t".
+
+    vertical_dimension : str, optional
+        The vertical dimension, which is not part of the profile index.
+        Default is "lev".
+
+    Returns
+    -------
+    profile_dimensions : list
+        The profile dimensions, e.g. ["time", "lat", "lon"] for data
+        stored as (time, lev, lat, lon).
+    """
+
+    dims = dset[reference_variable].dims
+
+    return [d for d in dims if d != vertical_dimension]
+
+
+######################################################################
+######################################################################
+
+
 def autodetect_model_by_filename(fname):
     """
     Autodetects the model based on the filename.
@@ -78,6 +147,10 @@ def autodetect_model_by_filename(fname):
 
     model = None
 
+    # lists of files are detected by their first file
+    if not isinstance(fname, str):
+        fname = fname[0]
+
     era_keys = ["era"]
 
     for k in era_keys:
@@ -114,14 +187,24 @@ class DataHandler(object):
     return_profile : bool, optional
         Whether to return profile data. Default is True.
 
+    geometry_cache : synsatipy.cache.GeometryCache, optional
+        Cache of the satellite geometry. Default is None (in-memory cache).
+
     **kwargs : dict
         Additional keyword arguments.
     """
 
-    def __init__(self, model="auto", return_profile=True, **kwargs):
+    def __init__(self, model="auto", return_profile=True, geometry_cache=None, **kwargs):
 
         self.model = model
 
+        if geometry_cache is None:
+            geometry_cache = cache.GeometryCache()
+        self.geometry_cache = geometry_cache
+
+        # derived variables, evaluated per chunk on the loaded profiles
+        self.derived_variables = []
+
         return
 
     def open_data(self, filename, **kwargs):
@@ -134,6 +217,11 @@ class DataHandler(object):
             The name of the file to open.
         **kwargs : dict
             Additional keyword arguments.
+            - region : list, optional
+              Region of interest, either as bounding box
+              [lon_min, lon_max, lat_min, lat_max] or as polygon of
+              (lon, lat) vertices. It is applied on the native grid before
+              merging. Default is None (full domain).
 
         Returns
         -------
@@ -142,6 +230,10 @@ class DataHandler(object):
         """
         isel = kwargs.pop("isel", None)
         lon0 = kwargs.pop("lon0", 0.0)
+        region = kwargs.get("region", None)
+
+        # recipes of derived variables belong to the opened data
+        self.derived_variables = []
 
         if self.model == "auto":
             model = autodetect_model_by_filename(filename)
@@ -152,18 +244,44 @@ class DataHandler(object):
 
             #            from input_era import open_era
 
-            indat = input_era.open_era(filename, **kwargs)
+            indat = input_era.open_era(
+                filename, derived_variables=self.derived_variables, **kwargs
+            )
 
         elif model == "icon":
             #            from input_icon import open_icon
 
-            indat = input_icon.open_icon(filename, **kwargs)
+            indat = input_icon.open_icon(
+                filename, derived_variables=self.derived_variables, **kwargs
+            )
 
         elif model == "nextgems":
             #            from input_icon import open_icon
 
             catname = filename
-            indat = input_nextgems.open_nextgems(catname, lon0 = lon0, **kwargs)
+
+            if region is not None:
+                kwargs["mask_type"] = "regional"
+                kwargs["extend"] = region_bounding_box(region)
+
+            indat = input_nextgems.open_nextgems(
+                catname, lon0=lon0, derived_variables=self.derived_variables, **kwargs
+            )
+
+        indat = cast_to_float32(indat)
+
+        # regular grids are only cut to the bounding box of a polygon region,
+        # columns outside the polygon are masked
+        if region is not None and np.ndim(region) == 2:
+            lon, lat = xr.broadcast(indat["lon"], indat["lat"])
+            in_region = xr.DataArray(
+                points_in_polygon(lon.values, lat.values, region), dims=lon.dims
+            )
+
+            if "mask" in indat:
+                indat["mask"] = indat["mask"].astype(bool) & in_region
+            else:
+                indat["mask"] = in_region
 
         if isel is not None:
             self.input_data = indat.isel(**isel)
@@ -173,41 +291,454 @@ class DataHandler(object):
 
     def stack_data_as_profile(self, **kwargs):
         """
-        Stacks input data as profile data.
+        Defines the profile index over the input data.
 
         Parameters
         ----------
         **kwargs : dict
             Additional keyword arguments.
             - profile_dimensions : list, optional
+              Dimensions combined into profiles. Default is None, i.e. the
+              storage order of the input (see `storage_profile_dimensions`).
+            - quicklook_stride : int, optional
+              Quick-look mode: only every n-th profile in each horizontal
+              direction is computed. Default is None (all profiles).
+            - quicklook_method : str, optional
+              Fill method for the full output grid in quick-look mode,
+              "nearest" or "bilinear". Default is "nearest".
+            - max_zenith : float, optional
+              Profiles with a satellite zenith angle above `max_zenith` are
+              not selected. Default is None (no zenith filter).
+            - lon0 : float, optional
+              Longitude of the sub-satellite point. Default is 0.0.
+
+        Notes
+        -----
+        The input data are not stacked. Profiles are numbered by the flat
+        position `numpy.ravel_multi_index` would give on the grid of
+        `profile_dimensions`; masked profiles are excluded via the compact
+        integer array `selected_profiles_index`.
         """
 
-        profile_dimensions = kwargs.pop("profile_dimensions", ["time", "lon", "lat"])
+        profile_dimensions = kwargs.pop("profile_dimensions", None)
+        max_zenith = kwargs.pop("max_zenith", None)
+        lon0 = kwargs.pop("lon0", 0.0)
+        quicklook_stride = kwargs.pop("quicklook_stride", None)
+        quicklook_method = kwargs.pop("quicklook_method", "nearest")
+
+        # profile ordering follows the storage layout
+        if profile_dimensions is None:
+            profile_dimensions = storage_profile_dimensions(self.input_data)
+
+        self.profile_dimensions = profile_dimensions
+        self.subsatellite_lon = lon0
+        self.quicklook_stride = quicklook_stride
+        self.quicklook_method = quicklook_method
+        self.horizontal_dimensions = [d for d in profile_dimensions if d != "time"]
+
+        input_data = self.input_data
+
+        # quick-look: subsample horizontal dimensions
+        if quicklook_stride is not None:
+            input_data = input_data.isel(
+                sampling.strided_isel(self.horizontal_dimensions, quicklook_stride)
+            )
 
-        # stack the full data array
-        stacked_input_data = self.input_data.stack(profile=profile_dimensions)
+        self.profile_shape = tuple([input_data.sizes[d] for d in profile_dimensions])
+        nfull = int(np.prod(self.profile_shape))
 
-        full_index = np.arange(stacked_input_data.sizes['profile'])
+        # satellite geometry on the horizontal grid, computed once here and
+        # only indexed per chunk in `data2profile`
+        self.satellite_geometry = self.get_satellite_geometry(input_data, lon0=lon0)
 
         # potentially sub-select profiles
-        if 'mask' in stacked_input_data:
-            mask = stacked_input_data['mask']
-            selected_profiles_index = full_index[mask]
+        profile_mask = self.get_profile_mask(
+            input_data, profile_dimensions, max_zenith=max_zenith
+        )
+
+        if profile_mask is not None:
+            index_dtype = np.int32 if nfull < np.iinfo(np.int32).max else np.int64
+            selected_profiles_index = np.flatnonzero(profile_mask).astype(index_dtype)
+            total_number_of_profiles = len(selected_profiles_index)
 
         else:
-            selected_profiles_index = full_index
+            selected_profiles_index = None
+            total_number_of_profiles = nfull
 
-        selected_input_data = stacked_input_data.isel( profile = selected_profiles_index)
+        self.profile_coords = {
+            d: input_data[d].data if d in input_data.indexes else np.arange(n)
+            for d, n in zip(profile_dimensions, self.profile_shape)
+        }
+        self.selected_profiles_index = selected_profiles_index
 
-        # store selected data
-        total_number_of_profiles = selected_input_data.sizes['profile'] 
+        # dask block boundaries along the profile dimensions
+        chunksizes = input_data["t"].chunksizes
 
-        self.input_data_as_profile = selected_input_data
+        if chunksizes:
+            self.profile_block_bounds = [
+                np.cumsum((0,) + chunksizes[d]) for d in profile_dimensions
+            ]
+        else:
+            self.profile_block_bounds = None
+
+        self.sampled_input_data = input_data
 
         self.total_number_of_profiles = total_number_of_profiles
 
+        if quicklook_stride is not None:
+            self.quicklook_speedup = (
+                np.prod([self.input_data.sizes[d] for d in profile_dimensions]) / nfull
+            )
+
+            print(
+                f"... [synsat] quick-look mode with stride {quicklook_stride}: "
+                f"speed-up factor {self.quicklook_speedup:.1f}"
+            )
+
         return
 
+    def profile_positions(self, index=None):
+        """
+        Get the flat grid positions of selected profiles.
+
+        Parameters
+        ----------
+        index : slice or numpy.ndarray, optional
+            Selected profiles. Default is None (all selected profiles).
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            Flat positions on the grid of `profile_dimensions`.
+        """
+
+        if index is None:
+            index = slice(0, None)
+
+        if self.selected_profiles_index is not None:
+            return self.selected_profiles_index[index]
+
+        # without mask, profile and grid positions coincide
+        if isinstance(index, slice):
+            return np.arange(*index.indices(self.total_number_of_profiles))
+
+        return np.asarray(index)
+
+    def grid_positions_to_profiles(self, positions):
+        """
+        Get the profile index of flat grid positions of selected profiles.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            Flat positions on the grid of `profile_dimensions`, all of
+            them selected.
+
+        Returns
+        -------
+        index : numpy.ndarray
+            Positions along the profile dimension (inverse of `profile_positions`).
+        """
+
+        if self.selected_profiles_index is None:
+            return positions
+
+        return np.searchsorted(self.selected_profiles_index, positions)
+
+    def profiles_to_grid(self, values, fill_value=np.nan):
+        """
+        Scatters values of the selected profiles back onto the profile grid.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Values of all selected profiles, with profiles along the first axis.
+
+        fill_value : scalar, optional
+            Value for unselected profiles. Default is numpy.nan.
+
+        Returns
+        -------
+        gridded : numpy.ndarray
+            Array of shape `profile_shape` + `values.shape[1:]`.
+        """
+
+        shape = self.profile_shape + values.shape[1:]
+
+        if self.selected_profiles_index is None:
+            return values.reshape(shape)
+
+        gridded = np.full(
+            (int(np.prod(self.profile_shape)),) + values.shape[1:],
+            fill_value,
+            dtype=np.result_type(values, fill_value),
+        )
+        gridded[self.selected_profiles_index] = values
+
+        return gridded.reshape(shape)
+
+    def grid_coordinates(self):
+        """
+        Get lon / lat of unstructured grids, e.g. native ICON cells.
+
+        Returns
+        -------
+        grid_coords : dict
+            lon and lat on the horizontal grid of the input data if they are
+            not dimension coordinates, otherwise empty.
+        """
+
+        return {
+            v: self.input_data[v].reset_coords(drop=True)
+            for v in ["lon", "lat"]
+            if v in self.input_data.coords and v not in self.input_data.indexes
+        }
+
+    def get_profile_chunks(self, nprof_per_chunk, index=None):
+        """
+        Splits the selected profiles into chunks aligned with the dask blocks.
+
+        Parameters
+        ----------
+        nprof_per_chunk : int
+            Targeted number of profiles per chunk.
+
+        index : slice or numpy.ndarray, optional
+            Subset of selected profiles (positions along the profile dimension).
+            Default is None (all selected profiles).
+
+        Returns
+        -------
+        profile_chunks : list of numpy.ndarray
+            Profile positions per chunk. Their concatenation is a permutation
+            of `index`.
+
+        Notes
+        -----
+        Whole dask blocks are packed into chunks as long as the chunk covers
+        a compact box of blocks. A block that is larger than `nprof_per_chunk`
+        is split into consecutive pieces of `nprof_per_chunk` profiles.
+        Without dask blocks, `index` is split into contiguous pieces of
+        `nprof_per_chunk` profiles.
+        """
+
+        if index is None:
+            index = slice(0, None)
+
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(self.total_number_of_profiles))
+
+        if self.profile_block_bounds is None:
+            return [
+                index[i0 : i0 + nprof_per_chunk]
+                for i0 in range(0, len(index), nprof_per_chunk)
+            ]
+
+        # block of each profile
+        positions = self.profile_positions(index)
+        multi_index = np.unravel_index(positions, self.profile_shape)
+
+        block_index = np.array(
+            [
+                np.searchsorted(bounds, i, side="right") - 1
+                for bounds, i in zip(self.profile_block_bounds, multi_index)
+            ]
+        )
+        nblocks = [len(bounds) - 1 for bounds in self.profile_block_bounds]
+        block_id = np.ravel_multi_index(block_index, nblocks)
+
+        order = np.argsort(block_id, kind="stable")
+        splits = np.flatnonzero(np.diff(block_id[order])) + 1
+
+        blocks = np.split(order, splits)
+
+        # blocks larger than a chunk are split into consecutive pieces
+        blocks = [
+            b[i0 : i0 + nprof_per_chunk]
+            for b in blocks
+            for i0 in range(0, len(b), nprof_per_chunk)
+        ]
+
+        # pack whole blocks into chunks
+        profile_chunks = []
+        current = []
+        nprof = 0
+        box_min = box_max = None
+
+        for b in blocks:
+            b_index = block_index[:, b[0]]
+
+            if nprof > 0:
+                new_min = np.minimum(box_min, b_index)
+                new_max = np.maximum(box_max, b_index)
+                nblocks_in_box = np.prod(new_max - new_min + 1)
+
+                if nprof + len(b) > nprof_per_chunk or nblocks_in_box > len(current) + 1:
+                    profile_chunks += [index[np.concatenate(current)]]
+                    current, nprof = [], 0
+
+            if nprof == 0:
+                box_min = box_max = b_index
+            else:
+                box_min, box_max = new_min, new_max
+
+            current += [b]
+            nprof += len(b)
+
+        if current:
+            profile_chunks += [index[np.concatenate(current)]]
+
+        return profile_chunks
+
+    def load_profiles(self, index):
+        """
+        Loads selected profiles from the unstacked input data.
+
+        Parameters
+        ----------
+        index : slice or numpy.ndarray
+            Positions along the profile dimension.
+
+        Returns
+        -------
+        profs : xarray.Dataset
+            The loaded profiles along the dimension "profile".
+
+        Notes
+        -----
+        Only the box enclosing the requested profiles is read, as one
+        contiguous selection of the unstacked input. Derived variables are
+        evaluated afterwards on the selected profiles only.
+        """
+
+        positions = self.profile_positions(index)
+        multi_index = np.unravel_index(positions, self.profile_shape)
+
+        box = {
+            d: slice(i.min(), i.max() + 1)
+            for d, i in zip(self.profile_dimensions, multi_index)
+        }
+        block = self.sampled_input_data.isel(box).load()
+
+        points = {
+            d: xr.DataArray(i - i.min(), dims="profile")
+            for d, i in zip(self.profile_dimensions, multi_index)
+        }
+        profs = block.isel(points)
+
+        profs = derived.evaluate(profs, self.derived_variables)
+
+        return profs
+
+    def get_variable(self, vname):
+        """
+        Get a (possibly derived) variable of the subsampled input on the full grid.
+
+        Parameters
+        ----------
+        vname : str
+            The variable name.
+
+        Returns
+        -------
+        v : xarray.DataArray
+            The variable.
+        """
+
+        dset = derived.evaluate(
+            self.sampled_input_data, self.derived_variables, names=[vname]
+        )
+
+        return dset[vname]
+
+    def get_satellite_geometry(self, input_data, lon0=0.0):
+        """
+        Get satellite azimuth and zenith angles on the horizontal grid.
+
+        Parameters
+        ----------
+        input_data : xarray.Dataset
+            The (unstacked) input data with "lon" and "lat".
+
+        lon0 : float, optional
+            Longitude of the sub-satellite point. Default is 0.0.
+
+        Returns
+        -------
+        azi : xarray.DataArray
+            Satellite azimuth angle on the horizontal grid.
+
+        zen : xarray.DataArray
+            Satellite zenith angle on the horizontal grid.
+
+        Notes
+        -----
+        The angles are taken from `geometry_cache` and only computed once
+        per grid and sub-satellite longitude.
+        """
+
+        lon, lat = xr.broadcast(input_data["lon"], input_data["lat"])
+        lon, lat = lon.drop_vars(list(lon.coords)), lat.drop_vars(list(lat.coords))
+
+        azi, zen = self.geometry_cache.get(lon.values, lat.values, lon0=lon0)
+
+        return xr.DataArray(azi, dims=lon.dims), xr.DataArray(zen, dims=lon.dims)
+
+    def get_profile_mask(self, input_data, profile_dimensions, max_zenith=None):
+        """
+        Combines the optional input mask and the zenith filter into a profile mask.
+
+        Parameters
+        ----------
+        input_data : xarray.Dataset
+            The (unstacked) input data.
+
+        profile_dimensions : list
+            The dimensions that are combined into profiles.
+
+        max_zenith : float, optional
+            Maximum satellite zenith angle of `satellite_geometry`. Default
+            is None (no zenith filter).
+
+        Returns
+        -------
+        profile_mask : numpy.ndarray or None
+            Flat boolean mask over the grid of `profile_dimensions`, or None
+            if all profiles are selected.
+        """
+
+        mask = None
+
+        if "mask" in input_data:
+            mask = input_data["mask"].astype(bool)
+
+        # satellite zenith is evaluated on the horizontal grid only
+        if max_zenith is not None:
+            azi, zen = self.satellite_geometry
+
+            in_view = zen <= max_zenith
+
+            print(
+                f"... [synsat] zenith filter: {in_view.values.mean() * 100:.1f}% of columns within {max_zenith} deg"
+            )
+
+            if mask is None:
+                mask = in_view
+            else:
+                mask = mask & in_view
+
+        if mask is None:
+            return None
+
+        missing_dimensions = {
+            d: input_data.sizes[d] for d in profile_dimensions if d not in mask.dims
+        }
+        mask = mask.drop_vars(list(mask.coords)).expand_dims(missing_dimensions)
+
+        profile_mask = mask.transpose(*profile_dimensions).values.ravel()
+
+        return profile_mask
+
     def data2profile(self, **kwargs):
         """
         Converts data to a profile object.
@@ -216,6 +747,10 @@ class DataHandler(object):
         ----------
         **kwargs : dict
             Additional keyword arguments.
+            - lon0 : float, optional
+              Longitude of the sub-satellite point. The satellite geometry
+              is computed for `lon0` of `stack_data_as_profile`; a different
+              value raises a ValueError. Default is None (no check).
 
         Returns
         -------
@@ -250,41 +785,58 @@ class DataHandler(object):
         else:
             use_snow_factor = False
 
-        lon0 = kwargs.pop("lon0", 0.0)
-
-        # get all stacked data
-        stacked_input_data = self.input_data_as_profile
+        # the satellite geometry for `lon0` is set in `stack_data_as_profile`
+        lon0 = kwargs.pop("lon0", None)
+        if lon0 is not None and lon0 != self.subsatellite_lon:
+            raise ValueError(
+                f"Satellite geometry was computed for lon0 = {self.subsatellite_lon}, "
+                f"not {lon0}; pass lon0 to stack_data_as_profile"
+            )
 
         if "isel" in kwargs:
             isel = kwargs["isel"]
         else:
             isel = {"profile": slice(0, None)}
 
-        profs = stacked_input_data.isel(**isel).load()
+        profs = self.load_profiles(isel["profile"])
+
+        # input is kept in single precision up to here, RTTOV needs double
+        def as_float64(vname):
+            return profs[vname].transpose("profile", ...).data.astype(np.float64)
 
         # initialize profile
-        nlevels = profs.dims["lev"]
-        nprofiles = profs.dims["profile"]
+        nlevels = profs.sizes["lev"]
+        nprofiles = profs.sizes["profile"]
         myProfiles = pyrttov.Profiles(nprofiles, nlevels)
 
         # some util vars
-        zeros = np.zeros_like(profs["p"].data.T)
+        zeros = np.zeros((nprofiles, nlevels), dtype=np.float64)
         ones = zeros[:, :1] + 1
 
         
         # fill profile
-        q = profs["q"].data.T
-        Temp =  profs["t"].data.T
+        q = as_float64("q")
+        Temp = as_float64("t")
 
         Temp = np.clip(Temp, 100, 400) 
 
-        myProfiles.P = profs["p"].data.T * 1e-2  # in hPa
+        myProfiles.P = as_float64("p") * 1e-2  # in hPa
         myProfiles.T = Temp # gas_units = 1 => kg/kg over moist air (default)
         myProfiles.Q = q
 
-        # get satellite angles
-        lon, lat = profs["lon"].data, profs["lat"].data
-        azi, zen = lonlat2azizen(lon, lat, lon0=lon0)
+        # get satellite angles, indexed on the precomputed horizontal grid
+        lon, lat = as_float64("lon"), as_float64("lat")
+
+        azi_grid, zen_grid = self.satellite_geometry
+        multi_index = dict(
+            zip(
+                self.profile_dimensions,
+                np.unravel_index(self.profile_positions(isel["profile"]), self.profile_shape),
+            )
+        )
+        grid_index = tuple(multi_index[d] for d in zen_grid.dims)
+
+        azi, zen = azi_grid.values[grid_index], zen_grid.values[grid_index]
 
         # set max zen angle
         zen = np.clip(zen, 0, 80)
@@ -295,40 +847,39 @@ class DataHandler(object):
         myProfiles.SurfGeom = np.vstack([lat, lon,  0 * lat]).T           # (latitude, longitude, elevation) for each profile.
         myProfiles.SurfType = zeros[:, :2]
 
-        skt = np.expand_dims(profs["SKT"], axis=1)
+        skt = np.expand_dims(as_float64("SKT"), axis=1)
         skt = np.clip(skt, 200, 400) 
 
         fastem = np.hstack([3 * ones, 5 * ones, 15 * ones, 0.1 * ones, 0.3 * ones])
 
         myProfiles.Skin = np.hstack([skt, zeros[:, :3], fastem])
 
-        ps2m = np.expand_dims(profs["SP"], axis=1) * 1e-2  # in hPa
-        T2m = np.expand_dims(profs["T2M"], axis=1)
+        ps2m = np.expand_dims(as_float64("SP"), axis=1) * 1e-2  # in hPa
+        T2m = np.expand_dims(as_float64("T2M"), axis=1)
         T2m = np.clip(T2m, 200, 400) 
 
         q2m = np.expand_dims(q[:, 0], axis=1)  # only dew point there
 
         myProfiles.S2m = np.hstack([ps2m, T2m, q2m, zeros[:, :3]])
 
-        tvec = dt2cal(profs.time.data[0])
-        tvec = np.expand_dims(tvec, axis=0)[:, :6]
-        myProfiles.DateTimes = tvec.repeat(nprofiles, axis=0)
+        # each profile gets its own date, chunks may span several time steps
+        times = np.broadcast_to(profs.time.data, (nprofiles,))
+        myProfiles.DateTimes = dt2cal(times)[:, :6]
 
         # testing the cloud vars here
         # myProfiles.Ngases = 4
-        q = profs["q"].data.T
-        qc = profs["clwc"].data.T
+        qc = as_float64("clwc")
 
-        qi = profs["ciwc"].data.T
+        qi = as_float64("ciwc")
 
         if use_snow_factor:
             print("... [synsat]: applying snow factor,", snow_factor)
-            qs = profs["cswc"].data.T
+            qs = as_float64("cswc")
             q_frozen = qi + snow_factor * qs
         else:
             q_frozen = qi
 
-        cc = profs["cc"].data.T
+        cc = as_float64("cc")
 
         gases = np.stack([q, cc, qc, q_frozen])
         myProfiles.MmrCldAer = 1
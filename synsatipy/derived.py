@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+"""Registry of derived-variable recipes, evaluated lazily on the loaded profiles."""
+
+
+# recipe name -> function(dset, **params) returning an xarray.DataArray
+RECIPES = {}
+
+
+def register(name):
+    """
+    Decorator that registers a derived-variable recipe.
+
+    Parameters
+    ----------
+    name : str
+        The recipe name.
+
+    Returns
+    -------
+    decorator : callable
+        Registers the decorated function under `name` and returns it.
+    """
+
+    def decorator(func):
+        RECIPES[name] = func
+        return func
+
+    return decorator
+
+
+def add(derived_variables, name, recipe, **params):
+    """
+    Append a derived variable to a list of derived-variable definitions.
+
+    Parameters
+    ----------
+    derived_variables : list
+        List of (name, recipe, params) definitions.
+
+    name : str
+        Name of the derived variable. An existing variable of that name
+        is replaced.
+
+    recipe : str
+        Name of a registered recipe.
+
+    **params : dict
+        Parameters of the recipe.
+
+    Returns
+    -------
+    None
+    """
+
+    if recipe not in RECIPES:
+        raise KeyError(f"Unknown derived-variable recipe: {recipe}")
+
+    derived_variables += [(name, recipe, params)]
+
+    return
+
+
+def evaluate(dset, derived_variables, names=None):
+    """
+    Evaluate derived variables on a dataset.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset, e.g. the loaded profiles of one chunk.
+
+    derived_variables : list
+        List of (name, recipe, params) definitions, evaluated in order.
+
+    names : list, optional
+        Only evaluate these derived variables. Default is None (all).
+
+    Returns
+    -------
+    dset : xarray.Dataset
+        The dataset with derived variables added or replaced.
+    """
+
+    if not derived_variables:
+        return dset
+
+    dset = dset.copy()
+
+    for name, recipe, params in derived_variables:
+        if names is not None and name not in names:
+            continue
+
+        dset[name] = RECIPES[recipe](dset, **params)
+
+    return dset
+
+
+######################################################################
+######################################################################
+
+
+@register("clip_min")
+def clip_min(dset, source, vmin):
+    """
+    Clip a variable from below.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    source : str
+        The variable to clip.
+
+    vmin : float
+        Values below `vmin` are set to `vmin`.
+
+    Returns
+    -------
+    v : xarray.DataArray
+        The clipped variable.
+    """
+
+    return dset[source].clip(min=vmin)
+
+
+@register("scale")
+def scale(dset, source, divisor):
+    """
+    Scale a variable, e.g. for a unit change.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    source : str
+        The variable to scale.
+
+    divisor : float
+        The variable is divided by `divisor`.
+
+    Returns
+    -------
+    v : xarray.DataArray
+        The scaled variable.
+    """
+
+    return dset[source] / divisor
+
+
+@register("lowest_level")
+def lowest_level(dset, source, level_dimension):
+    """
+    Take the lowest model level of a variable.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    source : str
+        The 3d variable.
+
+    level_dimension : str
+        The vertical dimension (top to bottom).
+
+    Returns
+    -------
+    v : xarray.DataArray
+        The variable on the lowest level.
+    """
+
+    return dset[source].isel({level_dimension: -1})
+
+
+@register("condensate_cloud_cover")
+def condensate_cloud_cover(dset, sources, threshold, inclusive=False):
+    """
+    Binary cloud cover from the total condensate.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    sources : list
+        The condensate mixing ratios that are summed up.
+
+    threshold : float
+        Cloudy if the total condensate exceeds `threshold`.
+
+    inclusive : bool, optional
+        Whether the threshold itself counts as cloudy. Default is False.
+
+    Returns
+    -------
+    cc : xarray.DataArray
+        Cloud cover (0 or 1) in the precision of the input fields.
+    """
+
+    qtot = sum([dset[v] for v in sources])
+
+    if inclusive:
+        cloudy = qtot >= threshold
+    else:
+        cloudy = qtot > threshold
+
+    return cloudy.astype(qtot.dtype)
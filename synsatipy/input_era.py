@@ -3,10 +3,24 @@
 """Input module for ERA data."""
 
 import os, sys
+import glob
+import functools
 
 import numpy as np
 import xarray as xr
 
+import synsatipy.derived as derived
+import synsatipy.utils.spacetools as spacetools
+
+
+GRIB_EXTENSIONS = [".grib", ".grb", ".grib1", ".grb1", ".grib2", ".grb2"]
+
+# model-level variables read from GRIB (lnsp is opened separately)
+GRIB_MODEL_LEVEL_VARIABLES = ["t", "q", "clwc", "ciwc", "cswc", "cc"]
+
+# surface variables read from GRIB; 2t is stored on heightAboveGround in GRIB2
+GRIB_SURFACE_VARIABLES = ["skt", "2t", "sp"]
+
 
 def era_name_analyzer(era_name):
     """
@@ -25,7 +39,8 @@ def era_name_analyzer(era_name):
     Notes
     -----
     The ERA name assumed to be in the form of 
-    {modelname}-{data_type}-{region}-{year}-{month}-{day}.nc.
+    {modelname}-{data_type}-{region}-{year}-{month}-{day}.nc,
+    GRIB files use the same form with a GRIB extension (e.g. .grib).
 
     """
     fullpath = os.path.dirname(era_name)
@@ -36,6 +51,7 @@ def era_name_analyzer(era_name):
 
     era_name_props = {}
     era_name_props["fullpath"] = fullpath
+    era_name_props["extension"] = ext
     era_name_props["modelname"] = modelname
     era_name_props["data_type"] = data_type
     era_name_props["region"] = region
@@ -69,7 +85,7 @@ def era_name_converter(era_name, mode="3d_to_2d"):
         era_name_props = era_name_analyzer(era_name)
 
         era_name_converted = (
-            "{fullpath}/{modelname}-2d-{region}-{year}-{month}.nc".format(
+            "{fullpath}/{modelname}-2d-{region}-{year}-{month}{extension}".format(
                 **era_name_props
             )
         )
@@ -77,14 +93,409 @@ def era_name_converter(era_name, mode="3d_to_2d"):
     return era_name_converted
 
 
-def open_era(era3d_name, add_pressure=True, qmin=1.1e-9, **kwargs):
+def era_file_list(era3d_name):
     """
-    Open the ERA data.
+    Expand the ERA 3d input into a sorted list of files.
+
+    Parameters
+    ----------
+    era3d_name : str or list
+        A filename, a glob pattern or a list of filenames of ERA 3d files.
+
+    Returns
+    -------
+    era3d_files : list
+        The list of files.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a glob pattern does not match any file.
+    """
+
+    if not isinstance(era3d_name, str):
+        return list(era3d_name)
+
+    if glob.has_magic(era3d_name):
+        era3d_files = sorted(glob.glob(era3d_name))
+
+        if len(era3d_files) == 0:
+            raise FileNotFoundError(f"No ERA files match {era3d_name}")
+
+        return era3d_files
+
+    return [era3d_name]
+
+
+def era_file_format(era_name):
+    """
+    Determine the format of an ERA file from its extension.
+
+    Parameters
+    ----------
+    era_name : str
+        The name of the ERA file.
+
+    Returns
+    -------
+    file_format : str
+        "grib" or "netcdf".
+    """
+
+    base, ext = os.path.splitext(era_name)
+
+    if ext.lower() in GRIB_EXTENSIONS:
+        return "grib"
+
+    return "netcdf"
+
+
+def era_surface_file(era3d_name):
+    """
+    Find the file with the surface fields belonging to an ERA 3d file.
 
     Parameters
     ----------
     era3d_name : str
-        The name of the ERA 3D file.
+        The name of the ERA 3d file.
+
+    Returns
+    -------
+    era2d_name : str
+        The monthly 2d file (see `era_name_converter`). For GRIB input that
+        does not follow the ERA naming or has no 2d file, the surface
+        messages are read from the 3d file itself.
+    """
+
+    if era_file_format(era3d_name) == "netcdf":
+        return era_name_converter(era3d_name, mode="3d_to_2d")
+
+    try:
+        era2d_name = era_name_converter(era3d_name, mode="3d_to_2d")
+    except ValueError:
+        return era3d_name
+
+    if not os.path.exists(era2d_name):
+        return era3d_name
+
+    return era2d_name
+
+
+def grib_open_options(type_of_level, index_dir=None, grib_names=[], short_name=None):
+    """
+    Options to open ERA GRIB messages of one level type with cfgrib.
+
+    Parameters
+    ----------
+    type_of_level : str or None
+        GRIB level type, "hybrid" for model levels, or None to select the
+        messages by `short_name` only (e.g. surface fields on "surface"
+        and "heightAboveGround" levels).
+
+    index_dir : str, optional
+        Directory of the message index files. Default is None (next to
+        the GRIB file).
+
+    grib_names : list, optional
+        The GRIB files to be opened. With `index_dir`, their directory
+        tree is mirrored below `index_dir`. Default is [].
+
+    short_name : str or list, optional
+        Only open messages of these variables. Default is None (all
+        variables).
+
+    Returns
+    -------
+    open_options : dict
+        Keyword arguments for `xarray.open_dataset`.
+
+    Notes
+    -----
+    cfgrib persists an index of the GRIB messages per file and reuses it
+    as long as it is newer than the file, so only the first open of a
+    file scans all messages. If the data directory is read-only, the
+    index files are written to `index_dir`.
+    """
+
+    if index_dir is None:
+        indexpath = "{path}.{short_hash}.idx"
+    else:
+        index_dir = os.path.abspath(index_dir)
+        indexpath = index_dir + "/{path}.{short_hash}.idx"
+
+        for grib_name in grib_names:
+            os.makedirs(
+                index_dir + "/" + os.path.dirname(grib_name), exist_ok=True
+            )
+
+    filter_by_keys = {}
+
+    if type_of_level is not None:
+        filter_by_keys["typeOfLevel"] = type_of_level
+
+    if short_name is not None:
+        filter_by_keys["shortName"] = short_name
+
+    backend_kwargs = {"filter_by_keys": filter_by_keys, "indexpath": indexpath}
+
+    # hybrid coefficients are part of the GRIB header
+    if type_of_level == "hybrid":
+        backend_kwargs["read_keys"] = ["pv"]
+
+    return {"engine": "cfgrib", "backend_kwargs": backend_kwargs}
+
+
+def grib_to_era_layout(dset):
+    """
+    Map ERA GRIB fields to the variable names and layout of the ERA netCDF files.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        ERA model-level or surface fields as opened by cfgrib.
+
+    Returns
+    -------
+    era : xarray.Dataset
+        The fields with dimensions (time, lev, lat, lon), the surface
+        fields SKT, T2M and SP, and the hybrid coefficients hyam and hybm
+        on full levels.
+
+    Notes
+    -----
+    The hybrid coefficients are taken from the GRIB `pv` array (A and B
+    on half levels). Surface pressure is converted from `lnsp` (opened on
+    its own, see `grib_open_options`).
+    """
+
+    era = dset.rename(
+        {
+            k: v
+            for k, v in {
+                "latitude": "lat",
+                "longitude": "lon",
+                "hybrid": "lev",
+                "skt": "SKT",
+                "t2m": "T2M",
+                "sp": "SP",
+            }.items()
+            if k in dset.variables
+        }
+    )
+
+    if "time" not in era.dims:
+        era = era.expand_dims("time")
+
+    if "lnsp" in era:
+        lnsp = era["lnsp"]
+        if "lev" in lnsp.dims:
+            lnsp = lnsp.isel(lev=0)
+        era["SP"] = np.exp(lnsp.drop_vars("lev", errors="ignore"))
+        era = era.drop_vars("lnsp")
+
+    if "lev" in era.dims:
+        # pv holds A and B on the nlev + 1 half levels of the full model
+        pv = np.array(era["t"].attrs["GRIB_pv"], dtype=np.float64)
+        a_half, b_half = np.split(pv, 2)
+
+        # full level k lies between the half levels k - 1 and k
+        lev = era["lev"].values.astype(int)
+        hyam = 0.5 * (a_half[lev - 1] + a_half[lev])
+        hybm = 0.5 * (b_half[lev - 1] + b_half[lev])
+
+        era["hyam"] = xr.DataArray(hyam, dims="nhym")
+        era["hybm"] = xr.DataArray(hybm, dims="nhym")
+
+    era = era.drop_vars(
+        ["number", "step", "surface", "heightAboveGround", "valid_time", "lev"],
+        errors="ignore",
+    )
+
+    for v in era.data_vars:
+        era[v].attrs.pop("GRIB_pv", None)
+
+    return era
+
+
+@functools.lru_cache(maxsize=4)
+def open_era2d_cached(era2d_name, mtime, chunks, grib_index_dir=None):
+    """
+    Open a monthly ERA 2d file, cached per path, modification time and chunks.
+
+    Parameters
+    ----------
+    era2d_name : str
+        Absolute name of the ERA 2d file.
+
+    mtime : float
+        Modification time of the file, part of the cache key.
+
+    chunks : tuple or str
+        Dask chunks as sorted tuple of (dimension, size) pairs or str.
+
+    grib_index_dir : str, optional
+        Directory of the GRIB index files. Default is None.
+
+    Returns
+    -------
+    era2d : xarray.Dataset
+        The lazily opened dataset with its time index. It is empty for GRIB
+        files without surface messages.
+    """
+
+    if not isinstance(chunks, str):
+        chunks = dict(chunks)
+
+    if era_file_format(era2d_name) == "grib":
+        era2d = xr.open_dataset(
+            era2d_name,
+            chunks=chunks,
+            **grib_open_options(
+                None,
+                index_dir=grib_index_dir,
+                grib_names=[era2d_name],
+                short_name=GRIB_SURFACE_VARIABLES,
+            ),
+        )
+
+        # e.g. model-level file without surface messages
+        if not era2d.data_vars:
+            return era2d
+
+        return grib_to_era_layout(era2d)
+
+    return xr.open_dataset(era2d_name, chunks=chunks)
+
+
+def open_era2d(era2d_name, chunks={"time": 1}, grib_index_dir=None):
+    """
+    Open a monthly ERA 2d file.
+
+    Parameters
+    ----------
+    era2d_name : str
+        The name of the ERA 2d file.
+
+    chunks : dict or str, optional
+        Dask chunks. Default is {"time": 1}.
+
+    grib_index_dir : str, optional
+        Directory of the GRIB index files. Default is None.
+
+    Returns
+    -------
+    era2d : xarray.Dataset
+        The opened dataset.
+
+    Notes
+    -----
+    All daily 3d files of a month use the same 2d file. The opened
+    dataset is therefore cached (see `open_era2d_cached`) and only
+    reopened if the file changes.
+    """
+
+    era2d_name = os.path.abspath(era2d_name)
+    mtime = os.path.getmtime(era2d_name)
+
+    if not isinstance(chunks, str):
+        chunks = tuple(sorted(chunks.items()))
+
+    era2d = open_era2d_cached(era2d_name, mtime, chunks, grib_index_dir)
+
+    # shallow copy, the cached dataset must not be modified
+    return era2d.copy()
+
+
+def define_required_variables(add_pressure=True):
+    """
+    Define the ERA variables needed to build RTTOV profiles.
+
+    Parameters
+    ----------
+    add_pressure : bool, optional
+        Whether pressure is derived from the hybrid coefficients (see
+        `define_derived_variables`). Otherwise pressure is read from the
+        file. Default is True.
+
+    Returns
+    -------
+    required_variables : list
+        Names of the 3d and 2d variables needed.
+    """
+
+    required_variables = [
+        "t",
+        "q",
+        "clwc",
+        "ciwc",
+        "cswc",
+        "cc",
+        "hyam",
+        "hybm",
+        "SKT",
+        "T2M",
+        "SP",
+        "mask",
+    ]
+
+    if not add_pressure:
+        required_variables += ["p"]
+
+    return required_variables
+
+
+def define_derived_variables(add_pressure=True, qmin=1.1e-9):
+    """
+    Define the derived ERA variables.
+
+    Parameters
+    ----------
+    add_pressure : bool, optional
+        Whether to add pressure. Default is True.
+
+    qmin : float, optional
+        The minimum value of q. Default is 1.1e-9.
+
+    Returns
+    -------
+    derived_variables : list
+        List of (name, recipe, params) definitions (see `synsatipy.derived`).
+    """
+
+    derived_variables = []
+
+    if add_pressure:
+        derived.add(derived_variables, "p", "era_pressure")
+
+    derived.add(derived_variables, "q", "clip_min", source="q", vmin=qmin)
+
+    return derived_variables
+
+
+def open_era(
+    era3d_name,
+    add_pressure=True,
+    qmin=1.1e-9,
+    region=None,
+    select_variables=True,
+    derived_variables=None,
+    chunks={"time": 1},
+    grib_index_dir=None,
+    **kwargs
+):
+    """
+    Open the ERA data.
+
+    Parameters
+    ----------
+    era3d_name : str or list
+        The name of the ERA 3D file, a glob pattern or a list of daily
+        3D files. Several days are concatenated along time, together with
+        the matching monthly 2D files. GRIB files (e.g. .grib) with model
+        level messages are read directly (see `grib_to_era_layout`); their
+        surface messages are read from the 2D file or, without 2D file,
+        from the same file. Without surface pressure, it is taken from
+        lnsp; missing SKT or T2M raise a ValueError.
 
     add_pressure : bool, optional
         Whether to add pressure. Default is True.
@@ -94,6 +505,29 @@ def open_era(era3d_name, add_pressure=True, qmin=1.1e-9, **kwargs):
         Values below this threshold will be clipped.
         Default is 1.1e-9.
 
+    region : list, optional
+        Region of interest, either as bounding box
+        [lon_min, lon_max, lat_min, lat_max] or as polygon of (lon, lat)
+        vertices. It is applied before merging and deriving variables.
+        Default is None (full domain).
+
+    select_variables : bool, optional
+        Whether to only read the variables needed for RTTOV profiles
+        (see `define_required_variables`). Default is True.
+
+    derived_variables : list, optional
+        If a list is given, the definitions of derived variables (pressure,
+        clipped q) are appended to it and evaluated later, e.g. per chunk
+        of profiles. Default is None (derived variables are computed here).
+
+    chunks : dict, optional
+        Dask chunks used for both the 3D and the 2D files.
+        Default is {"time": 1}.
+
+    grib_index_dir : str, optional
+        Directory of the persistent GRIB index files, e.g. if the data
+        directory is read-only. Default is None (next to the GRIB files).
+
         
     Returns
     -------
@@ -101,25 +535,127 @@ def open_era(era3d_name, add_pressure=True, qmin=1.1e-9, **kwargs):
         The opened ERA dataset.
     
     """
-    # open datasets
-    era3d = xr.open_dataset(era3d_name)
-
-    era2d_name = era_name_converter(era3d_name, mode="3d_to_2d")
-    era2d = xr.open_dataset(era2d_name, chunks={"time": 1})
+    # variable projection: only keep what is needed
+    if select_variables:
+        required_variables = define_required_variables(add_pressure=add_pressure)
+    else:
+        required_variables = None
+
+    def select_required(dset):
+        if required_variables is None:
+            return dset
+        return dset[[v for v in required_variables if v in dset]]
+
+    era3d_files = era_file_list(era3d_name)
+
+    if era_file_format(era3d_files[0]) == "grib":
+        open_options = grib_open_options(
+            "hybrid",
+            index_dir=grib_index_dir,
+            grib_names=era3d_files,
+            short_name=GRIB_MODEL_LEVEL_VARIABLES,
+        )
+        layout = grib_to_era_layout
+    else:
+        open_options = {}
+        layout = None
+
+    def open_layout(dset):
+        if layout is None:
+            return dset
+        return layout(dset)
+
+    # region of interest on the native grid
+    if region is not None:
+        with xr.open_dataset(era3d_files[0], chunks=chunks, **open_options) as first:
+            region_isel = spacetools.region_to_isel(open_layout(first), region)
+    else:
+        region_isel = None
+
+    def preprocess(dset):
+        return spacetools.select_region(select_required(dset), region_isel)
+
+    # open datasets, daily 3d files are concatenated along time
+    era3d = xr.open_mfdataset(
+        era3d_files,
+        chunks=chunks,
+        preprocess=lambda dset: preprocess(open_layout(dset)),
+        combine="nested",
+        concat_dim="time",
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+        **open_options,
+    )
+
+    # monthly 2d files, each opened once
+    era2d_names = []
+    for era3d_file in era3d_files:
+        era2d_name = era_surface_file(era3d_file)
+        if era2d_name not in era2d_names:
+            era2d_names += [era2d_name]
+
+    era2d_list = [
+        open_era2d(f, chunks=chunks, grib_index_dir=grib_index_dir)
+        for f in era2d_names
+    ]
+
+    # GRIB files without surface messages are skipped
+    era2d_list = [preprocess(dset) for dset in era2d_list if dset.data_vars]
+
+    if era2d_list:
+        era2d = xr.concat(
+            era2d_list,
+            dim="time",
+            data_vars="minimal",
+            coords="minimal",
+            compat="override",
+        )
 
-    # only select 3d timeslot
-    era2d = era2d.sel(time=era3d.time)
+        # only select 3d timeslot
+        era2d = era2d.sel(time=era3d.time)
+    else:
+        era2d = xr.Dataset(coords={"time": era3d.time})
+
+    # surface pressure of GRIB model-level data without 2d sp from lnsp,
+    # which is only stored on the first model level
+    if layout is not None and "SP" not in era2d:
+        lnsp = xr.open_mfdataset(
+            era3d_files,
+            chunks=chunks,
+            preprocess=lambda dset: preprocess(open_layout(dset)),
+            combine="nested",
+            concat_dim="time",
+            **grib_open_options(
+                "hybrid",
+                index_dir=grib_index_dir,
+                grib_names=era3d_files,
+                short_name="lnsp",
+            ),
+        )
+        era2d["SP"] = lnsp["SP"]
+
+    if layout is not None:
+        missing = [v for v in ["SKT", "T2M"] if v not in era2d]
+        if missing:
+            raise ValueError(
+                f"Surface fields {missing} not found in {era2d_names} "
+                f"(GRIB surface messages {GRIB_SURFACE_VARIABLES})"
+            )
 
     era = xr.merge([era2d, era3d])
 
-    if add_pressure:
-        era["p"] = calc_pressure(era)
+    era_derived = define_derived_variables(add_pressure=add_pressure, qmin=qmin)
 
-    era["q"] = era["q"].clip(min=qmin)
+    if derived_variables is None:
+        era = derived.evaluate(era, era_derived)
+    else:
+        derived_variables += era_derived
 
     return era
 
 
+@derived.register("era_pressure")
 def calc_pressure(era):
     """
     Calculate pressure from ERA data.
@@ -141,9 +677,11 @@ def calc_pressure(era):
     where p is the pressure, ps is the surface pressure,
     """
     # calculate pressure
-    A = era["hyam"]
-    B = era["hybm"]
+    # (hybrid coefficients are cast to the precision of the surface pressure
+    # to avoid promotion of the full 3d pressure field to float64)
     ps = era["SP"]
+    A = era["hyam"].astype(ps.dtype)
+    B = era["hybm"].astype(ps.dtype)
 
     p = B * ps + A
     
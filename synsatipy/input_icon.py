@@ -1,12 +1,85 @@
 #!/usr/bin/env python
 
 import os, sys
+import glob
+import time
+import functools
+import threading
+import contextlib
+import concurrent.futures
 
 import numpy as np
 import xarray as xr
 
 
+import synsatipy.derived as derived
 import synsatipy.utils.timetools as timetools
+import synsatipy.utils.spacetools as spacetools
+
+
+# supported file formats by file extension (longest first)
+ICON_FILE_FORMATS = {
+    ".nc.json": "reference",
+    ".json": "reference",
+    ".parq": "reference",
+    ".zarr": "zarr",
+    ".nc": "netcdf",
+}
+
+
+# guards HDF5_USE_FILE_LOCKING and the number of opens that rely on it
+HDF5_FILE_LOCKING_LOCK = threading.Lock()
+HDF5_FILE_LOCKING_STATE = {"opens": 0, "value": None, "previous": None}
+
+# the netCDF-C library is not thread-safe: netcdf4 opens are serialized
+NETCDF4_OPEN_LOCK = threading.Lock()
+
+
+def split_icon_extension(basename):
+    """
+    Split the basename of an ICON file into name and file extension.
+
+    Parameters
+    ----------
+    basename : str
+        The basename of the ICON file, store or reference file.
+
+    Returns
+    -------
+    base : str
+        The name without extension.
+
+    ext : str
+        The file extension, e.g. ".nc", ".zarr" or ".nc.json".
+    """
+
+    basename = basename.rstrip("/")
+
+    for ext in ICON_FILE_FORMATS:
+        if basename.endswith(ext):
+            return basename[: -len(ext)], ext
+
+    return os.path.splitext(basename)
+
+
+def icon_file_format(fname):
+    """
+    Determine the format of an ICON input from its file extension.
+
+    Parameters
+    ----------
+    fname : str
+        The name of the file, zarr store or kerchunk reference file.
+
+    Returns
+    -------
+    file_format : str
+        "netcdf", "zarr" or "reference" (kerchunk JSON or parquet references).
+    """
+
+    base, ext = split_icon_extension(os.path.basename(fname.rstrip("/")))
+
+    return ICON_FILE_FORMATS.get(ext, "netcdf")
 
 
 def icon_name_analyzer(icon_name):
@@ -27,16 +100,20 @@ def icon_name_analyzer(icon_name):
     -----
     The ICON name assumed to be in the form of
     {data_type}_{variable_stack}_{domain}_{level_type}_{time_str}_{postproc_suffix}.nc.
+    Besides netCDF, zarr stores (.zarr) and kerchunk references (.json,
+    .nc.json, .parq) are accepted; the extension is kept in "extension".
     """
 
+    icon_name = icon_name.rstrip("/")
     fullpath = os.path.dirname(icon_name)
     basename = os.path.basename(icon_name)
 
-    base, ext = os.path.splitext(basename)
+    base, ext = split_icon_extension(basename)
 
     # first decomposition type
     icon_name_props = {}
     icon_name_props["fullpath"] = fullpath
+    icon_name_props["extension"] = ext
 
     if "ifces2" in fullpath:
         icon_name_props["flavor"] = "ifces2"
@@ -44,8 +121,13 @@ def icon_name_analyzer(icon_name):
         base = base.replace("full_", "full-")
 
         # 2d_cloud_DOM01_ML_20200912T000000Z_regrid7km.nc
+        # (output on the native grid has no postproc suffix)
+        name_parts = base.split("_")
+        if len(name_parts) == 5:
+            name_parts += [""]
+
         data_type, variable_stack, domain, level_type, time_str, postproc_suffix = (
-            base.split("_")
+            name_parts
         )
 
         icon_name_props["data_type"] = data_type
@@ -100,20 +182,27 @@ def icon_name_creator(icon_name_props):
     Notes
     -----
     The ICON name assumed to be in the form of
-    {data_type}_{variable_stack}_{domain}_{level_type}_{time_str}_{postproc_suffix}.nc.
+    {data_type}_{variable_stack}_{domain}_{level_type}_{time_str}_{postproc_suffix}{extension},
+    with ".nc" as default extension.
     """
 
     flavor = icon_name_props["flavor"]
+    icon_name_props = {"extension": ".nc", **icon_name_props}
 
     icon_name = None
 
     if flavor == "ifces2":
 
-        icon_name = "{fullpath}/{data_type}_{variable_stack}_{domain}_{level_type}_{time_str}_{postproc_suffix}.nc".format(
+        icon_name = "{fullpath}/{data_type}_{variable_stack}_{domain}_{level_type}_{time_str}".format(
             **icon_name_props
         )
+
+        if icon_name_props.get("postproc_suffix"):
+            icon_name += "_" + icon_name_props["postproc_suffix"]
+
+        icon_name += icon_name_props["extension"]
     elif flavor == "orcestra":
-        icon_name = "{fullpath}/{flavor}_{resolution}_{experiment}_{model_component}_{data_type}_{variable_stack}_{domain}_{time_str}.nc".format(
+        icon_name = "{fullpath}/{flavor}_{resolution}_{experiment}_{model_component}_{data_type}_{variable_stack}_{domain}_{time_str}{extension}".format(
             **icon_name_props
         )
 
@@ -171,6 +260,86 @@ def define_variable_mapping(flavor):
     return var_mapping
 
 
+def define_required_variables(flavor):
+    """
+    Define the ICON variables needed to build RTTOV profiles.
+
+    Parameters
+    ----------
+    flavor : str
+        The flavor of the ICON dataset.
+
+    Returns
+    -------
+    required_variables : list
+        Names of the mapped variables plus the variables needed to derive them.
+
+    """
+
+    required_variables = list(define_variable_mapping(flavor).keys())
+
+    # needed for derived variables
+    if flavor == "ifces2":
+        required_variables += ["t_g"]
+
+    elif flavor == "orcestra":
+        required_variables += ["qr"]
+
+    # cell coordinates of the native grid
+    required_variables += [v for v in ["clon", "clat"] if v not in required_variables]
+
+    return required_variables
+
+
+def define_derived_variables(flavor, qmin=1.1e-9, var_mapping=None):
+    """
+    Define the derived ICON variables.
+
+    Parameters
+    ----------
+    flavor : str
+        The flavor of the ICON dataset.
+
+    qmin : float, optional
+        Minimum value of qv and condensate threshold for cloud cover.
+        Default is 1.1e-9.
+
+    var_mapping : dict, optional
+        Variable mapping if the definitions refer to renamed variables
+        (see `define_variable_mapping`). Default is None (ICON names).
+
+    Returns
+    -------
+    derived_variables : list
+        List of (name, recipe, params) definitions (see `synsatipy.derived`).
+    """
+
+    if var_mapping is None:
+        var_mapping = {}
+
+    def name(v):
+        return var_mapping.get(v, v)
+
+    derived_variables = []
+
+    derived.add(derived_variables, name("qv"), "clip_min", source=name("qv"), vmin=qmin)
+
+    if flavor == "ifces2":
+        # unit change from [0, 100] % to [0, 1]
+        derived.add(derived_variables, name("clc"), "scale", source=name("clc"), divisor=100.0)
+
+    elif flavor == "orcestra":
+        derived.add(
+            derived_variables,
+            name("clc"),
+            "condensate_cloud_cover",
+            sources=[name(v) for v in ["qc", "qi", "qs", "qr"]],
+            threshold=qmin,
+        )
+
+    return derived_variables
+
+
 def icon_variable_mapping(dset, flavor="ifces2", always_keep=[]):
     """
     Rename ICON variables to ERA5 variables.
@@ -201,9 +370,16 @@ def icon_variable_mapping(dset, flavor="ifces2", always_keep=[]):
     for iname in always_keep:
         icon2era[iname] = iname
 
+    # derived variables might only be added later, cell coordinates of the
+    # native grid are attached as lon / lat in `open_icon`
+    optional = [d[0] for d in define_derived_variables(flavor)] + ["clon", "clat"]
+
     for iname in icon2era:
         ename = icon2era[iname]
 
+        if iname not in dset and iname in optional:
+            continue
+
         d_renamed[ename] = dset[iname]
 
     # coordinates
@@ -212,7 +388,203 @@ def icon_variable_mapping(dset, flavor="ifces2", always_keep=[]):
     return d_renamed
 
 
-def read_georef(geofile, rad2deg=True):
+@contextlib.contextmanager
+def hdf5_file_locking(file_locking):
+    """
+    Set HDF5 file locking while files are opened and restore it afterwards.
+
+    Parameters
+    ----------
+    file_locking : bool
+        Whether to use HDF5 file locking (`HDF5_USE_FILE_LOCKING`).
+
+    Notes
+    -----
+    The lock is only held while the variable is changed, so that
+    concurrent opens are not serialized. The variable is set by the first
+    of overlapping opens and restored by the last one; overlapping opens
+    with a different setting raise a ValueError.
+    """
+
+    value = "TRUE" if file_locking else "FALSE"
+    state = HDF5_FILE_LOCKING_STATE
+
+    with HDF5_FILE_LOCKING_LOCK:
+        if state["opens"] == 0:
+            state["previous"] = os.environ.get("HDF5_USE_FILE_LOCKING")
+            state["value"] = value
+            os.environ["HDF5_USE_FILE_LOCKING"] = value
+
+        elif state["value"] != value:
+            raise ValueError(
+                f"HDF5_USE_FILE_LOCKING={state['value']} is set by a concurrent open"
+            )
+
+        state["opens"] += 1
+
+    try:
+        yield
+    finally:
+        with HDF5_FILE_LOCKING_LOCK:
+            state["opens"] -= 1
+
+            if state["opens"] == 0:
+                if state["previous"] is None:
+                    del os.environ["HDF5_USE_FILE_LOCKING"]
+                else:
+                    os.environ["HDF5_USE_FILE_LOCKING"] = state["previous"]
+
+
+def open_icon_file(
+    fname,
+    chunks="auto",
+    engine=None,
+    chunk_cache_size=None,
+    file_locking=False,
+    report_timing=False,
+    reference_options=None,
+):
+    """
+    Open a single ICON file with configurable I/O backend.
+
+    Parameters
+    ----------
+    fname : str
+        The name of the netCDF file, zarr store or kerchunk reference file
+        (see `icon_file_format`).
+
+    chunks : str or dict, optional
+        Dask chunks. Default is "auto".
+
+    engine : str, optional
+        The xarray engine, e.g. "netcdf4" or "h5netcdf". Default is None
+        (xarray's choice).
+
+    chunk_cache_size : int, optional
+        Size of the HDF5 chunk cache in bytes. Set globally for the
+        netcdf4 engine and per file for h5netcdf. Default is None
+        (library default).
+
+    file_locking : bool, optional
+        Whether to use HDF5 file locking. Files are only read, so locking
+        is switched off by default. It is passed per file to h5netcdf and
+        set as `HDF5_USE_FILE_LOCKING` only while netcdf4 opens the file.
+
+    report_timing : bool, optional
+        Whether to print the open latency. Default is False.
+
+    reference_options : dict, optional
+        Additional fsspec storage options for kerchunk references, e.g.
+        "remote_protocol" and "remote_options" of the referenced files.
+        Default is None.
+
+    Returns
+    -------
+    dset : xarray.Dataset
+        The lazily opened dataset.
+
+    Notes
+    -----
+    Zarr stores and kerchunk references are read with the zarr engine;
+    `engine` and `chunk_cache_size` only apply to netCDF files.
+
+    Files opened with h5netcdf, zarr stores and references are opened
+    concurrently from several threads; netcdf4 opens are serialized, as
+    the netCDF-C library is not thread-safe.
+    """
+
+    file_format = icon_file_format(fname)
+
+    open_options = {"chunks": chunks}
+
+    if file_format == "zarr":
+        open_options["engine"] = "zarr"
+
+    elif file_format == "reference":
+        storage_options = {"fo": fname}
+        if reference_options is not None:
+            storage_options.update(reference_options)
+
+        open_options["engine"] = "zarr"
+        open_options["backend_kwargs"] = {
+            "consolidated": False,
+            "storage_options": storage_options,
+        }
+
+    elif engine is not None:
+        open_options["engine"] = engine
+
+    # HDF5 options: per file for h5netcdf, globally for netcdf4
+    locking = contextlib.nullcontext()
+    open_lock = contextlib.nullcontext()
+
+    if file_format == "netcdf" and engine == "h5netcdf":
+        open_options["driver_kwds"] = {"locking": file_locking}
+        if chunk_cache_size is not None:
+            open_options["driver_kwds"]["rdcc_nbytes"] = chunk_cache_size
+
+    elif file_format == "netcdf":
+        locking = hdf5_file_locking(file_locking)
+        open_lock = NETCDF4_OPEN_LOCK
+        if chunk_cache_size is not None:
+            import netCDF4
+
+            netCDF4.set_chunk_cache(size=chunk_cache_size)
+
+    t0 = time.perf_counter()
+
+    if file_format == "reference":
+        dset = xr.open_dataset("reference://", **open_options)
+    else:
+        with locking, open_lock:
+            dset = xr.open_dataset(fname, **open_options)
+
+    if report_timing:
+        # one write per line, files are opened from several threads
+        print(
+            f"... [synsat] opened {os.path.basename(fname.rstrip('/'))} in {time.perf_counter() - t0:.3f} s\n",
+            end="",
+        )
+
+    return dset
+
+
+@functools.lru_cache(maxsize=2)
+def read_georef_cached(geofile, mtime, rad2deg, engine=None):
+    """
+    Read the cell coordinates of a georeference file, cached per path and modification time.
+
+    Parameters
+    ----------
+    geofile : str
+        Absolute name of the georeference file.
+
+    mtime : float
+        Modification time of the file, part of the cache key.
+
+    rad2deg : bool
+        Whether to convert the angles to degrees.
+
+    engine : str, optional
+        The xarray engine. Default is None.
+
+    Returns
+    -------
+    georef : xarray.Dataset
+        The georeference data containing clat and clon, loaded into memory.
+    """
+
+    georef = open_icon_file(geofile, chunks=None, engine=engine)
+    georef = georef[["clat", "clon"]].load()
+
+    if rad2deg:
+        georef["clat"] = np.rad2deg(georef["clat"]).assign_attrs(units="degrees")
+        georef["clon"] = np.rad2deg(georef["clon"]).assign_attrs(units="degrees")
+
+    return georef
+
+
+def read_georef(geofile, rad2deg=True, **io_options):
     """
     Read the georeference file.
 
@@ -224,22 +596,116 @@ def read_georef(geofile, rad2deg=True):
     rad2deg : bool, optional
         Whether to convert the angles to degrees. Default is True.
 
+    **io_options : dict
+        I/O options, only "engine" is used (see `open_icon_file`).
+
     Returns
     -------
     georef : xarray.Dataset
         The georeference data containing clat and clon.
+
+    Notes
+    -----
+    All time steps of a run share the same grid. The cell coordinates are
+    therefore cached (see `read_georef_cached`) and only read again if the
+    file changes.
     """
 
-    georef = xr.open_dataset(geofile)
+    geofile = os.path.abspath(geofile)
+    mtime = os.path.getmtime(geofile)
 
-    if rad2deg:
-        georef["clat"] = np.rad2deg(georef["clat"])
-        georef["clon"] = np.rad2deg(georef["clon"])
+    georef = read_georef_cached(geofile, mtime, rad2deg, io_options.get("engine"))
+
+    # shallow copy, the cached dataset must not be modified
+    return georef.copy()
+
+
+def icon_cell_dimension(dset):
+    """
+    Get the cell dimension of ICON data on the native grid.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The ICON dataset.
+
+    Returns
+    -------
+    cell_dimension : str or None
+        "ncells" or "cell", None for data on a regular lon / lat grid.
+    """
+
+    for d in ["ncells", "cell"]:
+        if d in dset.dims:
+            return d
+
+    return None
+
+
+def icon_cell_coordinates(dset, cell_dimension):
+    """
+    Get the cell coordinates of native ICON data in degrees.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The ICON dataset or georeference with clon and clat.
+
+    cell_dimension : str
+        The cell dimension of the data (see `icon_cell_dimension`).
+
+    Returns
+    -------
+    cells : xarray.Dataset
+        clon and clat in degrees along `cell_dimension`.
+
+    Notes
+    -----
+    Cell coordinates given in radians (units attribute) are converted.
+    Georeference files use "cell" as dimension, which is renamed to the
+    cell dimension of the data.
+    """
+
+    cells = xr.Dataset()
+
+    for v in ["clon", "clat"]:
+        c = xr.DataArray(dset[v].values, dims=dset[v].dims, attrs=dset[v].attrs)
+
+        if "rad" in c.attrs.get("units", ""):
+            c = np.rad2deg(c)
+
+        cells[v] = c.rename({c.dims[0]: cell_dimension})
+
+    return cells
+
+
+def rename_cell_dimension(dset, cell_dimension):
+    """
+    Rename the cell dimension of an ICON file to that of the data.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The ICON dataset, e.g. a mask file on the "cell" dimension of the grid file.
+
+    cell_dimension : str
+        The cell dimension of the data (see `icon_cell_dimension`).
+
+    Returns
+    -------
+    dset : xarray.Dataset
+        The dataset on `cell_dimension`.
+    """
+
+    dimension = icon_cell_dimension(dset)
+
+    if dimension is None or dimension == cell_dimension:
+        return dset
 
-    return georef[["clat", "clon"]]
+    return dset.rename({dimension: cell_dimension})
 
 
-def read_mask(maskfile):
+def read_mask(maskfile, **io_options):
     """
     Read the mask file.
 
@@ -248,27 +714,187 @@ def read_mask(maskfile):
     maskfile : str
         The name of the mask file.
 
+    **io_options : dict
+        I/O options passed to `open_icon_file`.
+
     Returns
     -------
     mask : xarray.Dataset
         The mask data.
     """
 
-    mask = xr.open_dataset(maskfile)
+    mask = open_icon_file(maskfile, chunks=None, **io_options)
 
     return mask[["mask"]]
 
 
+def icon_companion_files(icon3d_name):
+    """
+    Names of the companion files of an ICON 3d (base) file.
+
+    Parameters
+    ----------
+    icon3d_name : str
+        The name of the ICON 3d (base) file.
+
+    Returns
+    -------
+    parts : dict
+        - "hydrometeors" : dict of the hydrometeor files by variable stack
+        - "surface" : the 2d surface file
+    """
+
+    icon_name_props = icon_name_analyzer(icon3d_name)
+    flavor = icon_name_props["flavor"]
+
+    if flavor == "ifces2":
+        stacks = ["full_qmix"]
+    elif flavor == "orcestra":
+        stacks = ["hydrometeors1", "hydrometeors2"]
+
+    hydrometeors = {}
+    for stack in stacks:
+        icon_name_props.update({"variable_stack": stack})
+        hydrometeors[stack] = icon_name_creator(icon_name_props)
+
+    # older orcestra output has a single hydrometeor stack
+    if flavor == "orcestra" and not all(map(os.path.exists, hydrometeors.values())):
+        icon_name_props.update({"variable_stack": "hydrometeors"})
+        hydrometeors = {"hydrometeors": icon_name_creator(icon_name_props)}
+
+    # surface props
+    if flavor == "ifces2":
+        icon_name_props.update({"data_type": "2d", "variable_stack": "surface"})
+    elif flavor == "orcestra":
+        icon_name_props.update({"data_type": "2d", "variable_stack": "ml"})
+
+    parts = {
+        "hydrometeors": hydrometeors,
+        "surface": icon_name_creator(icon_name_props),
+    }
+
+    return parts
+
+
+def icon_file_list(icon3d_name):
+    """
+    Expand the ICON 3d input into a sorted list of files.
+
+    Parameters
+    ----------
+    icon3d_name : str or list
+        A filename, a glob pattern or a list of filenames of ICON 3d
+        (base) files, one per time step.
+
+    Returns
+    -------
+    icon3d_files : list
+        The list of files.
+
+    Raises
+    ------
+    FileNotFoundError
+        If a glob pattern does not match any file.
+    """
+
+    if not isinstance(icon3d_name, str):
+        return list(icon3d_name)
+
+    if glob.has_magic(icon3d_name):
+        icon3d_files = sorted(glob.glob(icon3d_name))
+
+        if len(icon3d_files) == 0:
+            raise FileNotFoundError(f"No ICON files match {icon3d_name}")
+
+        return icon3d_files
+
+    return [icon3d_name]
+
+
+def open_icon_timeseries(icon3d_files, derived_variables=None, max_workers=8, **kwargs):
+    """
+    Open a time series of ICON files as one dataset.
+
+    Parameters
+    ----------
+    icon3d_files : list
+        ICON 3d (base) files, one per time step.
+
+    derived_variables : list, optional
+        See `open_icon`. Default is None.
+
+    max_workers : int, optional
+        Number of threads used to open the time steps. Default is 8.
+
+    **kwargs : dict
+        Keyword arguments passed to `open_icon`.
+
+    Returns
+    -------
+    icon : xarray.Dataset
+        The lazily opened time steps, concatenated along time.
+
+    Notes
+    -----
+    Each time step is opened with `open_icon` together with its companion
+    files. The opens are done concurrently in a thread pool.
+    """
+
+    def open_time_step(icon3d_name):
+        if derived_variables is None:
+            step_derived = None
+        else:
+            step_derived = []
+
+        icon = open_icon(icon3d_name, derived_variables=step_derived, **kwargs)
+
+        return icon, step_derived
+
+    nworkers = max(1, min(max_workers, len(icon3d_files)))
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=nworkers) as pool:
+        time_steps = list(pool.map(open_time_step, icon3d_files))
+
+    icon = xr.concat(
+        [icon for icon, step_derived in time_steps],
+        dim="time",
+        data_vars="minimal",
+        coords="minimal",
+        compat="override",
+    )
+
+    # derived variables are the same for all time steps
+    if derived_variables is not None:
+        derived_variables += time_steps[0][1]
+
+    return icon
+
+
 def open_icon(
-    icon3d_name, qmin=1.1e-9, name_remapping=True, geofile=None, maskfile=None, **kwargs
+    icon3d_name,
+    qmin=1.1e-9,
+    name_remapping=True,
+    geofile=None,
+    maskfile=None,
+    region=None,
+    select_variables=True,
+    derived_variables=None,
+    engine=None,
+    chunk_cache_size=None,
+    file_locking=False,
+    report_timing=False,
+    reference_options=None,
+    **kwargs,
 ):
     """
     Open ICON dataset.
 
     Parameters
     ----------
-    icon3d_name : str
-        The name of the ICON 3D file.
+    icon3d_name : str or list
+        The name of the ICON 3D file, a glob pattern or a list of files.
+        Several time steps are opened concurrently and concatenated along
+        time (see `open_icon_timeseries`).
 
     qmin : float, optional
         Minimum value of qv. Default is 1.1e-9.
@@ -278,78 +904,175 @@ def open_icon(
         Whether to remap the variable names. Default is True.
 
     geofile : str, optional
-        The name of the georeference file.
+        The name of the georeference file. On the native grid, its cell
+        coordinates are used as lon / lat instead of those in the data files.
+
+    maskfile : str, optional
+        The name of the mask file.
+
+    region : list, optional
+        Region of interest, either as bounding box
+        [lon_min, lon_max, lat_min, lat_max] or as polygon of (lon, lat)
+        vertices. It is translated into an index selection on the native grid
+        (regular lon / lat or ICON cells) and applied before merging and
+        deriving variables. Default is None (full domain).
+
+    select_variables : bool, optional
+        Whether to only read the variables needed for RTTOV profiles
+        (see `define_required_variables`). Default is True.
+
+    derived_variables : list, optional
+        If a list is given, the definitions of derived variables (clipped
+        qv, cloud cover) are appended to it and evaluated later, e.g. per
+        chunk of profiles. Default is None (derived variables are computed
+        here).
+
+    engine : str, optional
+        The xarray engine used for all files. Default is None.
+
+    chunk_cache_size : int, optional
+        Size of the HDF5 chunk cache in bytes. Default is None.
+
+    file_locking : bool, optional
+        Whether to use HDF5 file locking. Default is False.
+
+    report_timing : bool, optional
+        Whether to print the open latency of each file. Default is False.
+
+    reference_options : dict, optional
+        Additional fsspec storage options for kerchunk references.
+        Default is None.
 
     Returns
     -------
     icon : xarray.Dataset
         The ICON dataset.
 
+    Notes
+    -----
+    The base file and its companion files (hydrometeors, surface, georef
+    and mask) are opened concurrently, see `open_icon_file` for the I/O
+    options.
+
+    Data on the native grid keep their cell dimension (e.g. "ncells"),
+    with lon / lat in degrees attached once as cell coordinates, so that
+    profiles are indexed by cell and no remapping is needed.
+
     """
 
-    if geofile is not None:
-        georef = read_georef(geofile)
-    else:
-        georef = None
+    icon3d_files = icon_file_list(icon3d_name)
+
+    if len(icon3d_files) > 1:
+        return open_icon_timeseries(
+            icon3d_files,
+            qmin=qmin,
+            name_remapping=name_remapping,
+            geofile=geofile,
+            maskfile=maskfile,
+            region=region,
+            select_variables=select_variables,
+            derived_variables=derived_variables,
+            engine=engine,
+            chunk_cache_size=chunk_cache_size,
+            file_locking=file_locking,
+            report_timing=report_timing,
+            reference_options=reference_options,
+            **kwargs,
+        )
+
+    icon3d_name = icon3d_files[0]
+
+    io_options = {
+        "engine": engine,
+        "chunk_cache_size": chunk_cache_size,
+        "file_locking": file_locking,
+        "report_timing": report_timing,
+        "reference_options": reference_options,
+    }
 
     if maskfile is not None:
-        mask = read_mask(maskfile)
         always_keep = ["mask"]
     else:
-        mask = None
         always_keep = []
 
-    input_options = {"chunks": "auto"}
-
-    # open base datasets
-    icon3dbase = xr.open_dataset(icon3d_name, **input_options)
-
     icon_name_props = icon_name_analyzer(icon3d_name)
     flavor = icon_name_props["flavor"]
 
-    # open hydrometeors
-    if flavor == "ifces2":
-        icon_name_props.update({"variable_stack": "full_qmix"})
-        icon_others_name = icon_name_creator(icon_name_props)
-        icon3dqmix = xr.open_dataset(icon_others_name, **input_options)
-
-        icon3d = xr.merge([icon3dbase, icon3dqmix])
+    # variable projection: only keep what is needed
+    if select_variables:
+        required_variables = define_required_variables(flavor) + always_keep
+    else:
+        required_variables = None
+
+    def select_required(dset):
+        if required_variables is None:
+            return dset
+        return dset[[v for v in required_variables if v in dset]]
+
+    # open all files of this time step concurrently
+    parts = icon_companion_files(icon3d_name)
+    part_names = ["base"] + list(parts["hydrometeors"]) + ["surface"]
+
+    def open_part(name):
+        if name == "georef":
+            return read_georef(geofile, **io_options)
+        elif name == "mask":
+            return read_mask(maskfile, **io_options)
+        elif name == "base":
+            fname = icon3d_name
+        elif name == "surface":
+            fname = parts["surface"]
+        else:
+            fname = parts["hydrometeors"][name]
+
+        return select_required(open_icon_file(fname, **io_options))
 
-    elif flavor == "orcestra":
-        try:
-            icon_name_props.update({"variable_stack": "hydrometeors1"})
-            icon_others_name = icon_name_creator(icon_name_props)
-            icon3dqmix1 = xr.open_dataset(icon_others_name, **input_options)
+    if geofile is not None:
+        part_names += ["georef"]
 
-            icon_name_props.update({"variable_stack": "hydrometeors2"})
-            icon_others_name = icon_name_creator(icon_name_props)
-            icon3dqmix2 = xr.open_dataset(icon_others_name, **input_options)
+    if maskfile is not None:
+        part_names += ["mask"]
 
-            icon3dqmix = xr.merge([icon3dqmix1, icon3dqmix2])
-        except FileNotFoundError:
-            icon_name_props.update({"variable_stack": "hydrometeors"})
-            icon_others_name = icon_name_creator(icon_name_props)
-            icon3dqmix = xr.open_dataset(icon_others_name, **input_options)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(part_names)) as pool:
+        opened = dict(zip(part_names, pool.map(open_part, part_names)))
 
-        icon3d = xr.merge([icon3dbase, icon3dqmix])
+    # cell coordinates of the native grid, taken from georef if available
+    cell_dimension = icon_cell_dimension(opened["base"])
 
-    # open surfacer props
-    if flavor == "ifces2":
-        icon_name_props.update(
-            {
-                "data_type": "2d",
-                "variable_stack": "surface",
-            }
-        )
-    elif flavor == "orcestra":
-        icon_name_props.update(
-            {
-                "data_type": "2d",
-                "variable_stack": "ml",
-            }
+    if cell_dimension is not None:
+        cells = icon_cell_coordinates(
+            opened.pop("georef", opened["base"]), cell_dimension
         )
-    icon_others_name = icon_name_creator(icon_name_props)
-    icon2d = xr.open_dataset(icon_others_name, **input_options)
+
+        # cell coordinates are attached once as lon / lat below, and files
+        # on the "cell" dimension of the grid file (e.g. masks) are aligned
+        for name in opened:
+            opened[name] = rename_cell_dimension(
+                opened[name].drop_vars(
+                    ["clon", "clat", "clon_bnds", "clat_bnds"], errors="ignore"
+                ),
+                cell_dimension,
+            )
+
+    # region of interest on the native grid (ICON cells or regular lon / lat)
+    region_isel = None
+
+    if region is not None:
+        if cell_dimension is not None:
+            region_isel = spacetools.region_to_isel(cells, region, "clon", "clat")
+        else:
+            region_isel = spacetools.region_to_isel(opened["base"], region)
+
+    for name in opened:
+        opened[name] = spacetools.select_region(opened[name], region_isel)
+
+    mask = opened.get("mask")
+
+    # merge hydrometeors
+    icon3d = xr.merge([opened["base"]] + [opened[n] for n in parts["hydrometeors"]])
+
+    # surface props
+    icon2d = opened["surface"]
 
     # only select 3d timeslot
     icon2d = icon2d.sel(time=icon3d.time).squeeze(dim="height")
@@ -357,32 +1080,40 @@ def open_icon(
     # merge dataset
     icon = xr.merge([icon2d, icon3d])
 
-    # add georef
-    if georef is not None:
-        icon = xr.merge([icon, georef])
-
     # add mask
     if mask is not None:
         icon = xr.merge([icon, mask])
 
     # modify variables
-    icon["qv"] = icon["qv"].clip(min=qmin)
-
     if "t_g" in icon and "t_s" not in icon:
         icon["t_s"] = icon["t_g"]
 
-    if flavor == "ifces2":
-        icon["clc"] = icon["clc"] / 100.0  # unit change from [0, 100] % to [0, 1]
-    elif flavor == "orcestra":
-        qtot = icon["qc"] + icon["qi"] + icon["qs"] + icon["qr"]
-        icon["clc"] = xr.where(qtot > qmin, 1.0, 0.0)
-
     # set correct time object
     if flavor == "ifces2":
         t = timetools.convert_timevec(icon.time.data)
         icon = icon.assign_coords({"time": t})
 
+    # derived variables: computed here or later per chunk
+    if derived_variables is None:
+        icon = derived.evaluate(icon, define_derived_variables(flavor, qmin=qmin))
+
+    elif flavor == "orcestra":
+        always_keep = always_keep + ["qr"]
+
     if name_remapping:
-        return icon_variable_mapping(icon, flavor=flavor, always_keep=always_keep)
+        icon = icon_variable_mapping(icon, flavor=flavor, always_keep=always_keep)
+        var_mapping = define_variable_mapping(flavor)
     else:
-        return icon
+        var_mapping = None
+
+    if derived_variables is not None:
+        derived_variables += define_derived_variables(
+            flavor, qmin=qmin, var_mapping=var_mapping
+        )
+
+    # native grid: profiles are indexed by cell, with lon / lat per cell
+    if cell_dimension is not None:
+        cells = spacetools.select_region(cells, region_isel)
+        icon = icon.assign_coords(lon=cells["clon"], lat=cells["clat"])
+
+    return icon
@@ -3,15 +3,75 @@ This module provides functions to open the nextGEMS dataset.
 """
 
 # standard packages
+import functools
+
+import dask.array
 import numpy as np
 import xarray as xr
 
 # nextgems related packages
-from easygems.healpix import attach_coords
+from easygems.healpix import attach_coords, get_nside, is_nested
 import healpy
 import intake
 
-from synsatipy.utils.spacetools import lonlat2azizen
+import synsatipy.cache as cache
+import synsatipy.derived as derived
+from synsatipy.utils.spacetools import zenith2delta
+
+
+@functools.lru_cache(maxsize=8)
+def open_catalog(cat_path):
+    """
+    Open an intake catalog, cached per catalog path.
+
+    Parameters
+    ----------
+    cat_path : str
+        Path to the catalog file.
+
+    Returns
+    -------
+    cat : intake.catalog.Catalog
+        The opened catalog.
+    """
+
+    return intake.open_catalog(cat_path)
+
+
+@functools.lru_cache(maxsize=16)
+def open_catalog_dataset(cat_path, experiment, zoom, time_resolution):
+    """
+    Open a nextGEMS dataset from the catalog, cached per set of arguments.
+
+    Parameters
+    ----------
+    cat_path : str
+        Path to the catalog file.
+
+    experiment : str
+        Name of the ICON experiment in the catalog.
+
+    zoom : int
+        Zoom level.
+
+    time_resolution : str
+        Time resolution, e.g. "PT15M".
+
+    Returns
+    -------
+    dset : xarray.Dataset
+        The lazily opened dataset with coordinates attached.
+    """
+
+    cat = open_catalog(cat_path)
+
+    dset = (
+        cat.ICON[experiment](zoom=zoom, time=time_resolution)  # chunks="auto",
+        .to_dask()
+        .pipe(attach_coords)
+    )
+
+    return dset
 
 
 def open_ngdataset(cat_path, **kwargs):
@@ -29,6 +89,12 @@ def open_ngdataset(cat_path, **kwargs):
     zoom : int, optional
         Zoom level. Default is 9.
 
+    experiment : str, optional
+        Name of the ICON experiment. Default is "ngc4008a".
+
+    time_resolution : str, optional
+        Time resolution. Default is "PT15M".
+
     Returns
     -------
     dset : xarray.Dataset
@@ -36,25 +102,231 @@ def open_ngdataset(cat_path, **kwargs):
 
     Notes
     -----
-    The dataset is attached with the coordinates.
+    The dataset is attached with the coordinates. Catalogs and datasets
+    are cached in memory (see `open_catalog_dataset`), so that the catalog
+    and metadata are only read once per process.
     """
 
     zoom = kwargs.get("zoom", 9)
+    experiment = kwargs.get("experiment", "ngc4008a")
+    time_resolution = kwargs.get("time_resolution", "PT15M")
 
-    cat = intake.open_catalog(cat_path)
+    dset = open_catalog_dataset(cat_path, experiment, zoom, time_resolution)
 
-    dset = (
-        cat.ICON.ngc4008a(zoom=zoom, time="PT15M")  # chunks="auto",
-        .to_dask()
-        .pipe(attach_coords)
-    )
+    # shallow copy, the cached dataset must not be modified
+    return dset.copy()
 
-    return dset
 
+def get_healpix_grid(dset):
+    """
+    Get the HEALPix resolution and ordering of a global dataset.
 
-def get_index_for_zenith_mask(dset, max_zenith=80, lon0=0.0):
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    Returns
+    -------
+    nside : int or None
+        The HEALPix nside, None if the dataset does not cover the full globe.
+
+    nest : bool
+        Whether the cells are in nested ordering.
     """
-    Get the index for the zenith mask.
+
+    try:
+        nside = get_nside(dset)
+        nest = is_nested(dset)
+    except (ValueError, KeyError, AttributeError):
+        return None, True
+
+    if dset.sizes["cell"] != healpy.nside2npix(nside):
+        return None, nest
+
+    return nside, nest
+
+
+def ranges_to_index(ranges):
+    """
+    Convert cell ranges to a cell index.
+
+    Parameters
+    ----------
+    ranges : tuple
+        Tuple of (start, stop) pairs.
+
+    Returns
+    -------
+    index : numpy.ndarray
+        The cell index.
+    """
+
+    if len(ranges) == 0:
+        return np.array([], dtype=np.int64)
+
+    return np.concatenate([np.arange(start, stop) for start, stop in ranges])
+
+
+def index_to_ranges(index):
+    """
+    Convert a sorted cell index to contiguous cell ranges.
+
+    Parameters
+    ----------
+    index : numpy.ndarray
+        The sorted cell index.
+
+    Returns
+    -------
+    ranges : tuple
+        Tuple of (start, stop) pairs.
+    """
+
+    if len(index) == 0:
+        return ()
+
+    breaks = np.flatnonzero(np.diff(index) != 1) + 1
+    starts = index[np.concatenate([[0], breaks])]
+    stops = index[np.concatenate([breaks - 1, [len(index) - 1]])] + 1
+
+    return tuple(zip(starts.tolist(), stops.tolist()))
+
+
+@functools.lru_cache(maxsize=32)
+def healpix_zenith_ranges(nside, nest, max_zenith, lon0):
+    """
+    Get the cell ranges within a maximum satellite zenith angle.
+
+    Parameters
+    ----------
+    nside : int
+        The HEALPix nside.
+
+    nest : bool
+        Whether the cells are in nested ordering.
+
+    max_zenith : float
+        Maximum zenith angle.
+
+    lon0 : float
+        Longitude of the sub-satellite point.
+
+    Returns
+    -------
+    ranges : tuple
+        Tuple of (start, stop) pairs of cell indices.
+
+    Notes
+    -----
+    The field of view is a disc around the sub-satellite point, selected
+    with `healpy.query_disc`. Results are cached per set of arguments.
+    """
+
+    # beyond the horizon, the zenith angle is set to 90 deg
+    if max_zenith >= 90:
+        return ((0, healpy.nside2npix(nside)),)
+
+    vec = healpy.ang2vec(lon0, 0.0, lonlat=True)
+    radius = np.deg2rad(zenith2delta(max_zenith))
+
+    index = healpy.query_disc(nside, vec, radius, inclusive=False, nest=nest)
+
+    return index_to_ranges(np.sort(index))
+
+
+@functools.lru_cache(maxsize=32)
+def healpix_extend_ranges(nside, nest, extend):
+    """
+    Get the cell ranges within a lon / lat extend.
+
+    Parameters
+    ----------
+    nside : int
+        The HEALPix nside.
+
+    nest : bool
+        Whether the cells are in nested ordering.
+
+    extend : tuple
+        The extend of the region as (lon_min, lon_max, lat_min, lat_max).
+
+    Returns
+    -------
+    ranges : tuple
+        Tuple of (start, stop) pairs of cell indices.
+
+    Notes
+    -----
+    Candidate cells are found with `healpy.query_polygon` on narrow
+    longitude segments of the extend (and `healpy.query_disc` for the polar
+    caps) and are then checked exactly at their centers. Results are cached per set of arguments.
+    """
+
+    lon_min, lon_max, lat_min, lat_max = extend
+
+    # cell longitudes are in [0, 360), the extend may be in -180 .. 180 or
+    # cross the dateline (lon_max > 180, see `region_bounding_box`)
+    if lon_max < lon_min:
+        lon_max = lon_max + 360.0
+    lon_max = min(lon_max, lon_min + 360.0)
+
+    lon_segments = np.arange(lon_min, lon_max, 10.0)
+
+    # the polygon edges between lon segments are great circles, not latitude
+    # circles, hence a margin is added in latitude
+    margin = 1.0
+    lat0 = np.clip(lat_min - margin, -89.9, 89.9)
+    lat1 = np.clip(lat_max + margin, -89.9, 89.9)
+
+    # polygons cannot reach the poles: polar caps are queried as discs
+    candidates = []
+    poles = []
+    if lat_min - margin <= -90.0:
+        poles += [-90.0]
+    if lat_max + margin >= 90.0:
+        poles += [90.0]
+
+    for pole in poles:
+        candidates += [
+            healpy.query_disc(
+                nside,
+                healpy.ang2vec(0.0, pole, lonlat=True),
+                np.deg2rad(margin),
+                inclusive=True,
+                nest=nest,
+            )
+        ]
+
+    for lon_seg in lon_segments:
+        lon_end = min(lon_seg + 10.0, lon_max)
+
+        vertices = healpy.ang2vec(
+            np.array([lon_seg, lon_end, lon_end, lon_seg]),
+            np.array([lat0, lat0, lat1, lat1]),
+            lonlat=True,
+        )
+        candidates += [
+            healpy.query_polygon(nside, vertices, inclusive=True, nest=nest)
+        ]
+
+    if len(candidates) == 0:
+        return ()
+
+    index = np.unique(np.concatenate(candidates))
+
+    # exact check at the cell centers
+    lon, lat = healpy.pix2ang(nside, index, nest=nest, lonlat=True)
+    lon_east = np.mod(lon - lon_min, 360)
+
+    mask = (lon_east > 0) & (lon_east < lon_max - lon_min) & (lat > lat_min) & (lat < lat_max)
+
+    return index_to_ranges(index[mask])
+
+
+def get_ranges_for_zenith_mask(dset, max_zenith=80, lon0=0.0):
+    """
+    Get the contiguous cell ranges of the zenith mask.
 
     Parameters
     ----------
@@ -70,22 +342,54 @@ def get_index_for_zenith_mask(dset, max_zenith=80, lon0=0.0):
 
     Returns
     -------
-    regional_index : numpy.ndarray
-        The index for the zenith
+    ranges : tuple
+        Tuple of (start, stop) pairs of cell indices.
+
+    Notes
+    -----
+    For global HEALPix data, the ranges are cached (see
+    `healpix_zenith_ranges`).
     """
 
-    azi, zen = lonlat2azizen(dset["lon"], dset["lat"], lon0=lon0)
+    nside, nest = get_healpix_grid(dset)
+
+    if nside is not None:
+        return healpix_zenith_ranges(nside, nest, float(max_zenith), float(lon0))
+
+    azi, zen = cache.GeometryCache().get(dset["lon"].values, dset["lat"].values, lon0=lon0)
 
     zen_mask = zen <= max_zenith
 
-    regional_index = np.where(zen_mask)[0]
+    return index_to_ranges(np.where(zen_mask)[0])
 
-    return regional_index
 
+def get_index_for_zenith_mask(dset, max_zenith=80, lon0=0.0):
+    """
+    Get the index for the zenith mask.
 
-def get_index_for_regional_extend(dset, extend):
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    max_zenith : float, optional
+        Maximum zenith angle. Default is 80.
+
+    lon0 : float, optional
+        Longitude of the sub-satellite point. Default is 0.0.
+
+    Returns
+    -------
+    regional_index : numpy.ndarray
+        The index for the zenith (see `get_ranges_for_zenith_mask`).
     """
-    Get the index for the regional extend.
+
+    return ranges_to_index(get_ranges_for_zenith_mask(dset, max_zenith, lon0))
+
+
+def get_ranges_for_regional_extend(dset, extend):
+    """
+    Get the contiguous cell ranges of the regional extend.
 
     Parameters
     ----------
@@ -96,30 +400,176 @@ def get_index_for_regional_extend(dset, extend):
 
     Returns
     -------
-    regional_index : numpy.ndarray
-        The index for the region.
+    ranges : tuple
+        Tuple of (start, stop) pairs of cell indices.
 
     Notes
     -----
     The extend is in the form of [lon_min, lon_max, lat_min, lat_max].
+    For global HEALPix data, the ranges are cached (see
+    `healpix_extend_ranges`).
 
     """
 
+    nside, nest = get_healpix_grid(dset)
+
+    if nside is not None:
+        return healpix_extend_ranges(nside, nest, tuple(float(e) for e in extend))
+
     lon_extend = extend[0:2]
     lat_extend = extend[2:4]
 
-    lon_mask = (dset["lon"] > lon_extend[0]) & (dset["lon"] < lon_extend[1])
+    # longitudes modulo 360, see `healpix_extend_ranges`
+    lon_width = lon_extend[1] - lon_extend[0]
+    if lon_width < 0:
+        lon_width += 360.0
+    lon_east = np.mod(dset["lon"] - lon_extend[0], 360)
+
+    lon_mask = (lon_east > 0) & (lon_east < lon_width)
     lat_mask = (dset["lat"] > lat_extend[0]) & (dset["lat"] < lat_extend[1])
 
     mask = lon_mask & lat_mask
 
-    regional_index = np.where(mask)[0]
+    return index_to_ranges(np.where(mask)[0])
+
+
+def get_index_for_regional_extend(dset, extend):
+    """
+    Get the index for the regional extend.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+    extend : list
+        The extend of the region.
+
+    Returns
+    -------
+    regional_index : numpy.ndarray
+        The index for the region (see `get_ranges_for_regional_extend`).
+    """
+
+    return ranges_to_index(get_ranges_for_regional_extend(dset, extend))
+
+
+def take_ranges(values, ranges, axis):
+    """
+    Concatenate contiguous ranges of an array along an axis.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The array.
+
+    ranges : tuple
+        Tuple of (start, stop) pairs along `axis`.
+
+    axis : int
+        The axis.
+
+    Returns
+    -------
+    selected : numpy.ndarray
+        The concatenated ranges.
+    """
+
+    head = (slice(None),) * axis
+
+    return np.concatenate([values[head + (slice(a, b),)] for a, b in ranges], axis=axis)
+
 
-    return regional_index
+def select_cell_ranges(dset, ranges):
+    """
+    Select contiguous cell ranges of a dataset.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset with dimension "cell".
+
+    ranges : tuple
+        Tuple of (start, stop) pairs of cell indices.
+
+    Returns
+    -------
+    dset_reg : xarray.Dataset
+        The selected cells.
+
+    Notes
+    -----
+    Dask-backed variables are selected per dask block: each input block
+    that overlaps the ranges gives one output block with the ranges inside
+    it. The graph thus grows with the number of blocks, and no cell index
+    array is embedded in it.
+    """
+
+    if len(ranges) == 0:
+        return dset.isel(cell=slice(0, 0))
+
+    if len(ranges) == 1:
+        return dset.isel(cell=slice(*ranges[0]))
+
+    starts, stops = np.array(ranges).T
+    ncells = int((stops - starts).sum())
+
+    selected = {}
+    for name, v in dset.variables.items():
+        if "cell" not in v.dims:
+            continue
+
+        axis = v.dims.index("cell")
+
+        if not isinstance(v.data, dask.array.Array):
+            selected[name] = (v.dims, take_ranges(v.values, ranges, axis), v.attrs)
+            continue
+
+        bounds = np.cumsum((0,) + v.data.chunks[axis])
+        blocks = []
+
+        for iblock, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            inside = (starts < hi) & (stops > lo)
+            if not inside.any():
+                continue
+
+            local = tuple(
+                zip(
+                    (np.maximum(starts[inside], lo) - lo).tolist(),
+                    (np.minimum(stops[inside], hi) - lo).tolist(),
+                )
+            )
+            n = sum(b - a for a, b in local)
+
+            block = v.data.blocks[(slice(None),) * axis + (iblock,)]
+            blocks += [
+                block.map_blocks(
+                    take_ranges,
+                    ranges=local,
+                    axis=axis,
+                    chunks=block.chunks[:axis] + ((n,),) + block.chunks[axis + 1 :],
+                    dtype=block.dtype,
+                )
+            ]
+
+        selected[name] = (v.dims, dask.array.concatenate(blocks, axis=axis), v.attrs)
+
+    dset_reg = dset.isel(cell=slice(0, ncells))
+
+    coords = {k: v for k, v in selected.items() if k in dset.coords}
+    data_vars = {k: v for k, v in selected.items() if k not in dset.coords}
+
+    return dset_reg.assign_coords(coords).assign(data_vars)
 
 
 def input_regional_nextgems(
-    cat_path, mask_type=None, extend=None, time=None, max_zenith=80, lon0=0.0, **kwargs
+    cat_path,
+    mask_type=None,
+    extend=None,
+    time=None,
+    max_zenith=80,
+    lon0=0.0,
+    select_variables=True,
+    **kwargs
 ):
     """
     Get the regional nextGEMS dataset.
@@ -139,8 +589,10 @@ def input_regional_nextgems(
         The extend is in the form of [lon_min, lon_max, lat_min, lat_max].
         Default is None.
 
-    time : str, optional
-        Time of the data. Default is None.
+    time : str, list or slice, optional
+        A single time, a list of times or a time range as slice.
+        Times are selected before the spatial subset. Default is None
+        (all times).
 
     max_zenith : float, optional
         Maximum zenith angle. Default is 80.
@@ -148,12 +600,16 @@ def input_regional_nextgems(
     lon0 : float, optional
         Longitude of the sub-satellite point. Default is 0.0.
 
+    select_variables : bool, optional
+        Whether to only keep the variables needed for RTTOV profiles
+        (see `define_required_variables`). Default is True.
+
     **kwargs : dict
         Additional keyword arguments.
 
     Returns
     -------
-    dset_reg_sub : xarray.Dataset
+    dset_reg : xarray.Dataset
         The regional dataset
 
 
@@ -161,55 +617,73 @@ def input_regional_nextgems(
 
     dset = open_ngdataset(cat_path, **kwargs)
 
+    # variable projection: only keep what is needed
+    if select_variables:
+        dset = dset[define_required_variables()]
+
+    # time first: the spatial selection is then only built on the selected times
+    dset = select_time(dset, time)
+
     if mask_type == "regional" and extend is not None:
-        regional_index = get_index_for_regional_extend(dset, extend)
-        dset_reg = dset.isel(cell=regional_index)
+        ranges = get_ranges_for_regional_extend(dset, extend)
+        dset_reg = select_cell_ranges(dset, ranges)
 
     elif mask_type == "zenith":
-        regional_index = get_index_for_zenith_mask(
-            dset, max_zenith=max_zenith, lon0=lon0
-        )
-        dset_reg = dset.isel(cell=regional_index)
+        ranges = get_ranges_for_zenith_mask(dset, max_zenith=max_zenith, lon0=lon0)
+        dset_reg = select_cell_ranges(dset, ranges)
 
     else:
         dset_reg = dset  # be careful here
 
-    if time is not None:
-        dset_reg_sub = dset_reg.sel(
-            time=[
-                time,
-            ]
-        )
-
-    else:
-        dset_reg_sub = dset
-
-    return dset_reg_sub
+    return dset_reg
 
 
-def nextgems_variable_mapping(
-    dset,
-):
+def select_time(dset, time=None):
     """
-    Rename the variables of the nextGEMS dataset.
+    Select times of the nextGEMS dataset.
 
     Parameters
     ----------
     dset : xarray.Dataset
         The dataset.
 
+    time : str, list or slice, optional
+        A single time, a list of times or a time range as slice.
+        Default is None (all times).
+
     Returns
     -------
-    d_renamed : xarray.Dataset
-        The dataset with renamed variables.
+    dset_sub : xarray.Dataset
+        The dataset with the selected times. The time dimension is kept
+        for a single time.
+    """
+
+    if time is None:
+        return dset
+
+    if isinstance(time, slice):
+        return dset.sel(time=time)
 
+    if np.ndim(time) == 0:
+        time = [
+            time,
+        ]
+
+    return dset.sel(time=list(time))
+
+
+def define_variable_mapping():
     """
+    Define the variable mapping for nextGEMS.
 
-    d_renamed = xr.Dataset()
+    Returns
+    -------
+    var_mapping : dict
+        The variable mapping for nextGEMS.
 
-    # variables
+    """
 
-    icon2era = {
+    var_mapping = {
         "pfull": "p",
         "ta": "t",
         "hus": "q",
@@ -222,9 +696,120 @@ def nextgems_variable_mapping(
         "clc": "cc",
     }
 
+    return var_mapping
+
+
+def define_required_variables():
+    """
+    Define the nextGEMS variables read from the catalog.
+
+    Returns
+    -------
+    required_variables : list
+        Names of the variables needed to build RTTOV profiles.
+
+    Notes
+    -----
+    `t_2m`, `pres_sfc` and `clc` are derived from these variables.
+    """
+
+    derived_names = [d[0] for d in define_derived_variables()]
+
+    required_variables = [
+        v for v in define_variable_mapping() if v not in derived_names
+    ]
+
+    return required_variables
+
+
+def define_derived_variables(var_mapping=None):
+    """
+    Define the derived nextGEMS variables.
+
+    Parameters
+    ----------
+    var_mapping : dict, optional
+        Variable mapping if the definitions refer to renamed variables
+        (see `define_variable_mapping`). Default is None (nextGEMS names).
+
+    Returns
+    -------
+    derived_variables : list
+        List of (name, recipe, params) definitions (see `synsatipy.derived`).
+    """
+
+    if var_mapping is None:
+        var_mapping = {}
+        level_dimension = "level_full"
+    else:
+        level_dimension = "lev"
+
+    def name(v):
+        return var_mapping.get(v, v)
+
+    derived_variables = []
+
+    derived.add(
+        derived_variables,
+        name("t_2m"),
+        "lowest_level",
+        source=name("ta"),
+        level_dimension=level_dimension,
+    )
+    derived.add(
+        derived_variables,
+        name("pres_sfc"),
+        "lowest_level",
+        source=name("pfull"),
+        level_dimension=level_dimension,
+    )
+
+    # binary cloud cover in the precision of the input fields
+    derived.add(
+        derived_variables,
+        name("clc"),
+        "condensate_cloud_cover",
+        sources=[name(v) for v in ["clw", "cli", "qs"]],
+        threshold=1e-9,
+        inclusive=True,
+    )
+
+    return derived_variables
+
+
+def nextgems_variable_mapping(
+    dset,
+):
+    """
+    Rename the variables of the nextGEMS dataset.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    Returns
+    -------
+    d_renamed : xarray.Dataset
+        The dataset with renamed variables.
+
+    """
+
+    d_renamed = xr.Dataset()
+
+    # variables
+
+    icon2era = define_variable_mapping()
+
+    # derived variables might only be added later
+    derived_names = [d[0] for d in define_derived_variables()]
+
     for iname in icon2era:
         ename = icon2era[iname]
 
+        if iname not in dset and iname in derived_names:
+            continue
+
         d_renamed[ename] = dset[iname]
 
     # coordinates
@@ -233,7 +818,7 @@ def nextgems_variable_mapping(
     return d_renamed
 
 
-def open_nextgems(cat_path, name_remapping=True, **kwargs):
+def open_nextgems(cat_path, name_remapping=True, derived_variables=None, **kwargs):
     """
     Open the nextGEMS dataset.
 
@@ -245,6 +830,12 @@ def open_nextgems(cat_path, name_remapping=True, **kwargs):
     name_remapping : bool, optional
         Whether to remap the variable names. Default is True.
 
+    derived_variables : list, optional
+        If a list is given, the definitions of derived variables (2 m
+        temperature, surface pressure, cloud cover) are appended to it and
+        evaluated later, e.g. per chunk of profiles. Default is None
+        (derived variables are computed here).
+
     **kwargs : dict
         Additional keyword arguments.
 
@@ -257,20 +848,21 @@ def open_nextgems(cat_path, name_remapping=True, **kwargs):
 
     dset = input_regional_nextgems(cat_path, **kwargs)
 
-    dset["t_2m"] = dset["ta"].isel(level_full=-1)
-    dset["pres_sfc"] = dset["pfull"].isel(level_full=-1)
-
-    q_tot = dset["clw"] + dset["cli"] + dset["qs"]
-    q_tot_thresh = 1e-9
-
-    O = xr.zeros_like(dset["clw"])
-    I = xr.ones_like(dset["clw"])
+    # derived variables: computed here or later per chunk
+    if derived_variables is None:
+        dset = derived.evaluate(dset, define_derived_variables())
 
-    dset["clc"] = xr.where(q_tot < q_tot_thresh, O, I)
-
-    dset = dset.transpose("time", "cell", "level_full", "level_half")
+    dset = dset.transpose(
+        "time", "cell", "level_full", "level_half", missing_dims="ignore"
+    )
 
     if name_remapping:
-        return nextgems_variable_mapping(dset)
+        dset = nextgems_variable_mapping(dset)
+        var_mapping = define_variable_mapping()
     else:
-        return dset
+        var_mapping = None
+
+    if derived_variables is not None:
+        derived_variables += define_derived_variables(var_mapping=var_mapping)
+
+    return dset
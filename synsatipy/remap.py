@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+
+"""Remapping of output fields from the model grid onto geostationary satellite pixel grids."""
+
+import numpy as np
+import scipy.sparse
+import xarray as xr
+from scipy.spatial import cKDTree
+
+from synsatipy.utils.spacetools import (
+    geos_scan2lonlat,
+    lonlat2geos_scan,
+    region_bounding_box,
+)
+
+
+EARTH_RADIUS = 6371.0  # km
+
+
+# fixed grids of the full disk: number of pixels, scan angle step (rad) and
+# offset of the first pixel center in steps (west / south)
+GEOSTATIONARY_GRIDS = {
+    "SEVIRI": {
+        "npixel": 3712,
+        "step": np.deg2rad(2**16 / 13642337),
+        "first_pixel": (-1856, -1855),
+        "sweep": "y",
+        "height": 35785831.0,
+        "r_eq": 6378169.0,
+        "r_pol": 6356583.8,
+    },
+    "ABI": {
+        "npixel": 5424,
+        "step": 56e-6,
+        "first_pixel": (-2711.5, -2711.5),
+        "sweep": "x",
+        "height": 35786023.0,
+        "r_eq": 6378137.0,
+        "r_pol": 6356752.31414,
+    },
+}
+
+
+def geostationary_grid(instrument, lon0=0.0, region=None):
+    """
+    Get the fixed pixel grid of a geostationary imager.
+
+    Parameters
+    ----------
+    instrument : str
+        The instrument, "SEVIRI" or "ABI".
+
+    lon0 : float, optional
+        Longitude of the sub-satellite point. Default is 0.0.
+
+    region : list or numpy.ndarray, optional
+        Bounding box [lon_min, lon_max, lat_min, lat_max] or (lon, lat)
+        vertices of a polygon. The grid is cropped to the pixels around
+        the region. Default is None (full disk).
+
+    Returns
+    -------
+    grid : xarray.Dataset
+        Dataset with scan angles "x" and "y" (rad) as dimensions and
+        2d "lon" / "lat" coordinates, NaN off the earth disk.
+    """
+
+    geos = dict(GEOSTATIONARY_GRIDS[instrument.upper()])
+    npixel, step = geos.pop("npixel"), geos.pop("step")
+    x_first, y_first = geos.pop("first_pixel")
+
+    # SEVIRI pixel centers are not symmetric around the sub-satellite point
+    # (COFF = LOFF = 1856), ABI pixel centers are
+    x = (np.arange(npixel) + x_first) * step
+    y = (np.arange(npixel) + y_first) * step
+
+    if region is not None:
+        bbox = region_bounding_box(region)
+
+        # scan angles of a lattice covering the region
+        lon, lat = np.meshgrid(
+            np.linspace(bbox[0], bbox[1], 101), np.linspace(bbox[2], bbox[3], 101)
+        )
+        xr_scan, yr_scan = lonlat2geos_scan(lon, lat, lon0=lon0, **geos)
+
+        if np.isnan(xr_scan).all():
+            raise ValueError(f"Region {region} is not visible from {lon0} deg E")
+
+        x = x[(x >= np.nanmin(xr_scan) - step) & (x <= np.nanmax(xr_scan) + step)]
+        y = y[(y >= np.nanmin(yr_scan) - step) & (y <= np.nanmax(yr_scan) + step)]
+
+    lon, lat = geos_scan2lonlat(*np.meshgrid(x, y), lon0=lon0, **geos)
+
+    grid = xr.Dataset(
+        coords={
+            "y": ("y", y, {"units": "rad", "long_name": "north-south scan angle"}),
+            "x": ("x", x, {"units": "rad", "long_name": "east-west scan angle"}),
+            "lon": (("y", "x"), lon, {"units": "degrees_east"}),
+            "lat": (("y", "x"), lat, {"units": "degrees_north"}),
+        }
+    )
+    grid.attrs["instrument"] = instrument.upper()
+    grid.attrs["subsatellite_lon"] = lon0
+
+    return grid
+
+
+######################################################################
+######################################################################
+
+
+def lonlat2xyz(lon, lat):
+    """
+    Convert lon / lat into cartesian coordinates on the unit sphere.
+
+    Parameters
+    ----------
+    lon : numpy.ndarray
+        Longitude in degrees.
+
+    lat : numpy.ndarray
+        Latitude in degrees.
+
+    Returns
+    -------
+    xyz : numpy.ndarray
+        Array of shape (npoints, 3).
+    """
+
+    lam, phi = np.deg2rad(np.ravel(lon)), np.deg2rad(np.ravel(lat))
+
+    return np.stack(
+        [np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)], axis=-1
+    )
+
+
+def local_spacing(tree):
+    """
+    Get the distance of each point of a KD-tree to its nearest neighbour.
+
+    Parameters
+    ----------
+    tree : scipy.spatial.cKDTree
+        KD-tree of points on the unit sphere.
+
+    Returns
+    -------
+    spacing : numpy.ndarray
+        Chord distance to the nearest other point.
+    """
+
+    if tree.n < 2:
+        return np.full(tree.n, np.inf)
+
+    distance, _ = tree.query(tree.data, k=2)
+
+    return distance[:, 1]
+
+
+def remap_weights(src_lon, src_lat, dst_lon, dst_lat, method="nearest", max_distance=None):
+    """
+    Calculate sparse remap weights from model grid columns to target pixels.
+
+    Parameters
+    ----------
+    src_lon : numpy.ndarray
+        Longitudes of the model grid columns.
+
+    src_lat : numpy.ndarray
+        Latitudes of the model grid columns.
+
+    dst_lon : numpy.ndarray
+        Longitudes of the target pixels, NaN for pixels off the earth disk.
+
+    dst_lat : numpy.ndarray
+        Latitudes of the target pixels, NaN for pixels off the earth disk.
+
+    method : str, optional
+        "nearest": each pixel takes its nearest model column.
+        "area": model columns are averaged in their nearest pixel, weighted
+        by cos(lat); pixels without model column take the nearest one.
+        Default is "nearest".
+
+    max_distance : float, optional
+        Maximum distance in km between pixel and model column. Default is
+        None, i.e. the local spacing of the model grid ("nearest") or of the
+        pixel grid ("area"), so that pixels outside the model domain stay empty.
+
+    Returns
+    -------
+    weights : scipy.sparse.csr_matrix
+        Matrix of shape (npixels, ncolumns); rows sum to one or are empty.
+    """
+
+    if method not in ("nearest", "area"):
+        raise ValueError(f"Unknown remap method: {method}")
+
+    src_xyz = lonlat2xyz(src_lon, src_lat)
+    dst_xyz = lonlat2xyz(dst_lon, dst_lat)
+
+    nsrc, ndst = len(src_xyz), len(dst_xyz)
+
+    pixels = np.flatnonzero(np.isfinite(dst_xyz).all(axis=-1))
+    dst_xyz = dst_xyz[pixels]
+
+    if max_distance is not None:
+        max_chord = 2 * np.sin(max_distance / (2 * EARTH_RADIUS))
+
+    # nearest model column of each pixel
+    src_tree = cKDTree(src_xyz)
+    distance, column = src_tree.query(dst_xyz)
+
+    if max_distance is None:
+        max_chord_src = local_spacing(src_tree)[column]
+    else:
+        max_chord_src = max_chord
+
+    inside = distance <= max_chord_src
+    rows, cols, data = pixels[inside], column[inside], np.ones(inside.sum())
+
+    if method == "area":
+
+        # nearest pixel of each model column
+        dst_tree = cKDTree(dst_xyz)
+        distance, pixel = dst_tree.query(src_xyz)
+
+        if max_distance is None:
+            max_chord_dst = local_spacing(dst_tree)[pixel]
+        else:
+            max_chord_dst = max_chord
+
+        assigned = distance <= max_chord_dst
+        area = np.cos(np.deg2rad(np.ravel(src_lat)))
+
+        covered = np.zeros(ndst, dtype=bool)
+        covered[pixels[pixel[assigned]]] = True
+
+        # pixels without model column fall back to nearest
+        fallback = ~covered[rows]
+
+        rows = np.concatenate([pixels[pixel[assigned]], rows[fallback]])
+        cols = np.concatenate([np.flatnonzero(assigned), cols[fallback]])
+        data = np.concatenate([area[assigned], data[fallback]])
+
+    weights = scipy.sparse.csr_matrix((data, (rows, cols)), shape=(ndst, nsrc))
+
+    # normalize rows
+    rowsum = np.asarray(weights.sum(axis=1)).ravel()
+    scale = np.divide(1.0, rowsum, out=np.zeros_like(rowsum), where=rowsum > 0)
+
+    return (scipy.sparse.diags(scale) @ weights).tocsr()
+
+
+def apply_weights(weights, values):
+    """
+    Apply remap weights, ignoring missing values.
+
+    Parameters
+    ----------
+    weights : scipy.sparse.csr_matrix
+        Matrix of shape (npixels, ncolumns), see `remap_weights`.
+
+    values : numpy.ndarray
+        Values with model columns along the first axis.
+
+    Returns
+    -------
+    remapped : numpy.ndarray
+        Array of shape (npixels,) + `values.shape[1:]`, NaN for pixels
+        without valid model column.
+    """
+
+    shape = values.shape[1:]
+    values = values.reshape(values.shape[0], -1)
+
+    valid = np.isfinite(values)
+
+    num = weights @ np.where(valid, values, 0.0)
+    den = weights @ valid.astype(np.float64)
+
+    remapped = np.full(num.shape, np.nan)
+    np.divide(num, den, out=remapped, where=den > 0)
+
+    return remapped.reshape((weights.shape[0],) + shape)
+
+
+def remap_dataset(dset, horizontal_dimensions, weights, grid, flags=None, flag_weights=None):
+    """
+    Remap all fields of a dataset onto a target grid.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset, e.g. the output fields on the model grid.
+
+    horizontal_dimensions : list
+        The horizontal dimensions of the model grid, in the order of the
+        model columns in `weights`.
+
+    weights : scipy.sparse.csr_matrix
+        Remap weights, see `remap_weights`.
+
+    grid : xarray.Dataset
+        The target grid with 2d "lon" / "lat", see `geostationary_grid`.
+
+    flags : list, optional
+        Names of flag fields (e.g. "computed") that must keep their values
+        and are remapped with `flag_weights`. Default is None.
+
+    flag_weights : scipy.sparse.csr_matrix, optional
+        Nearest-neighbour remap weights for `flags`. Default is None, i.e.
+        `weights`, which is only correct for method "nearest".
+
+    Returns
+    -------
+    remapped : xarray.Dataset
+        The fields on the target grid, with the data types of `dset`.
+
+    Notes
+    -----
+    The weights are applied as one sparse matrix product per step of the
+    remaining dimensions (e.g. per time), for all fields at once.
+    """
+
+    flags = [v for v in (flags or []) if v in dset.data_vars]
+    fields = [v for v in dset.data_vars if v not in flags]
+
+    if flag_weights is None:
+        flag_weights = weights
+
+    # coordinates of the target grid, e.g. without the time of an observation
+    leading = [d for d in dset.dims if d not in horizontal_dimensions]
+    grid_dims = list(grid["lon"].dims)
+
+    coords = {d: dset[d] for d in leading if d in dset.coords}
+    coords.update({d: grid[d] for d in grid_dims if d in grid.coords})
+    coords.update({v: grid[v].reset_coords(drop=True) for v in ["lon", "lat"]})
+
+    out = xr.Dataset(coords=coords)
+
+    for names, w in [(fields, weights), (flags, flag_weights)]:
+        if not names:
+            continue
+
+        dims, remapped = remap_fields(dset, names, horizontal_dimensions, w, grid)
+
+        for ivar, name in enumerate(names):
+            values = remapped[..., ivar]
+
+            # e.g. float32 channels stay float32
+            if np.issubdtype(dset[name].dtype, np.floating):
+                values = values.astype(dset[name].dtype)
+
+            out[name] = (dims + grid_dims, values)
+            out[name].attrs = dset[name].attrs
+
+    return out
+
+
+def remap_fields(dset, names, horizontal_dimensions, weights, grid):
+    """
+    Remap a set of fields of a dataset with the same weights.
+
+    Parameters
+    ----------
+    dset : xarray.Dataset
+        The dataset.
+
+    names : list
+        Names of the fields.
+
+    horizontal_dimensions : list
+        The horizontal dimensions of the model grid.
+
+    weights : scipy.sparse.csr_matrix
+        Remap weights, see `remap_weights`.
+
+    grid : xarray.Dataset
+        The target grid with 2d "lon" / "lat".
+
+    Returns
+    -------
+    leading : list
+        The remaining dimensions of the fields, e.g. ["time"].
+
+    remapped : numpy.ndarray
+        Array of shape leading + grid shape + (len(names),).
+    """
+
+    fields = xr.concat([dset[v] for v in names], dim="variable").drop_vars(
+        [c for c in ["lon", "lat"] if c in dset.coords]
+    )
+
+    leading = [d for d in fields.dims if d not in horizontal_dimensions + ["variable"]]
+    fields = fields.transpose(*leading, *horizontal_dimensions, "variable")
+
+    leading_shape = tuple(fields.sizes[d] for d in leading)
+    values = fields.values.reshape(leading_shape + (-1, len(names)))
+
+    remapped = np.empty(leading_shape + (weights.shape[0], len(names)))
+    for index in np.ndindex(leading_shape):
+        remapped[index] = apply_weights(weights, values[index])
+
+    return leading, remapped.reshape(leading_shape + grid["lon"].shape + (len(names),))
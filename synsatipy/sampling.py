@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+
+"""Subsampling of profiles and filling of subsampled output on the full grid."""
+
+import numpy as np
+import xarray as xr
+
+
+def strided_isel(dims, stride):
+    """
+    Get an index selection that takes every n-th element along given dimensions.
+
+    Parameters
+    ----------
+    dims : list
+        The dimensions to subsample.
+
+    stride : int
+        Take every `stride`-th element.
+
+    Returns
+    -------
+    isel : dict
+        The index selection.
+    """
+
+    return {dim: slice(0, None, stride) for dim in dims}
+
+
+def upsample_from_strided(coarse, template, dims, stride, method="nearest"):
+    """
+    Fill strided subsampled data back onto the full grid.
+
+    Parameters
+    ----------
+    coarse : xarray.DataArray or xarray.Dataset
+        Data on the strided grid (every `stride`-th element, starting at 0).
+
+    template : xarray.Dataset
+        Dataset on the full grid. Sizes and coordinates of the
+        subsampled dimensions are taken from here.
+
+    dims : list
+        The subsampled dimensions.
+
+    stride : int
+        The stride used for subsampling.
+
+    method : str, optional
+        Fill method, either "nearest" or "bilinear". Default is "nearest".
+
+    Returns
+    -------
+    full : xarray.DataArray or xarray.Dataset
+        The data on the full grid.
+
+    Notes
+    -----
+    The fill is done in index space and separately for each dimension.
+    Along the grid boundary, the last computed values are kept constant.
+    """
+
+    coords = {name: c for name, c in coarse.coords.items()}
+    full = coarse.drop_vars(list(coords))
+
+    for dim in dims:
+        ncoarse = full.sizes[dim]
+        nfull = template.sizes[dim]
+
+        pos = np.arange(nfull) / stride
+
+        if method == "nearest":
+            index = np.clip(np.round(pos).astype(int), 0, ncoarse - 1)
+            full = full.isel({dim: index})
+
+        elif method == "bilinear":
+            i0 = np.clip(np.floor(pos).astype(int), 0, ncoarse - 1)
+            i1 = np.clip(i0 + 1, 0, ncoarse - 1)
+
+            w = xr.DataArray(np.clip(pos - i0, 0, 1), dims=dim)
+
+            full = (1 - w) * full.isel({dim: i0}) + w * full.isel({dim: i1})
+
+        else:
+            raise ValueError(f"Unknown fill method: {method}")
+
+    # keep the original dimension order
+    full = full.transpose(*coarse.dims)
+
+    # restore coordinates from the template and the subsampled data
+    for name, c in template.coords.items():
+        if set(c.dims) <= set(full.dims):
+            full = full.assign_coords({name: c})
+
+    for name, c in coords.items():
+        if name not in full.coords and not set(c.dims) & set(dims):
+            full = full.assign_coords({name: c})
+
+    return full
+
+
+def lattice_mask(shape, stride, axes):
+    """
+    Get a mask of the nodes of a strided lattice.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape of the full grid.
+
+    stride : int
+        The lattice stride.
+
+    axes : list
+        Axes along which the lattice is strided.
+
+    Returns
+    -------
+    mask : numpy.ndarray
+        True at every `stride`-th element along all `axes`.
+    """
+
+    mask = np.ones(shape, dtype=bool)
+
+    for axis in axes:
+        on_lattice = np.arange(shape[axis]) % stride == 0
+        mask &= np.expand_dims(on_lattice, tuple(set(range(len(shape))) - {axis}))
+
+    return mask
+
+
+def block_reduce(a, stride, axes, ufunc=np.maximum):
+    """
+    Reduce an array over the closed blocks of a strided lattice.
+
+    Parameters
+    ----------
+    a : numpy.ndarray
+        The input array.
+
+    stride : int
+        The lattice stride.
+
+    axes : list
+        Axes along which the blocks are formed.
+
+    ufunc : numpy.ufunc, optional
+        The reduction, e.g. numpy.maximum or numpy.minimum.
+        Default is numpy.maximum.
+
+    Returns
+    -------
+    r : numpy.ndarray
+        The reduced array with one element per block along `axes`.
+
+    Notes
+    -----
+    Block k covers the elements k * stride, ..., (k + 1) * stride, i.e. the
+    nodes on both sides of the block are included.
+    """
+
+    for axis in axes:
+        n = a.shape[axis]
+        starts = np.arange(0, n, stride)
+
+        blocks = ufunc.reduceat(a, starts, axis=axis)
+        right = np.take(a, np.minimum(starts + stride, n - 1), axis=axis)
+
+        a = ufunc(blocks, right)
+
+    return a
+
+
+def refinement_region(flags, stride, shape, axes):
+    """
+    Expand block flags to the elements of the full grid covered by the flagged blocks.
+
+    Parameters
+    ----------
+    flags : numpy.ndarray
+        Boolean flag per block (see `block_reduce`).
+
+    stride : int
+        The lattice stride.
+
+    shape : tuple
+        Shape of the full grid.
+
+    axes : list
+        Axes along which the blocks are formed.
+
+    Returns
+    -------
+    region : numpy.ndarray
+        True for all elements of flagged blocks, including their boundary nodes.
+    """
+
+    region = flags
+
+    for axis in axes:
+        n = shape[axis]
+
+        # element i belongs to block i // stride, nodes also to the block before
+        index = np.arange(n)
+        own = np.take(region, index // stride, axis=axis)
+        before = np.take(region, np.maximum(index // stride - 1, 0), axis=axis)
+
+        is_node = np.expand_dims(
+            index % stride == 0, tuple(set(range(region.ndim)) - {axis})
+        )
+        region = own | (before & is_node)
+
+    return region
+
+
+def upsample_bilinear(lattice, shape, stride, axes):
+    """
+    Bilinear (multi-linear) interpolation from a strided lattice onto the full grid.
+
+    Parameters
+    ----------
+    lattice : numpy.ndarray
+        Values at the lattice nodes.
+
+    shape : tuple
+        Shape of the full grid along the first dimensions of `lattice`.
+
+    stride : int
+        The lattice stride.
+
+    axes : list
+        Axes along which the lattice is strided.
+
+    Returns
+    -------
+    full : numpy.ndarray
+        The interpolated values on the full grid.
+        Beyond the last lattice node, values are kept constant.
+    """
+
+    full = lattice
+
+    for axis in axes:
+        ncoarse = full.shape[axis]
+        pos = np.arange(shape[axis]) / stride
+
+        i0 = np.clip(np.floor(pos).astype(int), 0, ncoarse - 1)
+        i1 = np.clip(i0 + 1, 0, ncoarse - 1)
+
+        w = np.clip(pos - i0, 0, 1)
+        w = np.expand_dims(w, tuple(set(range(full.ndim)) - {axis}))
+
+        a0 = np.take(full, i0, axis=axis)
+        a1 = np.take(full, i1, axis=axis)
+
+        # nodes are taken directly to avoid spreading missing values of neighbours
+        full = np.where(w == 0, a0, (1 - w) * a0 + w * a1)
+
+    return full
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import os
 import sys
 import numpy as np
 import xarray as xr
@@ -7,6 +8,9 @@ import xarray as xr
 from synsatipy.starter import pyrttov, __rttov_version__
 import synsatipy.data_handler as data_handler
 import synsatipy.output as output
+import synsatipy.cache as cache
+import synsatipy.remap as remap
+import synsatipy.sampling as sampling
 
 
 class attributes:
@@ -79,10 +83,16 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
 
         # init field
         self.synsat.chunked_result = []
+        self.synsat.computed_flag = None
+        self.synsat.satellite_grid = None
+        self.synsat.remap_method = "nearest"
 
         # load instrument based on specified instrument
         self.load_instrument(**synsat_kwargs)
 
+        # optional on-disk cache of results
+        self.init_result_cache(**synsat_kwargs)
+
         return
 
     def set_default_options(self, **synsat_kwargs):
@@ -149,6 +159,53 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
 
         return
 
+    def select_missing_channels(
+        self, chan_list, var_names, synsat_existing_output=None, **synsat_kwargs
+    ):
+        """
+        Reduces the channel list to the channels not yet stored in an existing output file.
+
+        Parameters
+        ----------
+        chan_list : tuple
+            The requested channel numbers (starting at 1).
+        var_names : list
+            Output variable names of all instrument channels.
+        synsat_existing_output : str, optional
+            Existing SynSat output file. Default is None (compute all channels).
+        **synsat_kwargs : dict
+            Additional keyword arguments.
+
+        Returns
+        -------
+        chan_list : tuple
+            The channel numbers that still need to be computed.
+        """
+
+        attr = self.synsat
+        attr.existing_output = synsat_existing_output
+
+        if synsat_existing_output is None:
+            return chan_list
+
+        with xr.open_dataset(synsat_existing_output) as existing:
+            existing_vars = list(existing.data_vars)
+
+        missing_chan_list = tuple(
+            [ichan for ichan in chan_list if var_names[ichan - 1] not in existing_vars]
+        )
+
+        if len(missing_chan_list) == 0:
+            raise ValueError(
+                f"All requested channels are already stored in {synsat_existing_output}"
+            )
+
+        print(
+            f"... [synsat] only compute missing channels {missing_chan_list} for {synsat_existing_output}"
+        )
+
+        return missing_chan_list
+
     def load_msg_seviri(self, synsat_msg_number=3, **synsat_kwargs):
         """
         Loads configuration specific for the MSG-SEVIRI instrument.
@@ -216,6 +273,9 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
 
         default_chan_list = (5, 6, 7, 9, 10, 11)
         chan_list_seviri = synsat_kwargs.get("synsat_channel_list", default_chan_list)
+        chan_list_seviri = self.select_missing_channels(
+            chan_list_seviri, seviri_var_names, **synsat_kwargs
+        )
 
         attr = self.synsat
         attr.instrument = "SEVIRI"
@@ -332,6 +392,9 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
         # Default to IR channels (channels 7-16)
         default_chan_list = (7, 8, 9, 10, 11, 12, 13, 14, 15, 16)
         chan_list_instrument = synsat_kwargs.get("synsat_channel_list", default_chan_list)
+        chan_list_instrument = self.select_missing_channels(
+            chan_list_instrument, abi_var_names, **synsat_kwargs
+        )
 
         attr = self.synsat
         attr.instrument = "ABI"
@@ -371,6 +434,111 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
 
         return
 
+    def init_result_cache(
+        self, synsat_cache_dir=None, synsat_cache_max_size=10 * 1024**3, **synsat_kwargs
+    ):
+        """
+        Initializes the optional on-disk cache of RTTOV results and the satellite geometry and remap caches.
+
+        Parameters
+        ----------
+        synsat_cache_dir : str, optional
+            Directory of the result cache. Default is None (no caching).
+        synsat_cache_max_size : int, optional
+            Maximum size of the cache in bytes. (Default value = 10 GB)
+        **synsat_kwargs : dict
+            Additional keyword arguments.
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        The satellite geometry and the remap weights are always cached in
+        memory. With `synsat_cache_dir`, they are also stored in the
+        subdirectories "geometry" and "remap".
+        """
+
+        if synsat_cache_dir is None:
+            self.synsat.result_cache = None
+            self.synsat.geometry_cache = cache.GeometryCache()
+            self.synsat.remap_cache = cache.RemapCache()
+        else:
+            self.synsat.result_cache = cache.ResultCache(
+                synsat_cache_dir, max_size=synsat_cache_max_size
+            )
+            self.synsat.geometry_cache = cache.GeometryCache(
+                os.path.join(synsat_cache_dir, "geometry")
+            )
+            self.synsat.remap_cache = cache.RemapCache(
+                os.path.join(synsat_cache_dir, "remap")
+            )
+            print(f"... [synsat] use result cache in {synsat_cache_dir}")
+
+        return
+
+    def result_cache_key(self, **kwargs):
+        """
+        Calculates the cache key for the currently loaded profiles.
+
+        The key combines the profile arrays with everything else that
+        determines the RTTOV result: coefficient files, channel list,
+        options, RTTOV version and atlas month.
+
+        Parameters
+        ----------
+        **kwargs : dict
+            Additional keyword arguments passed to `get_atlas_month`.
+
+        Returns
+        -------
+        key : str
+            The cache key.
+        """
+
+        attr = self.synsat
+
+        key = cache.hash_profiles(
+            self.Profiles,
+            coef_filename=attr.coef_filename,
+            cldaer_filename=self.FileSccld,
+            channels=tuple(attr.chan_list_instrument),
+            options=cache.options_as_dict(self.Options),
+            rttov_version=attr.rttov_version,
+            atlas_month=int(self.get_atlas_month(**kwargs)),
+            solar_calculations=bool(attr.solar_calculations),
+        )
+
+        return key
+
+    def get_atlas_month(self, synsat_default_month=8, **kwargs):
+        """
+        Get the month used for the emissivity and BRDF atlases.
+
+        Parameters
+        ----------
+        synsat_default_month : int
+            Month used if no profiles are loaded. (Default value = 8)
+        **kwargs : dict
+            Additional keyword arguments.
+
+        Returns
+        -------
+        synsat_month : int
+            The atlas month.
+        """
+
+        attr = self.synsat
+
+        if not attr.nprofiles is None:
+            # WARNING: this assumes that first month is representative for all profiles
+            synsat_month = self.Profiles.DateTimes[0, 1]
+        else:
+            synsat_month = synsat_default_month
+
+        return synsat_month
+
     def load_atlasses(self, synsat_default_month=8, **kwargs):
         """
         Load the emissivity and BRDF atlases.
@@ -400,11 +568,7 @@ class SynSatBase(pyrttov.Rttov, synsat_attributes):
 
         attr = self.synsat
 
-        if not attr.nprofiles is None:
-            # WARNING: this assumes that first month is representative for all profiles
-            synsat_month = self.Profiles.DateTimes[0, 1]
-        else:
-            synsat_month = synsat_default_month
+        synsat_month = self.get_atlas_month(synsat_default_month=synsat_default_month)
 
         irAtlas = pyrttov.Atlas()
         irAtlas.AtlasPath = "{}/{}".format(attr.rttov_install_dir, "emis_data")
@@ -517,11 +681,20 @@ class SynSat(SynSatBase):
 
         Parameters
         ----------
-        inputfile_or_data : str or xr.Dataset
-            The input file or dataset.
+        inputfile_or_data : str, list or xr.Dataset
+            The input file, a list or glob pattern of input files (ERA) or
+            a dataset.
 
         **kwargs : dict
             Additional keyword arguments.
+            - satellite_grid : str, list or xr.Dataset, optional
+              Write output on a geostationary pixel grid of the instrument:
+              "full_disk", "region" (the pixels around `region`), a lon / lat
+              bounding box or polygon, or a dataset with 2d "lon" / "lat",
+              e.g. of an observation. Default is None (model grid).
+            - remap_method : str, optional
+              "nearest" or "area", see `synsatipy.remap.remap_weights`.
+              Default is "nearest".
 
         Returns
         -------
@@ -531,23 +704,47 @@ class SynSat(SynSatBase):
         model = kwargs.get("model", "auto")
         lon0 = self.synsat.subsatellite_lon
 
+        # optional output on a satellite pixel grid
+        satellite_grid = kwargs.pop("satellite_grid", None)
+        self.synsat.remap_method = kwargs.pop("remap_method", "nearest")
+
+        if isinstance(satellite_grid, str) and satellite_grid == "full_disk":
+            satellite_grid = remap.geostationary_grid(self.synsat.instrument, lon0=lon0)
+
+        elif isinstance(satellite_grid, str) and satellite_grid == "region":
+            satellite_grid = remap.geostationary_grid(
+                self.synsat.instrument, lon0=lon0, region=kwargs["region"]
+            )
+
+        elif satellite_grid is not None and not isinstance(satellite_grid, xr.Dataset):
+            satellite_grid = remap.geostationary_grid(
+                self.synsat.instrument, lon0=lon0, region=satellite_grid
+            )
+
+        self.synsat.satellite_grid = satellite_grid
+
         # use data handler to load data
-        sdat = data_handler.DataHandler(model=model)
+        sdat = data_handler.DataHandler(
+            model=model, geometry_cache=self.synsat.geometry_cache
+        )
 
         # check if file or dataset is provided
-        if type(inputfile_or_data) == type(""):
+        if isinstance(inputfile_or_data, (str, list, tuple)):
 
             inputfile = inputfile_or_data
             print(f"... [synsat] read data from file  {inputfile}")
 
-            self.synsat.input_filename = inputfile
+            if isinstance(inputfile, str):
+                self.synsat.input_filename = inputfile
+            else:
+                self.synsat.input_filename = ", ".join(inputfile)
 
             sdat.open_data(inputfile, lon0 = lon0, **kwargs)
 
         elif type(inputfile_or_data) == type(xr.Dataset()):
             sdat.input_data = inputfile_or_data
 
-        sdat.stack_data_as_profile(**kwargs)
+        sdat.stack_data_as_profile(lon0 = lon0, **kwargs)
 
         self.synsat.data_handler = sdat
 
@@ -577,10 +774,23 @@ class SynSat(SynSatBase):
         self.Profiles = profs
         self.synsat.nprofiles = profs.Nprofiles
 
-        # and run workflow
-        self.run_workflow()
+        # and run workflow (or take the result from cache)
+        result_cache = self.synsat.result_cache
 
-        self.synsat.chunked_result += [self.BtRefl]
+        if result_cache is None:
+            self.run_workflow()
+            result = self.BtRefl
+
+        else:
+            key = self.result_cache_key()
+            result = result_cache.get(key)
+
+            if result is None:
+                self.run_workflow()
+                result = self.BtRefl
+                result_cache.put(key, result)
+
+        self.synsat.chunked_result += [result]
 
     def run(self, **kwargs):
         """
@@ -597,36 +807,218 @@ class SynSat(SynSatBase):
 
         """
 
+        self.synsat.computed_flag = None
+        self.synsat.chunked_result = []
+
+        if kwargs.pop("adaptive", False):
+            self.run_adaptive(**kwargs)
+            return
+
         if "chunked" not in kwargs:
             isel = {"profile": slice(0, None)}
             self.chunked_run(isel=isel, **kwargs)
 
+            self.synsat.result = np.row_stack(self.synsat.chunked_result)
+
         else:
-            sdat = self.synsat.data_handler
+            self.synsat.result = self.compute_profiles(slice(0, None), **kwargs)
+
+        result_cache = self.synsat.result_cache
+        if result_cache is not None:
+            print(
+                f"... [synsat] result cache: {result_cache.hits} hits, {result_cache.misses} misses"
+            )
 
-            ntot = sdat.total_number_of_profiles
-            nprof_per_call = self.Options.NprofsPerCall
+    def compute_profiles(self, profile_index, **kwargs):
+        """
+        Runs RTTOV for a selection of profiles in chunks aligned with the input storage.
+
+        Parameters
+        ----------
+        profile_index : slice or numpy.ndarray
+            Slice or integer index of the selected profiles.
+
+        **kwargs : dict
+            Additional keyword arguments.
+
+        Returns
+        -------
+        result : numpy.ndarray
+            The RTTOV result for the selected profiles (profile, channel).
+
+        Notes
+        -----
+        Chunks are made of whole dask blocks of the input with about
+        `Options.NprofsPerCall` profiles (see `DataHandler.get_profile_chunks`).
+        """
+
+        sdat = self.synsat.data_handler
+        nprof_per_call = self.Options.NprofsPerCall
+        chunked_result = self.synsat.chunked_result
+
+        profile_chunks = sdat.get_profile_chunks(nprof_per_call, index=profile_index)
+        nchunks = len(profile_chunks)
+
+        n0 = len(chunked_result)
+
+        for ichunks, index in enumerate(profile_chunks):
+            isel = {"profile": index}
+
+            print(f"... [synsat] running {ichunks}/{nchunks} chunk with {len(index)} profiles")
+            self.chunked_run(isel=isel, **kwargs)
+
+        chunk_result = np.row_stack(chunked_result[n0:])
+        del chunked_result[n0:]
+
+        # restore order of the requested profiles
+        order = np.argsort(np.concatenate(profile_chunks))
+        result = chunk_result[order]
+
+        if not isinstance(profile_index, slice):
+            result = result[np.argsort(np.argsort(profile_index))]
+
+        return result
+
+    def run_adaptive(
+        self,
+        adaptive_stride=8,
+        adaptive_tolerance=1.0,
+        adaptive_cloud_tolerance=0.1,
+        adaptive_cloud_variable="cc",
+        **kwargs,
+    ):
+        """
+        Run the RTTOV workflow with adaptive, error-controlled sampling of profiles.
+
+        Parameters
+        ----------
+        adaptive_stride : int, optional
+            Initial stride of computed profiles in each horizontal direction,
+            preferably a power of two. Default is 8.
+
+        adaptive_tolerance : float, optional
+            Blocks are refined if the computed values at their corners differ
+            by more than this tolerance in any channel. Default is 1.0.
+
+        adaptive_cloud_tolerance : float, optional
+            Blocks are refined if the column maximum of the input cloud field
+            varies by more than this tolerance within the block. Default is 0.1.
+
+        adaptive_cloud_variable : str, optional
+            Name of the input cloud field. Default is "cc".
+
+        **kwargs : dict
+            Additional keyword arguments.
 
-            if np.mod(ntot, nprof_per_call) == 0:
-                residual = 0
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        A coarse lattice of profiles is computed first. The stride is then
+        halved in all blocks that fail the tolerance checks until single
+        profiles are reached. Remaining profiles are bilinearly interpolated
+        from the finest lattice around them. The flag `computed_flag` tells
+        computed and interpolated profiles apart.
+        """
+
+        attr = self.synsat
+        sdat = attr.data_handler
+
+        shape = sdat.profile_shape
+        axes = [i for i, d in enumerate(sdat.profile_dimensions) if d != "time"]
+
+        # selected profiles on the full grid
+        selected = sdat.profiles_to_grid(
+            np.ones(sdat.total_number_of_profiles, dtype=bool), False
+        )
+
+        # input cloud field as column maximum
+        cloud_field = sdat.get_variable(adaptive_cloud_variable).max("lev")
+        cloud = cloud_field.transpose(*sdat.profile_dimensions).values
+        cloud = np.where(selected, cloud, np.nan)
+
+        result = np.full(shape + (attr.nchan_instrument,), np.nan)
+        computed = np.zeros(shape, dtype=bool)
+
+        stride = adaptive_stride
+        region = np.ones(shape, dtype=bool)
+        new_nodes = sampling.lattice_mask(shape, stride, axes) & selected
+
+        while True:
+            # compute new nodes
+            if new_nodes.any():
+                print(
+                    f"... [synsat] adaptive sampling: compute {new_nodes.sum()} profiles at stride {stride}"
+                )
+                result[new_nodes] = self.compute_profiles(
+                    sdat.grid_positions_to_profiles(np.flatnonzero(new_nodes)), **kwargs
+                )
+                computed |= new_nodes
+
+            # interpolate from current lattice within refined region
+            lattice_isel = tuple(
+                [slice(0, None, stride) if i in axes else slice(None) for i in range(len(shape))]
+            )
+            lattice = result[lattice_isel]
+
+            interp = sampling.upsample_bilinear(lattice, shape, stride, axes)
+
+            if stride == adaptive_stride:
+                filled = interp
             else:
-                residual = 1
+                update = region[..., np.newaxis] & np.isfinite(interp)
+                filled = np.where(update, interp, filled)
 
-            nchunks = ntot // nprof_per_call + residual
+            if stride == 1:
+                break
 
-            for ichunks in range(nchunks):
+            # error estimate per block
+            bt_range = sampling.block_reduce(
+                lattice, 1, axes, np.fmax
+            ) - sampling.block_reduce(lattice, 1, axes, np.fmin)
+            bt_range = bt_range.max(axis=-1)
 
-                prof0 = ichunks * nprof_per_call
-                prof1 = (ichunks + 1) * nprof_per_call
+            cloud_range = sampling.block_reduce(
+                cloud, stride, axes, np.fmax
+            ) - sampling.block_reduce(cloud, stride, axes, np.fmin)
 
-                if prof1 >= ntot:
-                    prof1 = None
-                isel = {"profile": slice(prof0, prof1)}
+            flags = (bt_range > adaptive_tolerance) | (
+                cloud_range > adaptive_cloud_tolerance
+            )
+
+            # refine flagged blocks
+            region = sampling.refinement_region(flags, stride, shape, axes)
+            stride = max(stride // 2, 1)
+
+            new_nodes = (
+                region & sampling.lattice_mask(shape, stride, axes) & selected & ~computed
+            )
+
+        # profiles that could not be interpolated are computed directly
+        missing = selected & ~computed & ~np.isfinite(filled).all(axis=-1)
+        if missing.any():
+            result[missing] = self.compute_profiles(
+                sdat.grid_positions_to_profiles(np.flatnonzero(missing)), **kwargs
+            )
+            computed |= missing
 
-                print(f"... [synsat] running {ichunks}/{nchunks} chunk with", isel)
-                self.chunked_run(isel=isel, **kwargs)
+        filled[computed] = result[computed]
 
-        self.synsat.result = np.row_stack(self.synsat.chunked_result)
+        # store results for the selected profiles
+        nchan = attr.nchan_instrument
+        positions = sdat.profile_positions()
+        attr.result = filled.reshape(-1, nchan)[positions]
+        attr.computed_flag = computed.reshape(-1)[positions]
+
+        attr.adaptive_speedup = sdat.total_number_of_profiles / attr.computed_flag.sum()
+        print(
+            f"... [synsat] adaptive sampling: computed {attr.computed_flag.sum()} of "
+            f"{sdat.total_number_of_profiles} profiles, speed-up factor {attr.adaptive_speedup:.1f}"
+        )
+
+        return
 
     def extract_output(self):
         """
@@ -654,18 +1046,27 @@ class SynSat(SynSatBase):
             ],
         )
 
-        # trick: we use input data to start output data
-        indat = attr.data_handler.input_data_as_profile
-        alldat = indat.assign_coords({"channel": channels})
+        # profiles are mapped back onto the grid, unselected profiles are missing
+        sdat = attr.data_handler
+        coords = dict(sdat.profile_coords, channel=channels)
 
         btrefl = xr.DataArray(
-            data=self.synsat.result, coords=[alldat.profile, alldat.channel]
+            data=sdat.profiles_to_grid(self.synsat.result),
+            coords=coords,
+            dims=sdat.profile_dimensions + ["channel"],
         )
-        alldat["btrefl"] = btrefl
 
-        btrefl = alldat["btrefl"].unstack()
+        # quick-look: fill subsampled results on the full grid
+        if sdat.quicklook_stride is not None:
+            btrefl = sampling.upsample_from_strided(
+                btrefl,
+                sdat.input_data,
+                sdat.horizontal_dimensions,
+                sdat.quicklook_stride,
+                method=sdat.quicklook_method,
+            )
 
-        synsat = alldat[[]]
+        synsat = xr.Dataset(coords=btrefl.coords)
         for ichan, chan_name in enumerate(btrefl.channel.data):
 
             # set data
@@ -683,6 +1084,37 @@ class SynSat(SynSatBase):
 
         del synsat.coords["channel"]
 
+        # unstructured grids: lon / lat per cell
+        synsat = synsat.assign_coords(sdat.grid_coordinates())
+
+        # adaptive sampling: flag computed vs interpolated profiles
+        if attr.computed_flag is not None:
+            computed = xr.DataArray(
+                data=sdat.profiles_to_grid(attr.computed_flag.astype(np.float64)),
+                coords=sdat.profile_coords,
+                dims=sdat.profile_dimensions,
+            )
+
+            if sdat.quicklook_stride is not None:
+                computed = sampling.upsample_from_strided(
+                    computed,
+                    sdat.input_data,
+                    sdat.horizontal_dimensions,
+                    sdat.quicklook_stride,
+                )
+                for dim in sdat.horizontal_dimensions:
+                    on_lattice = np.arange(computed.sizes[dim]) % sdat.quicklook_stride == 0
+                    computed = computed.where(xr.DataArray(on_lattice, dims=dim), 0)
+
+            synsat["computed"] = computed
+            synsat["computed"].attrs = {
+                "long_name": "flag for computed (1) or interpolated (0) profiles"
+            }
+
+        # satellite pixel grid: remap with cached weights
+        if attr.satellite_grid is not None:
+            synsat = self.remap_output(synsat)
+
         attr.output = synsat
 
         # try to write global attrs
@@ -690,6 +1122,10 @@ class SynSat(SynSatBase):
             synsat.attrs = output.prepare_global_attrs()
             synsat.attrs["input_filename"] = attr.input_filename
 
+            if sdat.quicklook_stride is not None:
+                synsat.attrs["quicklook_stride"] = sdat.quicklook_stride
+                synsat.attrs["quicklook_speedup"] = sdat.quicklook_speedup
+
         else:  # except:
             print("... [synsat]: WARNING: fail to write global attributes")
 
@@ -697,10 +1133,110 @@ class SynSat(SynSatBase):
 
         return synsat
 
+    def remap_output(self, synsat):
+        """
+        Remaps output fields from the model grid onto the satellite pixel grid.
+
+        Parameters
+        ----------
+        synsat : xarray.Dataset
+            The output fields on the model grid.
+
+        Returns
+        -------
+        synsat : xarray.Dataset
+            The output fields on `satellite_grid`.
+
+        Notes
+        -----
+        The remap weights are taken from `remap_cache` and only computed
+        once per model grid, pixel grid and remap method.
+        """
+
+        attr = self.synsat
+        sdat = attr.data_handler
+        grid = attr.satellite_grid
+
+        lon, lat = xr.broadcast(sdat.input_data["lon"], sdat.input_data["lat"])
+        lon = lon.transpose(*sdat.horizontal_dimensions)
+        lat = lat.transpose(*sdat.horizontal_dimensions)
+
+        weights = attr.remap_cache.get(
+            lon.values.ravel(),
+            lat.values.ravel(),
+            grid["lon"].values.ravel(),
+            grid["lat"].values.ravel(),
+            method=attr.remap_method,
+        )
+
+        # flags keep their values: nearest neighbour
+        flag_weights = weights
+        if "computed" in synsat and attr.remap_method != "nearest":
+            flag_weights = attr.remap_cache.get(
+                lon.values.ravel(),
+                lat.values.ravel(),
+                grid["lon"].values.ravel(),
+                grid["lat"].values.ravel(),
+                method="nearest",
+            )
+
+        print(
+            f"... [synsat] remap output onto {grid['lon'].size} satellite pixels "
+            f"({attr.remap_method})"
+        )
+
+        return remap.remap_dataset(
+            synsat,
+            sdat.horizontal_dimensions,
+            weights,
+            grid,
+            flags=["computed"],
+            flag_weights=flag_weights,
+        )
+
+    def extend_existing_output(self):
+        """
+        Adds the computed channels to the existing output file in place.
+
+        The new variables are aligned to the grid and dimension ordering
+        stored in the existing file given by `synsat_existing_output`.
+
+        Returns
+        -------
+        None
+
+        """
+
+        attr = self.synsat
+
+        if attr.existing_output is None:
+            raise ValueError("No existing output file given (synsat_existing_output)")
+
+        out = self.extract_output()
+
+        with xr.open_dataset(attr.existing_output) as existing:
+            template = existing[[]].load()
+            vname = list(existing.data_vars)[0]
+            dims = [d for d in existing[vname].dims if d in out.dims]
+
+        # reuse the stored grid and dimension ordering
+        out = out.reindex_like(template).transpose(*dims)
+
+        # keep global attributes of the existing file
+        out.attrs = {}
+
+        print(f"... [synsat] add {list(out.data_vars)} to {attr.existing_output}")
+        out.to_netcdf(attr.existing_output, mode="a")
+
+        return
+
     def save(self, output_filename):
         """
         Save the output data to a netcdf file.
 
+        If `output_filename` is the existing output file given by
+        `synsat_existing_output`, the new channels are added in place.
+
         Parameters
         ----------
         output_filename : str
@@ -712,6 +1248,10 @@ class SynSat(SynSatBase):
 
         """
 
+        if output_filename == self.synsat.existing_output:
+            self.extend_existing_output()
+            return
+
         out = self.extract_output()
 
         print(f"... [synsat] write synsat data to {output_filename}")
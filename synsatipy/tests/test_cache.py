@@ -0,0 +1,138 @@
+import types
+
+import numpy as np
+
+from synsatipy.cache import GeometryCache, RemapCache, ResultCache, hash_profiles
+from synsatipy.utils.spacetools import lonlat2azizen
+
+
+def make_profiles(nprofiles=4, nlevels=5, offset=0.0):
+    """
+    Creates a minimal profile-like object for hashing.
+    """
+    profs = types.SimpleNamespace()
+    profs.P = np.ones((nprofiles, nlevels)) * np.linspace(100, 1000, nlevels)
+    profs.T = np.ones((nprofiles, nlevels)) * 250.0 + offset
+    profs.DateTimes = np.array(nprofiles * [[2020, 9, 12, 0, 0, 0]])
+    return profs
+
+
+def test_hash_depends_on_profiles_and_config():
+    """
+    Tests that the cache key changes with profile content and configuration.
+    """
+    key = hash_profiles(make_profiles(), channels=(5, 6))
+
+    assert key == hash_profiles(make_profiles(), channels=(5, 6))
+    assert key != hash_profiles(make_profiles(offset=0.1), channels=(5, 6))
+    assert key != hash_profiles(make_profiles(), channels=(5, 6, 7))
+
+
+def test_result_cache_roundtrip_and_eviction(tmp_path):
+    """
+    Tests storing, retrieving and size-bounded eviction of cache entries.
+    """
+    result = np.arange(12.0).reshape(4, 3)
+    entry_size = 128 + result.nbytes
+
+    c = ResultCache(str(tmp_path), max_size=2 * entry_size)
+
+    assert c.get("aa00") is None
+
+    c.put("aa00", result)
+    np.testing.assert_array_equal(c.get("aa00"), result)
+
+    c.put("bb00", result)
+    c.put("cc00", result)
+
+    # oldest entry has been evicted
+    assert c.get("cc00") is not None
+    assert c.hits == 2
+    assert len(list(tmp_path.rglob("*.npy"))) == 2
+
+
+def test_result_cache_scans_directory_only_when_full(tmp_path, monkeypatch):
+    """
+    Tests that the cache directory is not scanned on every write.
+    """
+    import synsatipy.cache
+
+    walk = synsatipy.cache.os.walk
+    scans = []
+    monkeypatch.setattr(
+        synsatipy.cache.os, "walk", lambda *args: scans.append(args) or walk(*args)
+    )
+
+    result = np.arange(12.0).reshape(4, 3)
+    entry_size = 128 + result.nbytes
+
+    c = ResultCache(str(tmp_path), max_size=3 * entry_size)
+
+    for key in ["aa00", "bb00", "cc00"]:
+        c.put(key, result)
+
+    # scanned once on the first write
+    assert len(scans) == 1
+    assert c.size == 3 * entry_size
+
+    # overwriting an entry does not change the size
+    c.put("cc00", result)
+    assert len(scans) == 1
+
+    c.put("dd00", result)
+    assert len(scans) == 2
+    assert c.size == 3 * entry_size
+    assert len(list(tmp_path.rglob("*.npy"))) == 3
+
+
+def test_geometry_cache_memory_and_disk(tmp_path):
+    """
+    Tests that the geometry is computed once per grid and sub-satellite longitude.
+    """
+    lon, lat = np.meshgrid(np.linspace(-17, 23, 5), np.linspace(-31, 29, 4))
+
+    azi, zen = lonlat2azizen(lon, lat, lon0=9.5)
+
+    c = GeometryCache(str(tmp_path))
+    GeometryCache._memory.clear()
+
+    np.testing.assert_array_equal(c.get(lon, lat, lon0=9.5)[1], zen)
+    assert (c.hits, c.misses) == (0, 1)
+
+    # second lookup from memory, then from disk
+    c.get(lon, lat, lon0=9.5)
+    GeometryCache._memory.clear()
+    np.testing.assert_array_equal(GeometryCache(str(tmp_path)).get(lon, lat, 9.5)[0], azi)
+    assert c.hits == 1
+
+    # another sub-satellite longitude is a new entry
+    c.get(lon, lat, lon0=0.0)
+    assert c.misses == 2
+    assert len(list(tmp_path.glob("geometry_*.npz"))) == 2
+
+
+def test_remap_cache_memory_and_disk(tmp_path):
+    """
+    Tests that remap weights are computed once per model grid, pixel grid and method.
+    """
+    lon, lat = np.meshgrid(np.arange(0.0, 5.0), np.arange(40.0, 44.0))
+    plon, plat = lon[:-1, :-1] + 0.4, lat[:-1, :-1] + 0.3
+
+    c = RemapCache(str(tmp_path))
+    RemapCache._memory.clear()
+
+    w = c.get(lon.ravel(), lat.ravel(), plon.ravel(), plat.ravel())
+    assert w.shape == (plon.size, lon.size)
+    assert (c.hits, c.misses) == (0, 1)
+
+    # second lookup from memory, then from disk
+    c.get(lon.ravel(), lat.ravel(), plon.ravel(), plat.ravel())
+    RemapCache._memory.clear()
+    w_disk = RemapCache(str(tmp_path)).get(lon.ravel(), lat.ravel(), plon.ravel(), plat.ravel())
+    assert c.hits == 1
+    assert (w_disk != w).nnz == 0
+
+    # another method is a new entry
+    c.get(lon.ravel(), lat.ravel(), plon.ravel(), plat.ravel(), method="area")
+    assert c.misses == 2
+    assert len(list(tmp_path.glob("remap_*.npz"))) == 2
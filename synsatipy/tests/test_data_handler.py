@@ -1,5 +1,10 @@
+import types
+
 import pytest
+import numpy as np
+import xarray as xr
 
+import synsatipy.data_handler as data_handler
 from synsatipy.data_handler import DataHandler
 from synsatipy.synsat_example_data import get_example_data
 
@@ -18,3 +23,283 @@ def test_input_of_example_data(example_name):
 
     d = DataHandler()
     d.open_data(filename)
+
+
+def make_chunked_input(ntime=2, nlev=3, nlat=6, nlon=8):
+    """
+    Creates a small dask-backed input dataset stored as (time, lev, lat, lon).
+    """
+    t = np.arange(ntime * nlev * nlat * nlon, dtype=np.float32)
+    t = t.reshape(ntime, nlev, nlat, nlon)
+
+    dset = xr.Dataset(
+        {"t": (("time", "lev", "lat", "lon"), t)},
+        coords={
+            "time": np.arange(ntime),
+            "lat": np.arange(nlat) * 1.0,
+            "lon": np.arange(nlon) * 1.0,
+        },
+    )
+    return dset.chunk({"time": 1, "lat": 3, "lon": 4})
+
+
+def test_profile_chunks_follow_dask_blocks():
+    """
+    Tests that profile chunks consist of whole dask blocks and cover all profiles.
+    """
+    d = DataHandler()
+    d.input_data = make_chunked_input()
+    d.stack_data_as_profile()
+
+    assert d.profile_dimensions == ["time", "lat", "lon"]
+
+    chunks = d.get_profile_chunks(24)
+
+    assert [len(c) for c in chunks] == [24, 24, 24, 24]
+    np.testing.assert_array_equal(
+        np.sort(np.concatenate(chunks)), np.arange(d.total_number_of_profiles)
+    )
+
+    # two neighbouring blocks per chunk: a single time step and a 3 x 8 lat / lon box
+    profs = d.load_profiles(chunks[1])
+
+    assert len(np.unique(profs.time)) == 1
+    assert len(np.unique(profs.lat)) == 3
+    assert len(np.unique(profs.lon)) == 8
+
+
+def test_load_profiles_matches_stacked_input():
+    """
+    Tests that the flat profile index matches xarray stacking of the input.
+    """
+    d = DataHandler()
+    d.input_data = make_chunked_input()
+    d.stack_data_as_profile()
+
+    index = np.array([5, 60, 17, 3])
+    profs = d.load_profiles(index)
+
+    stacked = d.input_data.stack(profile=d.profile_dimensions)
+    expected = stacked["t"].isel(profile=index)
+
+    np.testing.assert_array_equal(
+        profs["t"].transpose("profile", ...), expected.transpose("profile", ...)
+    )
+
+
+def test_profiles_to_grid_with_mask():
+    """
+    Tests that masked profiles are skipped and filled with missing values on the grid.
+    """
+    dset = make_chunked_input()
+    mask = np.zeros((6, 8), dtype=bool)
+    mask[2:4, 1:7] = True
+    dset["mask"] = (("lat", "lon"), mask)
+
+    d = DataHandler()
+    d.input_data = dset
+    d.stack_data_as_profile()
+
+    assert d.total_number_of_profiles == 2 * 12
+    assert d.selected_profiles_index.dtype == np.int32
+
+    values = d.load_profiles(slice(0, None))["t"].isel(lev=0).values
+    gridded = d.profiles_to_grid(values)
+
+    expected = np.where(mask, dset["t"].isel(lev=0).values, np.nan)
+    np.testing.assert_array_equal(gridded, expected)
+
+
+def test_profile_positions_and_inverse():
+    """
+    Tests profile positions for slices and integer arrays, with and without mask.
+    """
+    d = DataHandler()
+    d.input_data = make_chunked_input()
+    d.stack_data_as_profile()
+
+    index = np.array([7, 3])
+    assert d.profile_positions(index) is index
+    np.testing.assert_array_equal(d.profile_positions(slice(90, None, 2)), [90, 92, 94])
+
+    dset = make_chunked_input()
+    mask = np.zeros((6, 8), dtype=bool)
+    mask[2:4, 1:7] = True
+    dset["mask"] = (("lat", "lon"), mask)
+
+    d = DataHandler()
+    d.input_data = dset
+    d.stack_data_as_profile()
+
+    positions = d.profile_positions(slice(20, 24))
+    np.testing.assert_array_equal(positions, [75, 76, 77, 78])
+    np.testing.assert_array_equal(d.grid_positions_to_profiles(positions), [20, 21, 22, 23])
+
+
+def test_profiles_on_unstructured_cells():
+    """
+    Tests profile indexing on a cell dimension with lon / lat per cell.
+    """
+    t = np.arange(2 * 3 * 5, dtype=np.float32).reshape(2, 3, 5)
+    dset = xr.Dataset(
+        {"t": (("time", "lev", "ncells"), t)},
+        coords={
+            "time": np.arange(2),
+            "lon": ("ncells", np.linspace(-10.0, 10.0, 5)),
+            "lat": ("ncells", np.linspace(0.0, 4.0, 5)),
+        },
+    )
+
+    d = DataHandler()
+    d.input_data = dset
+    d.stack_data_as_profile()
+
+    assert d.profile_dimensions == ["time", "ncells"]
+    assert d.horizontal_dimensions == ["ncells"]
+
+    profs = d.load_profiles(np.array([1, 7]))
+
+    np.testing.assert_array_equal(profs["t"].isel(lev=0), [1, 17])
+    np.testing.assert_allclose(profs["lon"], [-5.0, 0.0])
+
+    grid_coords = d.grid_coordinates()
+
+    assert list(grid_coords) == ["lon", "lat"]
+    assert grid_coords["lat"].dims == ("ncells",)
+
+
+def test_open_data_twice_keeps_derived_variables(tmp_path):
+    """
+    Tests that opening data again does not duplicate the derived variables.
+    """
+    from synsatipy.tests.test_input_icon import write_native_icon_files
+
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    icon3d_name = write_native_icon_files(path)
+
+    d = DataHandler(model="icon")
+    d.open_data(icon3d_name)
+    recipes = list(d.derived_variables)
+
+    d.open_data(icon3d_name)
+
+    assert len(recipes) > 0
+    assert d.derived_variables == recipes
+
+
+def make_profile_input(times):
+    """
+    Creates an input dataset with all variables needed for RTTOV profiles.
+    """
+    nlat, nlon = 2, 3
+    shape2d = times.shape + (nlat, nlon)
+    dims2d = ("time",) * len(times.shape) + ("lat", "lon")
+    dims3d = ("time",) * len(times.shape) + ("lev", "lat", "lon")
+    shape3d = times.shape + (2, nlat, nlon)
+
+    def field(value, shape, dims):
+        return (dims, np.full(shape, value, "f4"))
+
+    values3d = {"p": 9e4, "t": 280.0, "q": 1e-3, "clwc": 0.0, "ciwc": 0.0, "cc": 0.0}
+    values2d = {"SKT": 290.0, "SP": 1e5, "T2M": 288.0}
+
+    variables = {v: field(value, shape3d, dims3d) for v, value in values3d.items()}
+    variables.update({v: field(value, shape2d, dims2d) for v, value in values2d.items()})
+
+    return xr.Dataset(
+        variables,
+        coords={"time": times, "lat": [0.0, 1.0], "lon": [0.0, 1.0, 2.0]},
+    )
+
+
+@pytest.fixture
+def fake_profiles(monkeypatch):
+    """
+    Replaces pyrttov.Profiles by a plain namespace, so that profiles are built without RTTOV.
+    """
+    fake = types.SimpleNamespace(
+        Profiles=lambda nprofiles, nlevels: types.SimpleNamespace(
+            Nprofiles=nprofiles, Nlevels=nlevels
+        )
+    )
+    monkeypatch.setattr(data_handler, "pyrttov", fake)
+
+
+@pytest.mark.parametrize("ntime", [0, 2])
+def test_data2profile_datetimes_per_profile(ntime, fake_profiles):
+    """
+    Tests that each profile gets the date of its time step, also for a scalar time.
+    """
+    if ntime == 0:
+        times = np.array(np.datetime64("2020-09-12T06:30"))
+    else:
+        times = np.array(["2020-09-12T06:30", "2020-09-13T18:00"], dtype="M8[ns]")
+
+    d = DataHandler()
+    d.input_data = make_profile_input(times)
+    d.stack_data_as_profile()
+
+    profs = d.data2profile()
+
+    nprofiles = max(ntime, 1) * 6
+    assert profs.DateTimes.shape == (nprofiles, 6)
+    np.testing.assert_array_equal(profs.DateTimes[0], [2020, 9, 12, 6, 30, 0])
+
+    if ntime == 2:
+        np.testing.assert_array_equal(profs.DateTimes[-1], [2020, 9, 13, 18, 0, 0])
+
+
+def test_data2profile_checks_subsatellite_lon(fake_profiles):
+    """
+    Tests that data2profile rejects a lon0 other than the one of the precomputed geometry.
+    """
+    d = DataHandler()
+    d.input_data = make_profile_input(np.array(np.datetime64("2020-09-12T06:30")))
+    d.stack_data_as_profile(lon0=9.5)
+
+    assert d.data2profile(lon0=9.5).Angles.shape == (6, 4)
+
+    with pytest.raises(ValueError, match="lon0"):
+        d.data2profile(lon0=0.0)
+
+
+@pytest.mark.parametrize("model", ["era", "icon"])
+def test_single_precision_input_and_double_precision_profiles(model, tmp_path, fake_profiles):
+    """
+    Tests that input and derived variables stay float32 and RTTOV profiles are float64.
+    """
+    from synsatipy.tests.test_input_era import write_era_files
+    from synsatipy.tests.test_input_icon import write_native_icon_files
+
+    if model == "era":
+        write_era_files(tmp_path, days=(15,))
+        filename = str(tmp_path / "era5-3d-test-2020-09-15.nc")
+    else:
+        path = tmp_path / "ifces2"
+        path.mkdir()
+        filename = write_native_icon_files(path)
+
+    d = DataHandler(model=model)
+    d.open_data(filename)
+    d.stack_data_as_profile()
+
+    for v in d.input_data.data_vars:
+        assert d.input_data[v].dtype == np.float32, v
+
+    # derived variables, e.g. pressure (ERA) or cloud cover in [0, 1] (ICON)
+    profs = d.load_profiles(slice(0, None))
+
+    for v in profs.data_vars:
+        assert profs[v].dtype == np.float32, v
+
+    if model == "icon":
+        assert profs["cc"].dtype == np.float32
+        assert profs["T2M"].dtype == np.float32
+
+        rttov_profiles = d.data2profile()
+
+        for v in ["P", "T", "Q", "Gases", "Skin", "S2m", "Angles", "SurfGeom"]:
+            assert getattr(rttov_profiles, v).dtype == np.float64, v
+    else:
+        assert profs["p"].dtype == np.float32
@@ -0,0 +1,57 @@
+import numpy as np
+import xarray as xr
+
+import synsatipy.derived as derived
+
+
+def make_dataset():
+    """
+    Creates a small float32 dataset with condensate and humidity fields.
+    """
+    rng = np.random.default_rng(0)
+    shape = (2, 3, 4)
+    dims = ("time", "lev", "cell")
+
+    fields = {v: rng.uniform(0, 2e-9, shape).astype(np.float32) for v in ["q", "qc", "qi"]}
+    return xr.Dataset({v: (dims, f) for v, f in fields.items()})
+
+
+def test_evaluate_in_order_and_keep_precision():
+    """
+    Tests that derived variables are evaluated in order and keep float32.
+    """
+    definitions = []
+    derived.add(definitions, "q", "clip_min", source="q", vmin=1e-9)
+    derived.add(definitions, "cc", "condensate_cloud_cover", sources=["q", "qc"], threshold=3e-9)
+    derived.add(definitions, "q_sfc", "lowest_level", source="q", level_dimension="lev")
+
+    dset = make_dataset()
+    result = derived.evaluate(dset, definitions)
+
+    assert float(result["q"].min()) >= np.float32(1e-9)
+    assert result["cc"].dtype == np.float32
+    np.testing.assert_array_equal(result["q_sfc"], result["q"].isel(lev=-1))
+
+    # the input dataset is not modified
+    assert "cc" not in dset
+
+
+def test_evaluate_on_selected_profiles_matches_full_evaluation():
+    """
+    Tests that evaluating on a pointwise selection equals selecting evaluated fields.
+    """
+    definitions = []
+    derived.add(definitions, "cc", "condensate_cloud_cover", sources=["qc", "qi"], threshold=1e-9)
+    derived.add(definitions, "q", "scale", source="q", divisor=100.0)
+
+    dset = make_dataset()
+    points = {
+        "time": xr.DataArray([0, 1, 1], dims="profile"),
+        "cell": xr.DataArray([3, 0, 2], dims="profile"),
+    }
+
+    full = derived.evaluate(dset, definitions).isel(points)
+    selected = derived.evaluate(dset.isel(points), definitions)
+
+    xr.testing.assert_identical(full, selected)
+    assert derived.evaluate(dset, definitions, names=["cc"])["q"].equals(dset["q"])
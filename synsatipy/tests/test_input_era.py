@@ -0,0 +1,282 @@
+import os
+
+import pytest
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from synsatipy.input_era import (
+    era_file_format,
+    era_surface_file,
+    grib_to_era_layout,
+    open_era,
+    open_era2d_cached,
+)
+
+
+def write_era_files(path, days=(15, 16)):
+    """
+    Writes small daily ERA 3d files and the monthly 2d file in ERA naming convention.
+    """
+    lat, lon = np.arange(3.0), np.arange(4.0)
+    coords2d = {"lat": lat, "lon": lon}
+
+    for day in days:
+        time = pd.date_range(f"2020-09-{day}", periods=2, freq="h")
+        era3d = xr.Dataset(
+            {
+                "t": (("time", "lev", "lat", "lon"), np.full((2, 2, 3, 4), day, "f4")),
+                "q": (("time", "lev", "lat", "lon"), np.zeros((2, 2, 3, 4), "f4")),
+                "hyam": ("nhym", np.array([100.0, 0.0])),
+                "hybm": ("nhym", np.array([0.0, 1.0])),
+            },
+            coords=dict(coords2d, time=time),
+        )
+        era3d.to_netcdf(path / f"era5-3d-test-2020-09-{day}.nc")
+
+    time = pd.date_range("2020-09-01", "2020-09-30T23", freq="h")
+    sp = np.ones((len(time), 3, 4), "f4") * np.arange(len(time))[:, None, None]
+    era2d = xr.Dataset({"SP": (("time", "lat", "lon"), sp)}, coords=dict(coords2d, time=time))
+    era2d.to_netcdf(path / "era5-2d-test-2020-09.nc")
+
+
+def test_open_era_concatenates_days_lazily(tmp_path):
+    """
+    Tests that several daily files are opened chunked and matched with the monthly 2d file.
+    """
+    write_era_files(tmp_path)
+
+    era = open_era(str(tmp_path / "era5-3d-test-2020-09-1*.nc"))
+
+    assert era.sizes["time"] == 4
+    assert era["t"].chunks[0] == (1, 1, 1, 1)
+    assert era["SP"].chunks[0] == (1, 1, 1, 1)
+
+    np.testing.assert_array_equal(era["t"].isel(lev=0, lat=0, lon=0), [15, 15, 16, 16])
+    np.testing.assert_array_equal(
+        era["SP"].isel(lat=0, lon=0), [14 * 24, 14 * 24 + 1, 15 * 24, 15 * 24 + 1]
+    )
+    np.testing.assert_allclose(era["p"].isel(time=2, lat=0, lon=0), [100.0, 15 * 24])
+
+
+def test_open_era_reads_required_variables(tmp_path):
+    """
+    Tests that only the variables needed for profiles are read, including pressure if not derived.
+    """
+    write_era_files(tmp_path, days=(15,))
+
+    fname = tmp_path / "era5-3d-test-2020-09-15.nc"
+    with xr.open_dataset(fname) as era3d:
+        era3d = era3d.load()
+
+    era3d["o3"] = xr.zeros_like(era3d["t"])
+    era3d["p"] = xr.full_like(era3d["t"], 5e4)
+    era3d.to_netcdf(fname)
+
+    era = open_era(str(fname))
+
+    assert "o3" not in era
+    np.testing.assert_allclose(era["p"].isel(time=0, lat=0, lon=0), [100.0, 14 * 24])
+
+    era = open_era(str(fname), add_pressure=False)
+
+    assert "o3" not in era
+    np.testing.assert_array_equal(era["p"], 5e4)
+
+    assert "o3" in open_era(str(fname), select_variables=False)
+
+
+def test_open_era_region(tmp_path):
+    """
+    Tests that a region is selected on the 3d and the 2d files.
+    """
+    write_era_files(tmp_path)
+
+    era = open_era(str(tmp_path / "era5-3d-test-2020-09-15.nc"), region=[1, 2, 0, 1])
+
+    assert dict(era["t"].sizes) == {"time": 2, "lev": 2, "lat": 2, "lon": 2}
+    assert era["SP"].sizes["lon"] == 2
+    np.testing.assert_array_equal(era["lon"], [1.0, 2.0])
+
+
+def test_monthly_2d_file_is_opened_once(tmp_path):
+    """
+    Tests that the monthly 2d file is reused for all days until it changes.
+    """
+    write_era_files(tmp_path)
+    open_era2d_cached.cache_clear()
+
+    open_era(str(tmp_path / "era5-3d-test-2020-09-15.nc"))
+    open_era(str(tmp_path / "era5-3d-test-2020-09-16.nc"))
+
+    assert open_era2d_cached.cache_info().misses == 1
+    assert open_era2d_cached.cache_info().hits == 1
+
+    # a modified file is opened again
+    fname = tmp_path / "era5-2d-test-2020-09.nc"
+    os.utime(fname, (0, os.path.getmtime(fname) + 10))
+    open_era(str(tmp_path / "era5-3d-test-2020-09-16.nc"))
+
+    assert open_era2d_cached.cache_info().misses == 2
+
+
+def test_grib_to_era_layout():
+    """
+    Tests mapping of cfgrib model-level fields to the ERA netCDF layout.
+    """
+    time = pd.date_range("2020-09-15", periods=2, freq="h")
+    coords = {
+        "time": time,
+        "hybrid": [136, 137],
+        "latitude": np.arange(3.0),
+        "longitude": np.arange(4.0),
+        "valid_time": ("time", time),
+    }
+    dims = ("time", "hybrid", "latitude", "longitude")
+
+    # A and B on the half levels 0, ..., 137 of the full model
+    a_half, b_half = np.zeros(138), np.zeros(138)
+    a_half[135:] = [20.0, 10.0, 0.0]
+    b_half[135:] = [0.9, 0.95, 1.0]
+
+    t = xr.DataArray(np.ones((2, 2, 3, 4), "f4"), coords, dims)
+    t.attrs["GRIB_pv"] = list(np.concatenate([a_half, b_half]))
+
+    era = grib_to_era_layout(xr.Dataset({"t": t}))
+
+    assert era["t"].dims == ("time", "lev", "lat", "lon")
+    assert "GRIB_pv" not in era["t"].attrs
+    np.testing.assert_allclose(era["hyam"], [15.0, 5.0])
+    np.testing.assert_allclose(era["hybm"], [0.925, 0.975])
+
+    # lnsp is only stored on the first model level
+    lnsp = np.log(1e5) * t.isel(hybrid=0).drop_vars("hybrid")
+    era = grib_to_era_layout(xr.Dataset({"lnsp": lnsp.assign_coords(hybrid=1)}))
+
+    assert era["SP"].dims == ("time", "lat", "lon")
+    np.testing.assert_allclose(era["SP"], 1e5, rtol=1e-6)
+
+
+def test_era_surface_file(tmp_path):
+    """
+    Tests that GRIB input without 2d file reads the surface fields from the 3d file.
+    """
+    era3d_name = str(tmp_path / "era5-3d-test-2020-09-15.grib")
+    assert era_surface_file(era3d_name) == era3d_name
+    assert era_surface_file(str(tmp_path / "ifs_ml.grib")) == str(tmp_path / "ifs_ml.grib")
+
+    (tmp_path / "era5-2d-test-2020-09.grib").touch()
+    assert era_surface_file(era3d_name) == str(tmp_path / "era5-2d-test-2020-09.grib")
+
+    assert era_file_format(era3d_name) == "grib"
+    assert era_file_format(str(tmp_path / "era5-3d-test-2020-09-15.nc")) == "netcdf"
+
+
+def write_grib(fname, fields, times, lat, lon, pv=None, edition=1):
+    """
+    Writes GRIB messages of (shortName, hybrid level or None, value) fields with eccodes.
+    """
+    eccodes = pytest.importorskip("eccodes")
+
+    with open(fname, "wb") as f:
+        for time in pd.DatetimeIndex(times):
+            for short_name, level, value in fields:
+                h = eccodes.codes_grib_new_from_samples(f"regular_ll_sfc_grib{edition}")
+                eccodes.codes_set_string(h, "shortName", short_name)
+                eccodes.codes_set(h, "dataDate", int(time.strftime("%Y%m%d")))
+                eccodes.codes_set(h, "dataTime", int(time.strftime("%H%M")))
+
+                if level is not None:
+                    eccodes.codes_set_string(h, "typeOfLevel", "hybrid")
+                    eccodes.codes_set(h, "level", level)
+                    eccodes.codes_set(h, "PVPresent", 1)
+                    eccodes.codes_set_array(h, "pv", pv)
+
+                eccodes.codes_set(h, "Ni", len(lon))
+                eccodes.codes_set(h, "Nj", len(lat))
+                eccodes.codes_set(h, "jScansPositively", 1)
+                eccodes.codes_set(h, "latitudeOfFirstGridPointInDegrees", lat[0])
+                eccodes.codes_set(h, "latitudeOfLastGridPointInDegrees", lat[-1])
+                eccodes.codes_set(h, "longitudeOfFirstGridPointInDegrees", lon[0])
+                eccodes.codes_set(h, "longitudeOfLastGridPointInDegrees", lon[-1])
+                eccodes.codes_set(h, "iDirectionIncrementInDegrees", lon[1] - lon[0])
+                eccodes.codes_set(h, "jDirectionIncrementInDegrees", lat[1] - lat[0])
+                eccodes.codes_set_string(h, "packingType", "grid_ieee")
+                eccodes.codes_set_values(h, np.full(len(lat) * len(lon), float(value)))
+
+                eccodes.codes_write(h, f)
+                eccodes.codes_release(h)
+
+
+def write_grib_model_levels(fname, surface_fields=()):
+    """
+    Writes a GRIB1 model-level file (2 levels, lnsp on level 1) with optional surface messages.
+    """
+    lat, lon = [0.0, 1.0, 2.0], [0.0, 1.0, 2.0, 3.0]
+    times = pd.date_range("2020-09-15", periods=2, freq="h")
+
+    pv = np.array([0.0, 200.0, 0.0] + [0.0, 0.0, 1.0])
+    fields = [("t", k, 280 + k) for k in [1, 2]]
+    fields += [(v, k, 0.0) for k in [1, 2] for v in ["q", "clwc", "ciwc", "cswc", "cc"]]
+    fields += [("lnsp", 1, np.log(1e5))]
+
+    write_grib(fname, fields + list(surface_fields), times, lat, lon, pv=pv)
+
+    return lat, lon, times
+
+
+def test_open_era_grib_without_surface_messages(tmp_path):
+    """
+    Tests that a model-level GRIB file without surface fields and 2d file fails clearly.
+    """
+    pytest.importorskip("cfgrib")
+
+    fname = str(tmp_path / "ifs_ml.grib")
+    write_grib_model_levels(fname)
+
+    with pytest.raises(ValueError, match="SKT"):
+        open_era(fname)
+
+
+def test_open_era_grib_surface_from_same_file(tmp_path):
+    """
+    Tests GRIB model levels with surface messages in the same file and SP from lnsp.
+    """
+    pytest.importorskip("cfgrib")
+
+    fname = str(tmp_path / "ifs_ml.grib")
+    write_grib_model_levels(fname, [("skt", None, 290.0), ("2t", None, 288.0)])
+
+    era = open_era(fname, grib_index_dir=str(tmp_path / "index")).compute()
+
+    assert era["t"].dims == ("time", "lev", "lat", "lon")
+    np.testing.assert_allclose(era["t"].isel(time=1, lat=0, lon=0), [281, 282])
+    np.testing.assert_allclose(era["T2M"], 288.0)
+    np.testing.assert_allclose(era["SP"], 1e5, rtol=1e-6)
+    np.testing.assert_allclose(era["hyam"], [100.0, 100.0])
+
+
+def test_open_era_grib2_surface_file(tmp_path):
+    """
+    Tests that 2t on heightAboveGround is read from a GRIB2 2d file.
+    """
+    pytest.importorskip("cfgrib")
+
+    fname = str(tmp_path / "era5-3d-test-2020-09-15.grib")
+    lat, lon, times = write_grib_model_levels(fname)
+
+    write_grib(
+        str(tmp_path / "era5-2d-test-2020-09.grib"),
+        [("skt", None, 290.0), ("2t", None, 288.0), ("sp", None, 9e4)],
+        times,
+        lat,
+        lon,
+        edition=2,
+    )
+
+    era = open_era(fname).compute()
+
+    np.testing.assert_allclose(era["T2M"], 288.0)
+    np.testing.assert_allclose(era["SKT"], 290.0)
+    np.testing.assert_allclose(era["SP"], 9e4)
+    assert era["T2M"].dims == ("time", "lat", "lon")
@@ -0,0 +1,316 @@
+import os
+import json
+import threading
+import concurrent.futures
+
+import pytest
+import numpy as np
+import xarray as xr
+
+from synsatipy.input_icon import (
+    hdf5_file_locking,
+    icon_cell_coordinates,
+    icon_companion_files,
+    icon_file_format,
+    icon_file_list,
+    icon_name_analyzer,
+    icon_name_creator,
+    icon_variable_mapping,
+    open_icon,
+    open_icon_file,
+    read_georef,
+    read_georef_cached,
+)
+
+
+def test_icon_file_list(tmp_path):
+    """
+    Tests expansion of filenames, glob patterns and lists of ICON files.
+    """
+    names = [
+        tmp_path / f"3d_full_base_DOM01_ML_20200912T0{h}0000Z.nc" for h in (2, 0, 1)
+    ]
+    for name in names:
+        name.touch()
+
+    pattern = str(tmp_path / "3d_full_base_DOM01_ML_*.nc")
+
+    assert icon_file_list(pattern) == sorted(str(n) for n in names)
+    assert icon_file_list(str(names[0])) == [str(names[0])]
+    assert icon_file_list(names[:2]) == names[:2]
+
+    with pytest.raises(FileNotFoundError):
+        icon_file_list(str(tmp_path / "missing_*.nc"))
+
+
+def test_icon_companion_files():
+    """
+    Tests the names of the hydrometeor and surface files of an ICON base file.
+    """
+    base = "/data/ifces2/POSTPROC/3d_full_base_DOM01_ML_20200912T000000Z_regrid7km.nc"
+
+    parts = icon_companion_files(base)
+
+    assert parts["hydrometeors"] == {
+        "full_qmix": base.replace("full_base", "full_qmix")
+    }
+    assert parts["surface"] == base.replace("3d_full_base", "2d_surface")
+
+
+def test_open_icon_file(tmp_path, monkeypatch, capsys):
+    """
+    Tests opening a file without HDF5 file locking and reporting the latency.
+    """
+    fname = tmp_path / "test.nc"
+    xr.Dataset({"t": ("x", np.arange(3.0))}).to_netcdf(fname)
+
+    monkeypatch.delenv("HDF5_USE_FILE_LOCKING", raising=False)
+
+    dset = open_icon_file(
+        str(fname), engine="netcdf4", chunk_cache_size=2**22, report_timing=True
+    )
+
+    np.testing.assert_array_equal(dset.t, np.arange(3.0))
+    assert "... [synsat] opened test.nc in" in capsys.readouterr().out
+
+    # the locking setting only applies while the file is opened
+    assert "HDF5_USE_FILE_LOCKING" not in os.environ
+
+    monkeypatch.setenv("HDF5_USE_FILE_LOCKING", "TRUE")
+    open_icon_file(str(fname), engine="netcdf4").close()
+
+    assert os.environ["HDF5_USE_FILE_LOCKING"] == "TRUE"
+    assert capsys.readouterr().out == ""
+
+
+def test_hdf5_file_locking_does_not_serialize_opens(monkeypatch):
+    """
+    Tests that concurrent opens share the HDF5 locking setting without waiting for each other.
+    """
+    monkeypatch.delenv("HDF5_USE_FILE_LOCKING", raising=False)
+
+    # both threads must be inside the context at the same time
+    barrier = threading.Barrier(2, timeout=5)
+
+    def open_file(_):
+        with hdf5_file_locking(False):
+            barrier.wait()
+            return os.environ["HDF5_USE_FILE_LOCKING"]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(open_file, range(2))) == ["FALSE", "FALSE"]
+
+    assert "HDF5_USE_FILE_LOCKING" not in os.environ
+
+    with hdf5_file_locking(False):
+        with pytest.raises(ValueError):
+            with hdf5_file_locking(True):
+                pass
+
+    assert "HDF5_USE_FILE_LOCKING" not in os.environ
+
+
+@pytest.mark.parametrize("ext", [".nc", ".zarr", ".nc.json", ".json", ".parq"])
+def test_icon_name_extensions(ext):
+    """
+    Tests that companion files keep the extension of zarr stores and references.
+    """
+    base = f"/data/ifces2/POSTPROC/3d_full_base_DOM01_ML_20200912T000000Z_regrid7km{ext}"
+
+    props = icon_name_analyzer(base)
+
+    assert props["extension"] == ext
+    assert props["postproc_suffix"] == "regrid7km"
+    assert icon_name_creator(props) == base
+    assert icon_companion_files(base)["surface"].endswith(f"regrid7km{ext}")
+
+
+def test_icon_file_format():
+    """
+    Tests the detection of netCDF, zarr and kerchunk reference inputs.
+    """
+    assert icon_file_format("/data/3d_full_base.nc") == "netcdf"
+    assert icon_file_format("/data/3d_full_base.zarr/") == "zarr"
+    assert icon_file_format("/data/3d_full_base.nc.json") == "reference"
+    assert icon_file_format("/data/3d_full_base.parq") == "reference"
+
+
+def test_open_icon_file_zarr(tmp_path):
+    """
+    Tests opening a zarr store.
+    """
+    pytest.importorskip("zarr")
+
+    fname = str(tmp_path / "test.zarr")
+    xr.Dataset({"t": ("x", np.arange(3.0))}).to_zarr(fname)
+
+    dset = open_icon_file(fname, engine="netcdf4", report_timing=False)
+
+    np.testing.assert_array_equal(dset.t, np.arange(3.0))
+
+
+def write_native_icon_files(path, ncells=6, hour=0):
+    """
+    Writes small ifces2 base, hydrometeor and surface files on a native ICON grid.
+    """
+    timestamp = f"20200912T{hour:02d}0000Z"
+    clon = np.deg2rad(np.linspace(-10.0, 10.0, ncells))
+    clat = np.deg2rad(np.linspace(0.0, 5.0, ncells))
+    coords = {
+        "time": [20200912.0 + hour / 24.0],
+        "clon": ("ncells", clon, {"units": "radian"}),
+        "clat": ("ncells", clat, {"units": "radian"}),
+    }
+
+    def field(value, nlev=3):
+        return (("time", "height", "ncells"), np.full((1, nlev, ncells), value, "f4"))
+
+    stacks = {
+        "3d_full_base": {"pres": field(9e4), "temp": field(280.0 + hour), "qv": field(1e-3)},
+        "3d_full_qmix": {v: field(0.0) for v in ["qc", "qi", "qs", "clc"]},
+        "2d_surface": {v: field(290.0, 1) for v in ["t_s", "t_2m", "pres_sfc"]},
+    }
+
+    for stack, variables in stacks.items():
+        dset = xr.Dataset(variables, coords=coords)
+        dset.to_netcdf(path / f"{stack}_DOM01_ML_{timestamp}.nc")
+
+    return str(path / f"3d_full_base_DOM01_ML_{timestamp}.nc")
+
+
+def test_open_icon_native_grid(tmp_path):
+    """
+    Tests that native ICON data keep the cell dimension with lon / lat per cell.
+    """
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    icon3d_name = write_native_icon_files(path)
+
+    assert icon_companion_files(icon3d_name)["surface"] == str(
+        path / "2d_surface_DOM01_ML_20200912T000000Z.nc"
+    )
+
+    icon = open_icon(icon3d_name, region=[-5, 5, 0, 5], report_timing=False)
+
+    assert icon["t"].dims == ("time", "lev", "ncells")
+    assert icon["lon"].dims == ("ncells",)
+    np.testing.assert_allclose(icon["lon"], [-2.0, 2.0])
+    np.testing.assert_allclose(icon["lat"], [2.0, 3.0])
+    assert "clon" not in icon.variables
+
+
+def test_open_icon_reads_required_variables(tmp_path):
+    """
+    Tests that only the variables needed for profiles are read and missing ones are reported.
+    """
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    icon3d_name = write_native_icon_files(path)
+
+    with xr.open_dataset(icon3d_name) as base:
+        base = base.load()
+    base["w"] = base["temp"]
+    base.to_netcdf(icon3d_name)
+
+    icon = open_icon(icon3d_name, name_remapping=False)
+    assert "w" not in icon and "temp" in icon
+
+    icon = open_icon(icon3d_name, name_remapping=False, select_variables=False)
+    assert "w" in icon
+
+    # missing fields that are not derived are reported
+    with pytest.raises(KeyError, match="temp"):
+        icon_variable_mapping(icon.drop_vars("temp"))
+
+
+def test_open_icon_native_mask(tmp_path):
+    """
+    Tests that a mask on the cell dimension of the grid file is aligned with the data.
+    """
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    icon3d_name = write_native_icon_files(path)
+
+    maskfile = str(tmp_path / "mask.nc")
+    xr.Dataset({"mask": ("cell", np.arange(6.0))}).to_netcdf(maskfile)
+
+    icon = open_icon(icon3d_name, maskfile=maskfile, region=[-5, 5, 0, 5])
+
+    assert icon["mask"].dims == ("ncells",)
+    assert icon.sizes["ncells"] == 2
+    np.testing.assert_array_equal(icon["mask"], [2.0, 3.0])
+
+
+def test_open_icon_timeseries(tmp_path):
+    """
+    Tests that several time steps are opened concurrently and concatenated along time.
+    """
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    names = [write_native_icon_files(path, hour=hour) for hour in (6, 0)]
+
+    derived_variables = []
+    icon = open_icon(
+        str(path / "3d_full_base_DOM01_ML_*.nc"), derived_variables=derived_variables
+    )
+
+    assert icon["t"].dims == ("time", "lev", "ncells")
+    assert icon.sizes["time"] == 2
+    assert icon["time"].to_index().is_monotonic_increasing
+    np.testing.assert_array_equal(icon["t"].isel(lev=0, ncells=0), [280.0, 286.0])
+    assert icon["SKT"].sizes["time"] == 2
+
+    # recipes of derived variables are collected once, not per time step
+    single = []
+    open_icon(names[0], derived_variables=single)
+    assert len(derived_variables) == len(single) > 0
+
+
+def test_read_georef_renames_cell_dimension(tmp_path):
+    """
+    Tests that georef cell coordinates are read once and put on the data's cell dimension.
+    """
+    fname = tmp_path / "icon_grid.nc"
+    clon = np.deg2rad([0.0, 90.0])
+    georef = xr.Dataset({"clon": ("cell", clon), "clat": ("cell", clon / 2)})
+    georef.to_netcdf(fname)
+
+    read_georef_cached.cache_clear()
+    read_georef(str(fname), report_timing=False)
+    georef = read_georef(str(fname), report_timing=False)
+
+    assert read_georef_cached.cache_info().hits == 1
+
+    cells = icon_cell_coordinates(georef, "ncells")
+
+    assert cells["clon"].dims == ("ncells",)
+    np.testing.assert_allclose(cells["clon"], [0.0, 90.0])
+    np.testing.assert_allclose(cells["clat"], [0.0, 45.0])
+
+
+def test_open_icon_kerchunk_references(tmp_path):
+    """
+    Tests opening native ICON data through kerchunk JSON references.
+    """
+    pytest.importorskip("zarr")
+    kerchunk_hdf = pytest.importorskip("kerchunk.hdf")
+
+    path = tmp_path / "ifces2"
+    path.mkdir()
+    icon3d_name = write_native_icon_files(path)
+
+    # one reference file next to each netCDF file
+    for stack in ["3d_full_base", "3d_full_qmix", "2d_surface"]:
+        fname = str(path / f"{stack}_DOM01_ML_20200912T000000Z.nc")
+        refs = kerchunk_hdf.SingleHdf5ToZarr(fname, inline_threshold=0).translate()
+
+        with open(f"{fname}.json", "w") as f:
+            json.dump(refs, f)
+
+    icon = open_icon(f"{icon3d_name}.json", region=[-5, 5, 0, 5])
+    expected = open_icon(icon3d_name, region=[-5, 5, 0, 5])
+
+    assert icon["t"].dims == ("time", "lev", "ncells")
+    assert {"clwc", "SKT", "T2M"} <= set(icon.data_vars)
+    np.testing.assert_allclose(icon["lon"], [-2.0, 2.0])
+    xr.testing.assert_allclose(icon.load(), expected.load())
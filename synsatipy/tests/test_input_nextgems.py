@@ -0,0 +1,219 @@
+import types
+
+import pytest
+import numpy as np
+import xarray as xr
+
+healpy = pytest.importorskip("healpy")
+pytest.importorskip("easygems")
+
+from easygems.healpix import attach_coords
+
+import synsatipy.input_nextgems as input_nextgems
+from synsatipy.input_nextgems import (
+    get_index_for_regional_extend,
+    get_index_for_zenith_mask,
+    index_to_ranges,
+    ranges_to_index,
+    select_cell_ranges,
+    select_time,
+)
+from synsatipy.utils.spacetools import lonlat2azizen
+
+
+def make_healpix_dataset(nside=32):
+    """
+    Creates a global dataset on a nested HEALPix grid.
+    """
+    dset = xr.Dataset({"ts": ("cell", np.zeros(healpy.nside2npix(nside)))})
+    dset["crs"] = xr.DataArray(
+        attrs={
+            "grid_mapping_name": "healpix",
+            "healpix_nside": nside,
+            "healpix_order": "nest",
+        }
+    )
+    return attach_coords(dset)
+
+
+def test_cell_ranges_roundtrip():
+    """
+    Tests the conversion between a sorted cell index and contiguous ranges.
+    """
+    index = np.array([2, 3, 4, 8, 10, 11])
+
+    ranges = index_to_ranges(index)
+
+    assert ranges == ((2, 5), (8, 9), (10, 12))
+    np.testing.assert_array_equal(ranges_to_index(ranges), index)
+
+
+@pytest.mark.parametrize("lon0, max_zenith", [(0.0, 80.0), (-75.2, 60.0)])
+def test_zenith_index_matches_mask(lon0, max_zenith):
+    """
+    Tests that the HEALPix disc query gives the cells of the zenith mask.
+    """
+    dset = make_healpix_dataset()
+
+    azi, zen = lonlat2azizen(dset["lon"].values, dset["lat"].values, lon0=lon0)
+
+    index = get_index_for_zenith_mask(dset, max_zenith=max_zenith, lon0=lon0)
+
+    np.testing.assert_array_equal(index, np.where(zen <= max_zenith)[0])
+
+
+@pytest.mark.parametrize(
+    "extend", [[-20, 10, 30, 60], [100, 355, -80, 85], [170, -170, -10, 10]]
+)
+def test_regional_index_matches_mask(extend):
+    """
+    Tests that the HEALPix polygon query gives the cells of the regional mask.
+    """
+    dset = make_healpix_dataset()
+
+    # cell longitudes are in 0 .. 360, the extend is compared modulo 360
+    lon, lat = dset["lon"], dset["lat"]
+    lon_east = np.mod(lon - extend[0], 360)
+    mask = (lon_east > 0) & (lon_east < np.mod(extend[1] - extend[0], 360))
+    mask &= (lat > extend[2]) & (lat < extend[3])
+
+    index = get_index_for_regional_extend(dset, extend)
+
+    np.testing.assert_array_equal(index, np.where(mask)[0])
+
+
+def test_select_cell_ranges_per_dask_block():
+    """
+    Tests that cell ranges are selected block by block without a fancy index.
+    """
+    dset = make_healpix_dataset(nside=8)
+    dset["ts"] = dset["ts"] + np.arange(dset.sizes["cell"])
+    dset = dset.chunk({"cell": 100})
+
+    ranges = ((5, 20), (95, 130), (600, 601))
+    index = ranges_to_index(ranges)
+
+    dset_reg = select_cell_ranges(dset, ranges)
+
+    # one output block per touched input block
+    assert dset_reg["ts"].chunks[0] == (20, 30, 1)
+    np.testing.assert_array_equal(dset_reg["ts"], index)
+    np.testing.assert_array_equal(dset_reg["lon"], dset["lon"].values[index])
+    np.testing.assert_array_equal(dset_reg["cell"], dset["cell"].values[index])
+
+
+def test_select_time():
+    """
+    Tests selection of a single time, a list of times and a time range.
+    """
+    time = np.arange("2020-01-20T00", "2020-01-20T06", dtype="datetime64[h]")
+    time = time.astype("datetime64[ns]")
+    dset = xr.Dataset({"ts": ("time", np.arange(6.0))}, coords={"time": time})
+
+    assert select_time(dset, "2020-01-20T02").sizes["time"] == 1
+    assert select_time(dset, ["2020-01-20T02", "2020-01-20T04"]).sizes["time"] == 2
+    assert select_time(dset, slice("2020-01-20T01", "2020-01-20T03")).sizes["time"] == 3
+    assert select_time(dset) is dset
+
+
+def test_catalog_and_dataset_are_opened_once(monkeypatch):
+    """
+    Tests that repeated opening reuses the cached catalog and dataset.
+    """
+    calls = []
+
+    def fake_open_catalog(cat_path):
+        calls.append(cat_path)
+
+        def entry(zoom, time):
+            dset = xr.Dataset({"ts": ("cell", np.zeros(healpy.nside2npix(2**zoom)))})
+            return types.SimpleNamespace(to_dask=lambda: dset)
+
+        return types.SimpleNamespace(ICON={"ngc4008a": entry})
+
+    monkeypatch.setattr(input_nextgems.intake, "open_catalog", fake_open_catalog)
+    input_nextgems.open_catalog.cache_clear()
+    input_nextgems.open_catalog_dataset.cache_clear()
+
+    d1 = input_nextgems.open_ngdataset("fake.yaml", zoom=2)
+    d1["new"] = d1["ts"] + 1
+    d2 = input_nextgems.open_ngdataset("fake.yaml", zoom=2)
+
+    assert calls == ["fake.yaml"]
+    assert "new" not in d2
+    assert input_nextgems.open_catalog_dataset.cache_info().hits == 1
+
+    input_nextgems.open_catalog.cache_clear()
+    input_nextgems.open_catalog_dataset.cache_clear()
+
+
+def test_open_nextgems_reads_required_variables(monkeypatch):
+    """
+    Tests that only the variables needed for profiles are read and derived.
+    """
+    ncell = healpy.nside2npix(2)
+    names = ["pfull", "ta", "hus", "clw", "cli", "qs", "ts", "ua"]
+    dset = xr.Dataset(
+        {v: (("time", "level_full", "cell"), np.ones((1, 3, ncell))) for v in names}
+    )
+    dset["ts"] = dset["ts"].isel(level_full=0)
+
+    def fake_open_catalog(cat_path):
+        entry = lambda zoom, time: types.SimpleNamespace(to_dask=lambda: dset)
+        return types.SimpleNamespace(ICON={"ngc4008a": entry})
+
+    monkeypatch.setattr(input_nextgems.intake, "open_catalog", fake_open_catalog)
+    input_nextgems.open_catalog.cache_clear()
+    input_nextgems.open_catalog_dataset.cache_clear()
+
+    raw = input_nextgems.open_nextgems("fake.yaml", zoom=1, name_remapping=False)
+    assert set(raw.data_vars) == set(names[:-1]) | {"t_2m", "pres_sfc", "clc"}
+
+    derived_variables = []
+    era = input_nextgems.open_nextgems(
+        "fake.yaml", zoom=1, derived_variables=derived_variables
+    )
+    assert set(era.data_vars) == {"p", "t", "q", "clwc", "ciwc", "cswc", "SKT"}
+    assert [d[0] for d in derived_variables] == ["T2M", "SP", "cc"]
+
+    # missing fields that are not derived are reported
+    with pytest.raises(KeyError, match="ta"):
+        input_nextgems.nextgems_variable_mapping(dset.drop_vars("ta"))
+
+    input_nextgems.open_catalog.cache_clear()
+    input_nextgems.open_catalog_dataset.cache_clear()
+
+
+def test_derived_variables_keep_single_precision():
+    """
+    Tests that the derived nextGEMS variables are float32 for float32 input.
+    """
+    names = ["pfull", "ta", "clw", "cli", "qs"]
+    dset = xr.Dataset(
+        {v: (("time", "level_full", "cell"), np.ones((1, 3, 4), "f4")) for v in names}
+    )
+
+    dset = input_nextgems.derived.evaluate(dset, input_nextgems.define_derived_variables())
+
+    for v in ["t_2m", "pres_sfc", "clc"]:
+        assert dset[v].dtype == np.float32, v
+
+
+@pytest.mark.parametrize("extend", [(-180.0, 180.0, 89.5, 90.0), (0.0, 90.0, -90.0, -89.5)])
+def test_regional_ranges_include_polar_cap(extend):
+    """
+    Tests that regions reaching a pole include the cells closest to the pole.
+    """
+    nside = 2**12
+    index = ranges_to_index(input_nextgems.healpix_extend_ranges(nside, True, extend))
+
+    pole = healpy.ang2vec(0.0, np.sign(extend[2] + extend[3]) * 90.0, lonlat=True)
+    cap = healpy.query_disc(nside, pole, np.deg2rad(1.0), nest=True)
+
+    lon, lat = healpy.pix2ang(nside, cap, nest=True, lonlat=True)
+    lon_east = np.mod(lon - extend[0], 360)
+    mask = (lon_east > 0) & (lon_east < extend[1] - extend[0])
+    mask &= (lat > extend[2]) & (lat < extend[3])
+
+    assert np.abs(lat[mask]).max() > 89.95
+    np.testing.assert_array_equal(np.intersect1d(index, cap), np.sort(cap[mask]))
@@ -0,0 +1,129 @@
+import numpy as np
+import xarray as xr
+
+from synsatipy.remap import (
+    GEOSTATIONARY_GRIDS,
+    apply_weights,
+    geostationary_grid,
+    remap_dataset,
+    remap_weights,
+)
+
+
+def test_geostationary_grid_region():
+    """
+    Tests the full disk extent and the cropping of the fixed grid to a region.
+    """
+    full = geostationary_grid("SEVIRI")
+    assert full.sizes == {"y": 3712, "x": 3712}
+
+    # pixel centers of the SEVIRI fixed grid (COFF = LOFF = 1856)
+    step = GEOSTATIONARY_GRIDS["SEVIRI"]["step"]
+    np.testing.assert_allclose(full.x[[0, -1]] / step, [-1856, 1855])
+    np.testing.assert_allclose(full.y[[0, -1]] / step, [-1855, 1856])
+
+    grid = geostationary_grid("seviri", lon0=9.5, region=[0, 20, 35, 45])
+
+    assert grid.sizes["x"] < 3712 and grid.sizes["y"] < 3712
+    assert float(grid.lon.min()) < 0 and float(grid.lon.max()) > 20
+    assert float(grid.lat.min()) < 35 and float(grid.lat.max()) > 45
+
+    # ABI scan angles, sweep along x
+    abi = geostationary_grid("ABI", lon0=-75.2, region=[-80, -70, -5, 5])
+    np.testing.assert_allclose(np.diff(abi.x), 56e-6)
+
+
+def test_remap_weights_nearest():
+    """
+    Tests that pixels take the nearest model column and stay empty outside the domain.
+    """
+    lon, lat = np.meshgrid(np.arange(0.0, 5.0), np.arange(40.0, 44.0))
+    field = lon + 10 * lat
+
+    plon = np.array([0.2, 2.9, 3.6, 12.0, np.nan])
+    plat = np.array([40.1, 41.8, 43.3, 41.0, np.nan])
+
+    w = remap_weights(lon.ravel(), lat.ravel(), plon, plat)
+    out = apply_weights(w, field.ravel())
+
+    np.testing.assert_allclose(out[:3], [400, 423, 434])
+    assert np.isnan(out[3:]).all()
+
+
+def test_remap_weights_area_average():
+    """
+    Tests that model columns finer than the pixels are averaged.
+    """
+    lon, lat = np.meshgrid(np.arange(0.05, 4.0, 0.1), np.array([0.0]))
+    plon, plat = np.array([1.0, 3.0]), np.array([0.0, 0.0])
+
+    w_area = remap_weights(lon.ravel(), lat.ravel(), plon, plat, method="area")
+    w_near = remap_weights(lon.ravel(), lat.ravel(), plon, plat, method="nearest")
+
+    np.testing.assert_allclose(w_area.sum(axis=1), 1)
+    assert w_area.getrow(0).nnz == 20
+    assert w_near.getrow(0).nnz == 1
+
+    # missing values are left out of the average
+    values = lon.ravel().copy()
+    values[:10] = np.nan
+    out = apply_weights(w_area, values)
+
+    np.testing.assert_allclose(out, [np.mean(lon.ravel()[10:20]), np.mean(lon.ravel()[20:])])
+
+
+def test_remap_dataset():
+    """
+    Tests remapping of all fields per time step onto a 2d pixel grid.
+    """
+    lon, lat = np.arange(0.0, 5.0), np.arange(40.0, 44.0)
+    bt = np.arange(2 * 4 * 5, dtype=float).reshape(2, 4, 5)
+    dset = xr.Dataset(
+        {"bt108": (("time", "lat", "lon"), bt, {"units": "K"}), "bt062": (("time", "lat", "lon"), -bt)},
+        coords={"time": [0, 1], "lat": lat, "lon": lon},
+    )
+
+    grid = xr.Dataset(
+        coords={
+            "lon": (("y", "x"), [[0.1, 3.9], [1.2, 2.1]]),
+            "lat": (("y", "x"), [[40.1, 43.1], [41.2, 42.1]]),
+        }
+    )
+
+    # model columns in the order of the horizontal dimensions
+    glon, glat = np.meshgrid(lon, lat)
+    w = remap_weights(glon.ravel(), glat.ravel(), grid.lon.values.ravel(), grid.lat.values.ravel())
+
+    out = remap_dataset(dset, ["lat", "lon"], w, grid)
+
+    assert out.bt108.dims == ("time", "y", "x")
+    assert out.bt108.attrs == {"units": "K"}
+    np.testing.assert_array_equal(out.bt108.isel(time=1), [[20, 39], [26, 32]])
+    np.testing.assert_array_equal(out.bt062, -out.bt108)
+
+
+def test_remap_dataset_flags_and_dtype():
+    """
+    Tests that flags keep their values under area remapping and channels their data type.
+    """
+    lon, lat = np.arange(0.05, 4.0, 0.1), np.array([0.0])
+    bt = np.linspace(200, 300, lon.size, dtype="f4").reshape(1, -1)
+    computed = (np.arange(lon.size) % 3 == 0).astype(float).reshape(1, -1)
+    dset = xr.Dataset(
+        {"bt108": (("lat", "lon"), bt), "computed": (("lat", "lon"), computed)},
+        coords={"lat": lat, "lon": lon},
+    )
+
+    grid = xr.Dataset(coords={"lon": ("x", [1.0, 3.0]), "lat": ("x", [0.0, 0.0])})
+
+    glon, glat = np.meshgrid(lon, lat)
+    args = (glon.ravel(), glat.ravel(), grid.lon.values, grid.lat.values)
+    w_area = remap_weights(*args, method="area")
+    w_near = remap_weights(*args, method="nearest")
+
+    out = remap_dataset(dset, ["lat", "lon"], w_area, grid, flags=["computed"], flag_weights=w_near)
+
+    assert out.bt108.dtype == np.float32
+    np.testing.assert_allclose(out.bt108, [bt[0, :20].mean(), bt[0, 20:].mean()], rtol=1e-6)
+    assert set(np.unique(out.computed)) <= {0.0, 1.0}
+    np.testing.assert_array_equal(out.computed, apply_weights(w_near, computed.ravel()))
@@ -0,0 +1,135 @@
+import pytest
+import numpy as np
+import xarray as xr
+
+from synsatipy.sampling import (
+    block_reduce,
+    lattice_mask,
+    refinement_region,
+    strided_isel,
+    upsample_bilinear,
+    upsample_from_strided,
+)
+
+
+def make_field(nlon=10, nlat=7):
+    """
+    Creates a linear test field on a regular lon / lat grid.
+    """
+    lon = np.linspace(0, 9, nlon)
+    lat = np.linspace(-3, 3, nlat)
+    field = lon[:, None] + 2 * lat[None, :]
+    return xr.DataArray(field, coords={"lon": lon, "lat": lat}, dims=("lon", "lat"))
+
+
+@pytest.mark.parametrize("method", ["nearest", "bilinear"])
+def test_upsample_keeps_computed_nodes(method):
+    """
+    Tests that values at the computed nodes are kept and the full grid is restored.
+    """
+    full = make_field()
+    stride = 3
+
+    coarse = full.isel(strided_isel(["lon", "lat"], stride))
+    filled = upsample_from_strided(
+        coarse, full.to_dataset(name="f"), ["lon", "lat"], stride, method=method
+    )
+
+    assert filled.sizes == full.sizes
+    np.testing.assert_array_equal(filled.lon, full.lon)
+    np.testing.assert_allclose(
+        filled.isel(strided_isel(["lon", "lat"], stride)), coarse
+    )
+
+
+def test_bilinear_upsample_is_exact_for_linear_field():
+    """
+    Tests that bilinear fill reproduces a linear field if the grid ends on a node.
+    """
+    full = make_field(nlon=10, nlat=7)
+    stride = 3
+
+    coarse = full.isel(strided_isel(["lon", "lat"], stride))
+    filled = upsample_from_strided(
+        coarse, full.to_dataset(name="f"), ["lon", "lat"], stride, method="bilinear"
+    )
+
+    np.testing.assert_allclose(filled, full, atol=1e-12)
+
+
+def test_block_reduce_includes_block_boundaries():
+    """
+    Tests that block maxima cover the closed blocks between lattice nodes.
+    """
+    a = np.arange(10.0)[np.newaxis, :] * np.ones((2, 1))
+
+    bmax = block_reduce(a, 3, [1], np.maximum)
+    bmin = block_reduce(a, 3, [1], np.minimum)
+
+    np.testing.assert_array_equal(bmax[0], [3, 6, 9, 9])
+    np.testing.assert_array_equal(bmin[0], [0, 3, 6, 9])
+
+
+def test_refinement_region_and_lattice():
+    """
+    Tests expansion of block flags to the full grid and the refined lattice.
+    """
+    shape = (1, 10, 7)
+    axes = [1, 2]
+
+    flags = np.zeros((1, 4, 3), dtype=bool)
+    flags[0, 1, 1] = True
+
+    region = refinement_region(flags, 3, shape, axes)
+
+    assert region.sum() == 16
+    assert region[0, 3:7, 3:7].all()
+
+    nodes = lattice_mask(shape, 3, axes)
+    assert nodes.sum() == 4 * 3
+    assert nodes[0, 9, 6]
+
+
+def test_bilinear_lattice_interpolation_keeps_nodes():
+    """
+    Tests that missing values next to a node are not spread onto the node.
+    """
+    lattice = np.array([[[1.0, np.nan]]])
+    full = upsample_bilinear(lattice, (1, 1, 3), 2, [2])
+
+    assert full[0, 0, 0] == 1.0
+    assert np.isnan(full[0, 0, 1])
+
+
+@pytest.mark.parametrize("masked", [False, True])
+def test_run_adaptive_with_stub_profiles(masked):
+    """
+    Tests that adaptive sampling fills all selected profiles, also next to masked columns.
+    """
+    from synsatipy.tests.test_synsat_output import make_input, make_synsat
+
+    input_data = make_input(ntime=1, nlat=9, nlon=17)
+    input_data["cc"] = xr.zeros_like(input_data["t"])
+
+    if masked:
+        mask = np.ones((9, 17), dtype=bool)
+        mask[[0, 4, 8], [8, 4, 16]] = False
+        input_data["mask"] = (("lat", "lon"), mask)
+
+    s = make_synsat(input_data, lambda sdat: None)
+    s.synsat.nchan_instrument = 1
+    sdat = s.synsat.data_handler
+
+    # brightness temperature linear in lon: exact under bilinear interpolation
+    def compute_profiles(profile_index, **kwargs):
+        lon = sdat.load_profiles(profile_index)["lon"].values
+        return 200.0 + 0.01 * lon[:, np.newaxis]
+
+    s.compute_profiles = compute_profiles
+    s.run_adaptive(adaptive_stride=4)
+
+    lon = sdat.load_profiles(slice(0, None))["lon"].values
+
+    assert s.synsat.result.shape == (sdat.total_number_of_profiles, 1)
+    np.testing.assert_allclose(s.synsat.result[:, 0], 200.0 + 0.01 * lon)
+    assert 0 < s.synsat.computed_flag.sum() < sdat.total_number_of_profiles
@@ -0,0 +1,110 @@
+import pytest
+import numpy as np
+import xarray as xr
+
+from synsatipy.utils.spacetools import (
+    geos_scan2lonlat,
+    lonlat2geos_scan,
+    points_in_polygon,
+    region_bounding_box,
+    region_to_isel,
+)
+
+
+def test_points_in_polygon():
+    """
+    Tests the point-in-polygon check for a triangle.
+    """
+    triangle = [(0, 0), (10, 0), (0, 10)]
+
+    lon = np.array([1, 6, -1, 4])
+    lat = np.array([1, 6, 5, 4])
+
+    inside = points_in_polygon(lon, lat, triangle)
+
+    np.testing.assert_array_equal(inside, [True, False, False, True])
+
+
+def test_region_to_isel_regular_grid():
+    """
+    Tests that a bounding box is translated into slices on a regular grid.
+    """
+    dset = xr.Dataset(
+        coords={"lon": np.arange(-20.0, 21.0, 2), "lat": np.arange(-10.0, 11.0, 1)}
+    )
+
+    isel = region_to_isel(dset, [-5, 5, 0, 3])
+
+    assert isel == {"lon": slice(8, 13), "lat": slice(10, 14)}
+
+
+def test_region_to_isel_unstructured_grid():
+    """
+    Tests that a region is translated into a cell selection on an unstructured grid.
+    """
+    clon = np.array([0.0, 1.0, 2.0, 30.0, 3.0])
+    clat = np.array([0.0, 1.0, 2.0, 30.0, 3.0])
+    dset = xr.Dataset({"clon": ("ncells", clon), "clat": ("ncells", clat)})
+
+    isel = region_to_isel(dset, [0.5, 2.5, 0.5, 2.5], "clon", "clat")
+    assert isel == {"ncells": slice(1, 3)}
+
+    isel = region_to_isel(dset, [0.5, 3.5, 0.5, 3.5], "clon", "clat")
+    np.testing.assert_array_equal(isel["ncells"], [1, 2, 4])
+
+
+@pytest.mark.parametrize("sweep", ["x", "y"])
+def test_geos_scan_angles_roundtrip(sweep):
+    """
+    Tests the geostationary projection and its inverse.
+    """
+    lon = np.array([-70.0, -75.2, 30.0, -120.0])
+    lat = np.array([30.0, 0.0, 0.0, -50.0])
+
+    x, y = lonlat2geos_scan(lon, lat, lon0=-75.2, sweep=sweep)
+
+    # sub-satellite point at the origin, far side not visible
+    assert x[1] == 0 and y[1] == 0
+    assert np.isnan(x[2]) and np.isnan(y[2])
+
+    lon2, lat2 = geos_scan2lonlat(x, y, lon0=-75.2, sweep=sweep)
+    np.testing.assert_allclose(lon2[[0, 1, 3]], lon[[0, 1, 3]], atol=1e-9)
+    np.testing.assert_allclose(lat2[[0, 1, 3]], lat[[0, 1, 3]], atol=1e-9)
+
+    # scan angles off the earth disk
+    assert np.isnan(geos_scan2lonlat(0.2, 0.0, sweep=sweep)[0])
+
+
+def test_region_to_isel_longitude_wrap():
+    """
+    Tests regions in -180 .. 180 on a 0 .. 360 grid and regions across the dateline.
+    """
+    dset = xr.Dataset(
+        coords={"lon": np.arange(0.0, 360.0, 5), "lat": np.arange(-10.0, 11.0, 1)}
+    )
+
+    # -10 .. 10 deg: the last and the first points of the grid, west to east
+    isel = region_to_isel(dset, [-10, 10, 0, 3])
+    np.testing.assert_array_equal(dset.lon[isel["lon"]], [350, 355, 0, 5, 10])
+    assert isel["lat"] == slice(10, 14)
+
+    # dateline crossing on a -180 .. 180 grid
+    dset = dset.assign_coords(lon=np.arange(-180.0, 180.0, 5))
+    isel = region_to_isel(dset, [170, -170, 0, 3])
+    np.testing.assert_array_equal(dset.lon[isel["lon"]], [170, 175, -180, -175, -170])
+
+    assert region_bounding_box([170, -170, 0, 3]) == [170, 190, 0, 3]
+    assert region_bounding_box([(170, 0), (-170, 0), (-170, 3)]) == [170, 190, 0, 3]
+
+    # unstructured grid in 0 .. 360 with a box and a polygon across 0 deg
+    clon = np.array([355.0, 5.0, 20.0, 340.0])
+    clat = np.array([1.0, 1.0, 1.0, 1.0])
+    cells = xr.Dataset({"clon": ("ncells", clon), "clat": ("ncells", clat)})
+
+    isel = region_to_isel(cells, [-10, 10, 0, 3], "clon", "clat")
+    assert isel == {"ncells": slice(0, 2)}
+
+    polygon = [(-10, 0), (10, 0), (10, 3), (-10, 3)]
+    np.testing.assert_array_equal(
+        points_in_polygon(clon, clat, polygon), [True, True, False, False]
+    )
@@ -0,0 +1,142 @@
+import pytest
+import numpy as np
+import xarray as xr
+
+from synsatipy.data_handler import DataHandler
+from synsatipy.synsat import SynSat, attributes
+from synsatipy.utils.spacetools import lonlat2azizen
+
+
+def make_input(ntime=2, nlat=3, nlon=4):
+    """
+    Creates a small input dataset on a regular lon / lat grid.
+    """
+    dset = xr.Dataset(
+        {"t": (("time", "lev", "lat", "lon"), np.zeros((ntime, 2, nlat, nlon), "f4"))},
+        coords={
+            "time": np.arange(ntime),
+            "lat": np.arange(nlat) * 1.0,
+            "lon": np.arange(nlon) * 1.0,
+        },
+    )
+    return dset
+
+
+def make_synsat(input_data, result, channels=("bt108",), existing_output=None, **kwargs):
+    """
+    Creates a SynSat object with given profile results, without RTTOV setup.
+    """
+    s = SynSat.__new__(SynSat)
+    s.synsat = attributes()
+
+    attr = s.synsat
+    attr.channels = list(channels)
+    attr.units = ["K"] * len(channels)
+    attr.instrument = "SEVIRI"
+    attr.computed_flag = None
+    attr.satellite_grid = None
+    attr.input_filename = "test"
+    attr.existing_output = existing_output
+
+    sdat = DataHandler()
+    sdat.input_data = input_data
+    sdat.stack_data_as_profile(**kwargs)
+
+    attr.data_handler = sdat
+    attr.result = result(sdat)
+
+    return s
+
+
+def test_select_missing_channels(tmp_path):
+    """
+    Tests that only channels missing in an existing output file are selected.
+    """
+    fname = str(tmp_path / "synsat.nc")
+    xr.Dataset({"bt062": ("x", [1.0]), "bt073": ("x", [2.0])}).to_netcdf(fname)
+
+    var_names = ["bt006", "bt008", "bt016", "bt039", "bt062", "bt073", "bt087", "bt097"]
+    var_names += ["bt108", "bt120", "bt134"]
+
+    s = SynSat.__new__(SynSat)
+    s.synsat = attributes()
+
+    assert s.select_missing_channels((5, 6, 9), var_names) == (5, 6, 9)
+    assert s.synsat.existing_output is None
+
+    assert s.select_missing_channels((5, 6, 9), var_names, synsat_existing_output=fname) == (9,)
+    assert s.synsat.existing_output == fname
+
+    with pytest.raises(ValueError):
+        s.select_missing_channels((5, 6), var_names, synsat_existing_output=fname)
+
+
+def test_extend_existing_output(tmp_path):
+    """
+    Tests that new channels are aligned to the grid and dimension order of the existing file.
+    """
+    input_data = make_input()
+
+    # existing file: other dimension order and descending latitudes
+    fname = str(tmp_path / "synsat.nc")
+    bt062 = np.random.default_rng(0).random((2, 4, 3))
+    existing = xr.Dataset(
+        {"bt062": (("time", "lon", "lat"), bt062)},
+        coords={"time": input_data.time, "lon": input_data.lon, "lat": input_data.lat[::-1]},
+    )
+    existing.attrs["title"] = "existing"
+    existing.to_netcdf(fname)
+
+    # new channel equals the flat profile number
+    s = make_synsat(
+        input_data,
+        lambda sdat: np.arange(sdat.total_number_of_profiles, dtype=float)[:, None],
+        existing_output=fname,
+    )
+    s.save(fname)
+
+    with xr.open_dataset(fname) as out:
+        out = out.load()
+
+    assert out["bt108"].dims == ("time", "lon", "lat")
+    assert out.attrs["title"] == "existing"
+
+    expected = np.arange(2 * 3 * 4.0).reshape(2, 3, 4)
+    np.testing.assert_array_equal(
+        out["bt108"].transpose("time", "lat", "lon").sel(lat=input_data.lat), expected
+    )
+    np.testing.assert_array_equal(out["bt062"], bt062)
+
+
+def test_zenith_filter_output_on_full_grid():
+    """
+    Tests that profiles beyond the maximum zenith are skipped and missing in the output.
+    """
+    input_data = make_input(nlat=5, nlon=12)
+    input_data = input_data.assign_coords(
+        lon=np.linspace(-40.0, 180.0, 12), lat=np.linspace(-60.0, 60.0, 5)
+    )
+
+    lon, lat = np.meshgrid(input_data.lon, input_data.lat)
+    azi, zen = lonlat2azizen(lon, lat, lon0=20.0)
+    in_view = zen <= 70.0
+
+    s = make_synsat(
+        input_data,
+        lambda sdat: np.full((sdat.total_number_of_profiles, 1), 250.0),
+        max_zenith=70.0,
+        lon0=20.0,
+    )
+    sdat = s.synsat.data_handler
+
+    # the grid spans the disk edge
+    assert 0 < in_view.sum() < in_view.size
+    assert sdat.total_number_of_profiles == 2 * in_view.sum()
+
+    out = s.extract_output()
+
+    assert out["bt108"].dims == ("time", "lat", "lon")
+    np.testing.assert_array_equal(
+        out["bt108"].notnull(), np.broadcast_to(in_view, (2, 5, 12))
+    )
+    np.testing.assert_array_equal(out["bt108"].values[:, in_view], 250.0)
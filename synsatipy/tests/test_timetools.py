@@ -0,0 +1,20 @@
+import numpy as np
+
+from synsatipy.utils.timetools import convert_time, convert_timevec
+
+
+def test_convert_timevec_matches_scalar_conversion():
+    """
+    Tests the array-wise time conversion in both directions against the scalar one.
+    """
+    tfloat = np.array([20200912.0, 20200912.5, 20201231.999999, 20200229.0416666])
+
+    times = convert_timevec(tfloat)
+
+    assert times.dtype == np.dtype("datetime64[ns]")
+    expected = np.array([convert_time(t) for t in tfloat], dtype="datetime64[ns]")
+    np.testing.assert_array_equal(times, expected)
+
+    np.testing.assert_allclose(
+        convert_timevec(times), [20200912.0, 20200912.5, 20210101.0, 20200229.0416667]
+    )
@@ -70,3 +70,462 @@ def lonlat2azizen(lon, lat, lon0 = 0.0):
 
 ######################################################################
 ######################################################################
+
+
+def zenith2delta(zen):
+
+    '''
+    Calculates the angle on the great circle between the sub-satellite point
+    and a pixel with given satellite zenith angle (inverse of the zenith
+    calculation in `lonlat2azizen`).
+
+
+    Parameters
+    ----------
+    zen : float or numpy array
+        satellite zenith angle in degree
+
+
+    Returns
+    -------
+    delta : float or numpy array
+        great-circle angle in degree
+    '''
+
+# satellite height and earth radius ..................................
+    H = 42164
+    R = 6378
+
+# law of sines in the triangle earth center - pixel - satellite .......
+    z = np.deg2rad(zen)
+    delta = z - np.arcsin( R / H * np.sin(z) )
+
+    return np.rad2deg(delta)
+
+######################################################################
+######################################################################
+
+
+def unwrap_polygon(polygon):
+
+    '''
+    Makes the longitudes of a polygon continuous, e.g. across the dateline.
+
+
+    Parameters
+    ----------
+    polygon : list or numpy array, shape (nvertices, 2)
+        (lon, lat) vertices of the polygon
+
+
+    Returns
+    -------
+    poly : numpy array, shape (nvertices, 2)
+        vertices without longitude jumps of more than 180 deg between neighbours
+    '''
+
+    poly = np.array(polygon, dtype=float)
+    poly[:, 0] = np.rad2deg(np.unwrap(np.deg2rad(poly[:, 0])))
+
+    return poly
+
+######################################################################
+######################################################################
+
+
+def points_in_polygon(lon, lat, polygon):
+
+    '''
+    Checks which points are located inside a lon / lat polygon (ray casting).
+
+
+    Parameters
+    ----------
+    lon : numpy array
+        longitude of the points
+   
+    lat : numpy array 
+        latitude of the points
+    
+    polygon : list or numpy array, shape (nvertices, 2)
+        (lon, lat) vertices of the polygon
+
+
+    Returns
+    -------
+    inside : numpy array
+        boolean mask, True inside the polygon
+
+
+    Notes
+    -----
+    Longitudes are compared modulo 360 deg, e.g. polygons across the
+    dateline or points in 0 .. 360.
+    '''
+
+    poly = unwrap_polygon(polygon)
+
+    # longitudes of the points east of the western edge of the polygon
+    lon_west = poly[:, 0].min()
+    lon = lon_west + np.mod(np.asarray(lon, dtype=float) - lon_west, 360)
+    lat = np.asarray(lat)
+
+    inside = np.zeros(np.broadcast(lon, lat).shape, dtype=bool)
+
+    # loop over polygon edges (vertex i -> vertex j)
+    nvert = len(poly)
+    for i in range(nvert):
+        lon_i, lat_i = poly[i]
+        lon_j, lat_j = poly[i - 1]
+
+        crosses = (lat_i > lat) != (lat_j > lat)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lon_cross = (lon_j - lon_i) * (lat - lat_i) / (lat_j - lat_i) + lon_i
+
+        inside ^= crosses & (lon < lon_cross)
+
+    return inside
+
+######################################################################
+######################################################################
+
+
+def longitude_in_range(lon, lon_min, lon_max):
+
+    '''
+    Checks which longitudes are inside a longitude range, modulo 360 deg.
+
+
+    Parameters
+    ----------
+    lon : numpy array
+        longitude of the points, in any convention (e.g. -180 .. 180 or 0 .. 360)
+
+    lon_min : float
+        western edge of the range
+
+    lon_max : float
+        eastern edge of the range, the range crosses the dateline (or the
+        0 deg meridian of 0 .. 360 grids) if lon_max < lon_min
+
+
+    Returns
+    -------
+    inside : numpy array
+        boolean mask, True inside the range
+    '''
+
+    lon = np.asarray(lon)
+    width = lon_max - lon_min
+
+    if width >= 360:
+        return np.ones(lon.shape, dtype=bool)
+
+    # distance east of the western edge
+    return np.mod(lon - lon_min, 360) <= np.mod(width, 360)
+
+######################################################################
+######################################################################
+
+
+def region_bounding_box(region):
+
+    '''
+    Gets the bounding box of a region.
+
+
+    Parameters
+    ----------
+    region : list or numpy array
+        either bounding box [lon_min, lon_max, lat_min, lat_max] or
+        (lon, lat) vertices of a polygon with shape (nvertices, 2)
+
+
+    Returns
+    -------
+    bbox : list
+        bounding box [lon_min, lon_max, lat_min, lat_max] with
+        lon_min <= lon_max, i.e. lon_max may exceed 180 deg for
+        regions crossing the dateline
+    '''
+
+    if np.ndim(region) == 2:
+        poly = unwrap_polygon(region)
+        return [poly[:, 0].min(), poly[:, 0].max(), poly[:, 1].min(), poly[:, 1].max()]
+
+    bbox = list(region)
+
+    # e.g. [170, -170, ...] crosses the dateline
+    if bbox[1] < bbox[0]:
+        bbox[1] = bbox[1] + 360
+
+    return bbox
+
+######################################################################
+######################################################################
+
+
+def region_to_isel(dset, region, lon_name = 'lon', lat_name = 'lat'):
+
+    '''
+    Translates a lon / lat region into an index selection on the native grid.
+
+
+    Parameters
+    ----------
+    dset : xarray Dataset
+        dataset containing the longitude and latitude coordinates
+   
+    region : list or numpy array
+        either bounding box [lon_min, lon_max, lat_min, lat_max] or
+        (lon, lat) vertices of a polygon with shape (nvertices, 2)
+    
+    lon_name : str, optional
+        name of the longitude variable. The default is 'lon'.
+
+    lat_name : str, optional
+        name of the latitude variable. The default is 'lat'.
+
+
+    Returns
+    -------
+    isel : dict
+        index selection, slices or integer arrays (regions across the
+        longitude seam of the grid, ordered from west to east) for regular
+        lon / lat grids and slices or integer arrays for unstructured grids
+        (e.g. ICON cells)
+
+
+    Notes
+    -----
+    For a polygon on a regular grid, the bounding box of the polygon is selected.
+
+    Longitudes are compared modulo 360 deg, so that regions in -180 .. 180
+    select the right points of grids in 0 .. 360 and vice versa.
+    '''
+
+    lon, lat = dset[lon_name], dset[lat_name]
+
+    is_polygon = np.ndim(region) == 2
+    bbox = region_bounding_box(region)
+
+    # regular grid: independent selections per dimension
+    if lon.ndim == 1 and lat.ndim == 1 and lon.dims != lat.dims:
+
+        isel = {}
+
+        index = np.where(longitude_in_range(lon.values, bbox[0], bbox[1]))[0]
+
+        if len(index) == 0:
+            raise ValueError(f'No grid points of {lon.name} in region {region}')
+
+        # regions across the seam of the grid: from the western edge eastwards
+        if index.max() - index.min() + 1 == len(index):
+            index = slice(index.min(), index.max() + 1)
+        else:
+            index = index[np.argsort(np.mod(lon.values[index] - bbox[0], 360), kind='stable')]
+
+        isel[lon.dims[0]] = index
+
+        index = np.where((lat.values >= bbox[2]) & (lat.values <= bbox[3]))[0]
+
+        if len(index) == 0:
+            raise ValueError(f'No grid points of {lat.name} in region {region}')
+
+        isel[lat.dims[0]] = slice(index.min(), index.max() + 1)
+
+        return isel
+
+    # unstructured grid: cells inside region
+    lon_values, lat_values = lon.values, lat.values
+
+    if is_polygon:
+        mask = points_in_polygon(lon_values, lat_values, region)
+    else:
+        mask = longitude_in_range(lon_values, bbox[0], bbox[1]) & \
+               (lat_values >= bbox[2]) & (lat_values <= bbox[3])
+
+    index = np.where(mask)[0]
+
+    if len(index) == 0:
+        raise ValueError(f'No grid cells in region {region}')
+
+    # contiguous cell ranges are selected as slice
+    if index.max() - index.min() + 1 == len(index):
+        index = slice(index.min(), index.max() + 1)
+
+    return {lon.dims[0]: index}
+
+######################################################################
+######################################################################
+
+
+def select_region(dset, region_isel):
+
+    '''
+    Applies a regional index selection on the dimensions present in a dataset.
+
+
+    Parameters
+    ----------
+    dset : xarray Dataset
+        input dataset
+   
+    region_isel : dict or None
+        index selection, see `region_to_isel`
+
+
+    Returns
+    -------
+    dset : xarray Dataset
+        regional dataset
+    '''
+
+    if region_isel is None:
+        return dset
+
+    return dset.isel({k: v for k, v in region_isel.items() if k in dset.dims})
+
+######################################################################
+######################################################################
+
+
+def geos_scan2lonlat(x, y, lon0 = 0.0, sweep = 'y', height = 35786023.0,
+                     r_eq = 6378137.0, r_pol = 6356752.31414):
+
+    '''
+    Calculates lon / lat of geostationary scan angles (fixed grid).
+    Follows the inverse of the PROJ "geos" projection.
+
+
+    Parameters
+    ----------
+    x : float or numpy array
+        east-west scan angle in radiant
+
+    y : float or numpy array
+        north-south scan angle in radiant
+
+    lon0 : float, optional
+        longitude of sub-satellite point. The default is 0.0.
+
+    sweep : str, optional
+        sweep angle axis, 'y' for Meteosat and 'x' for GOES.
+        The default is 'y'.
+
+    height : float, optional
+        satellite height above the equator in m. The default is 35786023.0.
+
+    r_eq : float, optional
+        equatorial earth radius in m. The default is 6378137.0.
+
+    r_pol : float, optional
+        polar earth radius in m. The default is 6356752.31414.
+
+
+    Returns
+    -------
+    lon : float or numpy array
+        longitude, NaN for scan angles off the earth disk
+
+    lat : float or numpy array
+        latitude, NaN for scan angles off the earth disk
+    '''
+
+# distances in units of the equatorial radius ........................
+    radius_g = 1 + height / r_eq
+    radius_p = r_pol / r_eq
+
+    x, y = np.asarray(x, dtype = float), np.asarray(y, dtype = float)
+
+# view vector from the satellite .....................................
+    if sweep == 'x':
+        vz = np.tan(y)
+        vy = np.tan(x) * np.hypot(1.0, vz)
+    else:
+        vy = np.tan(x)
+        vz = np.tan(y) * np.hypot(1.0, vy)
+
+# intersection with the earth ellipsoid ..............................
+    a = vy**2 + (vz / radius_p)**2 + 1.0
+    b = -2 * radius_g
+    det = b**2 - 4 * a * (radius_g**2 - 1)
+
+    with np.errstate(invalid = 'ignore'):
+        k = (-b - np.sqrt(det)) / (2 * a)
+
+    vx = radius_g - k
+    vy, vz = k * vy, k * vz
+
+    lam = np.arctan2(vy, vx)
+    phi = np.arctan(vz * np.cos(lam) / vx)
+    phi = np.arctan(np.tan(phi) / radius_p**2)
+
+    lon = np.rad2deg(lam) + lon0
+    lon = (lon + 180) % 360 - 180
+
+    return lon, np.rad2deg(phi)
+
+######################################################################
+######################################################################
+
+
+def lonlat2geos_scan(lon, lat, lon0 = 0.0, sweep = 'y', height = 35786023.0,
+                     r_eq = 6378137.0, r_pol = 6356752.31414):
+
+    '''
+    Calculates geostationary scan angles (fixed grid) of lon / lat.
+    Follows the PROJ "geos" projection.
+
+
+    Parameters
+    ----------
+    lon : float or numpy array
+        longitude
+
+    lat : float or numpy array
+        latitude
+
+    lon0, sweep, height, r_eq, r_pol : optional
+        see `geos_scan2lonlat`
+
+
+    Returns
+    -------
+    x : float or numpy array
+        east-west scan angle in radiant, NaN if not visible
+
+    y : float or numpy array
+        north-south scan angle in radiant, NaN if not visible
+    '''
+
+# distances in units of the equatorial radius ........................
+    radius_g = 1 + height / r_eq
+    radius_p = r_pol / r_eq
+
+    lam = np.deg2rad(np.asarray(lon, dtype = float) - lon0)
+    phi = np.arctan(radius_p**2 * np.tan(np.deg2rad(np.asarray(lat, dtype = float))))
+
+# position on the ellipsoid ..........................................
+    r = radius_p / np.hypot(radius_p * np.cos(phi), np.sin(phi))
+    vx = r * np.cos(lam) * np.cos(phi)
+    vy = r * np.sin(lam) * np.cos(phi)
+    vz = r * np.sin(phi)
+
+    tmp = radius_g - vx
+
+    if sweep == 'x':
+        x = np.arctan(vy / np.hypot(vz, tmp))
+        y = np.arctan(vz / tmp)
+    else:
+        x = np.arctan(vy / tmp)
+        y = np.arctan(vz / np.hypot(vy, tmp))
+
+# points on the far side of the earth are not visible ................
+    visible = tmp * vx - vy**2 - vz**2 / radius_p**2 >= 0
+
+    return np.where(visible, x, np.nan), np.where(visible, y, np.nan)
+
+######################################################################
+######################################################################
@@ -41,7 +41,7 @@ def convert_time(t, roundTo = 60.):
 
     if type(t) == type(t0):
 
-        tout = np.int( t.strftime('%Y%m%d') )
+        tout = int( t.strftime('%Y%m%d') )
         date = datetime.datetime.strptime(str(tout), '%Y%m%d')
 
         dt = (t - date).total_seconds()
@@ -64,7 +64,7 @@ def convert_time(t, roundTo = 60.):
 ######################################################################
 ######################################################################
 
-def convert_timevec( timevec ):
+def convert_timevec( timevec, roundTo = 60. ):
     '''
     Utility converts between an array of two time formats A->B or B->A: 
     
@@ -74,23 +74,104 @@ def convert_timevec( timevec ):
     timevec : list or array
         time list
         A = either float as %Y%m%d.%f where %f is fraction of the day
-        B = datetime object
+        B = datetime64 or datetime objects
+
+    roundTo : float, optional, default 1 minute
+        Closest number of seconds to round to for A->B.
 
 
     Returns
     -------
-    tout : list
-        list of datetime objects or floats
+    tout : numpy array
+        array of datetime64[ns] or floats
         time, counterpart to t
+
+
+    Notes
+    -----
+    The conversion is done array-wise, see `float2datetime64` and 
+    `datetime642float`.
     '''
-    
-    times = []
-    for tfloat in timevec:
-        times += [ convert_time( tfloat ), ]
-    
-    times = np.array( times )
-    
-    return times
+
+    timevec = np.asarray( timevec )
+
+    if np.issubdtype( timevec.dtype, np.number ):
+        return float2datetime64( timevec, roundTo = roundTo )
+    else:
+        return datetime642float( timevec.astype( 'datetime64[ns]' ) )
+
+######################################################################
+######################################################################
+
+def float2datetime64( t, roundTo = 60. ):
+    '''
+    Converts floats as %Y%m%d.%f (%f is fraction of the day) to datetime64.
+
+
+    Parameters
+    ----------
+    t : float or array of floats
+        time as %Y%m%d.%f
+
+    roundTo : float, optional, default 1 minute
+        Closest number of seconds to round to.
+
+
+    Returns
+    -------
+    tout : numpy array of datetime64[ns]
+        rounded time
+    '''
+
+    t = np.asarray( t, dtype = np.float64 )
+
+    date = np.floor( t ).astype( np.int64 )
+    year, month, day = date // 10000, date // 100 % 100, date % 100
+
+    # calendar day
+    tout = ( year - 1970 ).astype( 'datetime64[Y]' )
+    tout = ( tout + ( month - 1 ).astype( 'timedelta64[M]' ) ).astype( 'datetime64[D]' )
+    tout = tout + ( day - 1 ).astype( 'timedelta64[D]' )
+
+    # fraction of the day, rounded as in roundTime
+    seconds = ( t - date ) * 24 * 3600
+    seconds = np.floor( seconds / roundTo + 0.5 ) * roundTo
+
+    tout = tout.astype( 'datetime64[ns]' ) + np.round( seconds * 1e9 ).astype( 'timedelta64[ns]' )
+
+    return tout
+
+######################################################################
+######################################################################
+
+def datetime642float( t ):
+    '''
+    Converts datetime64 to floats as %Y%m%d.%f (%f is fraction of the day).
+
+
+    Parameters
+    ----------
+    t : datetime64 or array of datetime64
+        time
+
+
+    Returns
+    -------
+    tout : numpy array of floats
+        time as %Y%m%d.%f
+    '''
+
+    t = np.asarray( t, dtype = 'datetime64[ns]' )
+
+    Y, M, D = [ t.astype( f'datetime64[{x}]' ) for x in 'YMD' ]
+
+    year = Y.astype( np.int64 ) + 1970
+    month = ( M - Y ).astype( np.int64 ) + 1
+    day = ( D - M ).astype( np.int64 ) + 1
+
+    frac = ( t - D ) / np.timedelta64( 1, 'D' )
+
+    return year * 10000 + month * 100 + day + frac
 
 ######################################################################
 ######################################################################